@@ -0,0 +1,84 @@
+"""
+Rank the resumes of a ZIP file on an asyncio event loop
+
+Standalone runner for AsyncResumeProcessingService, without Django: resumes
+are scored concurrently through the async OpenAI client, and --deadline
+stops a run that takes too long. With --checkpoint, the resumes finished
+before the deadline are kept, and running the same command again only
+scores the rest.
+
+Usage:
+    python async_ranker.py resumes.zip --jd job_description.txt --output ranked_resumes.xlsx
+"""
+import os
+import sys
+import asyncio
+import argparse
+from dotenv import load_dotenv
+
+from resume_app import reports
+from resume_app.async_service import AsyncResumeProcessingService
+from resume_app.checkpoints import JsonlCheckpoint
+from resume_app.services import SCORING_MODES
+
+
+def parse_args():
+    """Parse command line options (settings from .env are used as defaults)"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('zip_file', help='ZIP file of PDF, DOCX and TXT resumes')
+    parser.add_argument('--jd', default=os.getenv('JD_FILE', 'job_description.txt'),
+                        help='Job description text file')
+    parser.add_argument('--output', default=os.getenv('OUTPUT_EXCEL', 'ranked_resumes.xlsx'),
+                        help='Ranking report file (.xlsx, .csv or .parquet)')
+    parser.add_argument('--model', default=os.getenv('MODEL', 'gpt-3.5-turbo'))
+    parser.add_argument('--scoring-mode', choices=SCORING_MODES, default=os.getenv('SCORING_MODE', 'two_call'))
+    parser.add_argument('--max-workers', type=int, default=int(os.getenv('MAX_WORKERS', '8')),
+                        help='Resumes scored at once')
+    parser.add_argument('--deadline', type=float, default=float(os.getenv('SESSION_DEADLINE', '0')),
+                        help='Seconds allowed for the run (default: 0, no limit)')
+    parser.add_argument('--checkpoint', default=os.getenv('CHECKPOINT_FILE'),
+                        help='JSON Lines file of finished resumes; a rerun skips the resumes it holds')
+    return parser.parse_args()
+
+
+async def rank(args, api_key, job_description):
+    """Process the ZIP file; returns the result dict of aprocess_zip_file"""
+    checkpoint = JsonlCheckpoint(args.checkpoint, resume=True) if args.checkpoint else None
+    service = AsyncResumeProcessingService(
+        api_key, args.model,
+        max_workers=args.max_workers,
+        scoring_mode=args.scoring_mode,
+        deadline=args.deadline,
+        checkpoint=checkpoint
+    )
+    try:
+        return await service.aprocess_zip_file(args.zip_file, job_description)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+
+def main():
+    load_dotenv()
+    args = parse_args()
+
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        print('[ERROR] OPENAI_API_KEY is not set')
+        return 1
+
+    with open(args.jd, 'r', encoding='utf-8') as f:
+        job_description = f.read().strip()
+
+    result = asyncio.run(rank(args, api_key, job_description))
+    if not result['success']:
+        print(f"[ERROR] {result['error']}")
+        return 1
+
+    rows = reports.write_report(args.output, result['results'])
+    print(f"[✔] Ranked {rows} resume(s) into {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Compare wall time and token usage of the scoring modes
+
+Runs ResumeProcessingService over a folder of resumes once per scoring mode
+(two-call, single-call and the offline keyword scorer), with an empty LLM
+response cache each time so every request hits the API.
+Text extraction and criteria generation are done once up front and shared.
+
+Usage:
+    python benchmarks/scoring_modes.py --resumes path/to/resumes --jd job_description.txt
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resume_app.caches import ResponseCache
+from resume_app.services import ResumeProcessingService, SCORING_MODES
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--resumes', required=True, help='Folder containing resume files')
+    parser.add_argument('--jd', required=True, help='Job description text file')
+    parser.add_argument('--model', default=os.getenv('MODEL', 'gpt-3.5-turbo'))
+    parser.add_argument('--max-workers', type=int, default=1)
+    args = parser.parse_args()
+
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        print('[ERROR] OPENAI_API_KEY is not set')
+        return 1
+
+    with open(args.jd, 'r', encoding='utf-8') as f:
+        job_description = f.read().strip()
+
+    resume_files = sorted(
+        os.path.join(args.resumes, f) for f in os.listdir(args.resumes)
+        if f.lower().endswith(('.pdf', '.docx', '.txt', '.doc'))
+    )
+    if not resume_files:
+        print('No resume files found.')
+        return 1
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        setup = ResumeProcessingService(
+            api_key, args.model,
+            response_cache=ResponseCache(os.path.join(cache_dir, 'setup.sqlite3'))
+        )
+        optimized_criteria = setup.create_optimized_prompt(job_description)
+        if not optimized_criteria:
+            print('[ERROR] Failed to create optimized criteria from job description.')
+            return 1
+        # Warm the extraction cache so every mode measures scoring only
+        for path in resume_files:
+            setup.extract_text(path)
+
+        rows = []
+        for mode in SCORING_MODES:
+            service = ResumeProcessingService(
+                api_key, args.model,
+                max_workers=args.max_workers,
+                scoring_mode=mode,
+                response_cache=ResponseCache(os.path.join(cache_dir, f'{mode}.sqlite3'))
+            )
+            started = time.perf_counter()
+            results = service.process_resumes(resume_files, optimized_criteria)
+            elapsed = time.perf_counter() - started
+            rows.append((mode, elapsed, sum(1 for r in results if r), service.usage))
+
+    print()
+    print(f"{'Mode':<12} {'Wall time':>10} {'Scored':>7} {'Requests':>9} {'Prompt tok':>11} {'Compl. tok':>11}")
+    for mode, elapsed, scored, usage in rows:
+        print(
+            f"{mode:<12} {elapsed:>9.1f}s {scored:>7} {usage['requests']:>9} "
+            f"{usage['prompt_tokens']:>11} {usage['completion_tokens']:>11}"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,32 +1,129 @@
 from django.contrib import admin
-from .models import ResumeUploadSession
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.html import format_html
+from .jobs import enqueue_session, stale_sessions
+from .models import CandidateResult, CandidateSkillScore, Resume, ResumeUploadSession, ScoringCriteria
 
 
 @admin.register(ResumeUploadSession)
 class ResumeUploadSessionAdmin(admin.ModelAdmin):
     """Admin configuration for ResumeUploadSession"""
 
-    list_display = ['id', 'created_at', 'processed', 'get_results_count', 'has_error']
-    list_filter = ['processed', 'created_at']
+    list_display = ['id', 'created_at', 'status', 'processed', 'results_count', 'has_error']
+    list_filter = ['status', 'processed', 'created_at']
     search_fields = ['job_description', 'error_message']
-    readonly_fields = ['created_at', 'results', 'criteria', 'error_message']
+    readonly_fields = ['created_at', 'criteria', 'scoring_criteria', 'error_message', 'candidates_link',
+                       'worker_id', 'started_at', 'heartbeat_at', 'finished_at', 'resumes_total',
+                       'resumes_extracted', 'resumes_scored', 'resumes_failed', 'resumes_skipped']
     ordering = ['-created_at']
+    actions = ['requeue_sessions']
+    show_full_result_count = False
 
     fieldsets = (
         ('Upload Information', {
             'fields': ('job_description', 'zip_file', 'created_at')
         }),
         ('Processing Status', {
-            'fields': ('processed', 'error_message')
+            'fields': ('status', 'processed', 'error_message', 'worker_id', 'started_at', 'heartbeat_at',
+                       'finished_at')
+        }),
+        ('Progress', {
+            'fields': ('resumes_total', 'resumes_extracted', 'resumes_scored', 'resumes_failed',
+                       'resumes_skipped'),
+            'classes': ('collapse',)
         }),
         ('Results', {
-            'fields': ('results', 'criteria'),
+            'fields': ('candidates_link', 'criteria', 'scoring_criteria'),
             'classes': ('collapse',)
         }),
     )
 
+    def get_queryset(self, request):
+        # Keep large text and JSON columns out of the changelist query
+        return super().get_queryset(request).defer('job_description', 'results', 'criteria')
+
+    @admin.display(description='Candidates')
+    def candidates_link(self, obj):
+        """Link to the session's candidates, which may be too many to show inline"""
+        url = reverse('admin:resume_app_candidateresult_changelist')
+        return format_html('<a href="{}?session__id__exact={}">{} candidates</a>', url, obj.id, obj.results_count)
+
     def has_error(self, obj):
         """Display if session has error"""
         return bool(obj.error_message)
     has_error.boolean = True
     has_error.short_description = 'Has Error'
+
+    @admin.action(description='Requeue selected failed or stalled sessions')
+    def requeue_sessions(self, request, queryset):
+        """Put failed sessions, and running sessions whose worker stopped reporting, back on the job queue"""
+        requeued = 0
+        # Pending, completed and live running sessions are left alone
+        for session in queryset.filter(Q(status=ResumeUploadSession.STATUS_FAILED) | stale_sessions()):
+            enqueue_session(session)
+            requeued += 1
+        message = f'{requeued} session(s) requeued.'
+        skipped = queryset.count() - requeued
+        if skipped:
+            message += f' {skipped} pending, running or completed session(s) skipped.'
+        self.message_user(request, message)
+
+
+@admin.register(ScoringCriteria)
+class ScoringCriteriaAdmin(admin.ModelAdmin):
+    """Admin configuration for ScoringCriteria"""
+
+    list_display = ['id', 'llm_model', 'jd_hash', 'use_count', 'created_at', 'last_used_at']
+    list_filter = ['llm_model']
+    search_fields = ['jd_hash', 'criteria']
+    readonly_fields = ['jd_hash', 'llm_model', 'created_at', 'last_used_at', 'use_count']
+    ordering = ['-last_used_at']
+
+
+class CandidateSkillScoreInline(admin.TabularInline):
+    """Per-skill scores shown on the candidate page"""
+
+    model = CandidateSkillScore
+    fields = ['skill', 'score']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CandidateResult)
+class CandidateResultAdmin(admin.ModelAdmin):
+    """Admin configuration for CandidateResult"""
+
+    list_display = ['id', 'session', 'rank', 'name', 'email', 'total_score', 'file_name']
+    list_filter = ['session__status']
+    search_fields = ['name', 'email', 'file_name', 'file_hash']
+    readonly_fields = ['session', 'rank', 'total_score', 'file_name', 'file_hash', 'resume', 'duplicate_file_names']
+    list_select_related = ['session']
+    ordering = ['session', 'rank']
+    inlines = [CandidateSkillScoreInline]
+
+    def get_queryset(self, request):
+        # Sessions are only shown by name; skip their text and JSON columns
+        return super().get_queryset(request).defer(
+            'session__job_description', 'session__results', 'session__criteria'
+        )
+
+
+@admin.register(Resume)
+class ResumeAdmin(admin.ModelAdmin):
+    """Admin configuration for Resume"""
+
+    list_display = ['id', 'name', 'email', 'seen_count', 'near_duplicate_of', 'first_seen_at', 'last_seen_at']
+    search_fields = ['file_hash', 'name', 'email']
+    readonly_fields = ['file_hash', 'simhash', 'near_duplicate_of', 'first_seen_at', 'last_seen_at', 'seen_count']
+    exclude = ['simhash_band0', 'simhash_band1', 'simhash_band2', 'simhash_band3', 'simhash_band4', 'simhash_band5']
+    list_select_related = ['near_duplicate_of']
+    ordering = ['-last_seen_at']
+
+    def get_queryset(self, request):
+        # Resume text is only needed on the change page
+        return super().get_queryset(request).defer('text', 'near_duplicate_of__text')
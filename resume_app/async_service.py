@@ -0,0 +1,429 @@
+import os
+import json
+import asyncio
+import zipfile
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from asgiref.sync import sync_to_async
+from openai import AsyncOpenAI
+from .caches import ResponseCache, sha256_bytes
+from .contact_extractor import has_contact_details
+from . import batching, extractors, text_compaction
+from .llm_client import AsyncLLMClient
+from .services import (
+    SCORING_MODE_BATCHED, SCORING_MODE_KEYWORD, SCORING_MODE_SINGLE_CALL, NO_CRITERIA_ERROR, NO_RESUMES_ERROR,
+    ResumeProcessingService
+)
+
+
+async def gather_or_cancel(*aws):
+    """
+    Await coroutines concurrently, like asyncio.gather
+
+    If one raises or the caller is cancelled, the others are cancelled and
+    awaited before the error propagates, so no task outlives the call.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class AsyncResumeProcessingService(ResumeProcessingService):
+    """
+    ResumeProcessingService for asyncio code, such as async Django views
+
+    Requests go through AsyncOpenAI, so one event loop drives as many
+    resumes (and sessions) as the rate limits allow without a thread per
+    request. Text extraction runs in the loop's default executor (or a
+    process pool when extract_workers > 1); caches and the checkpoint,
+    progress and lookup hooks run one at a time in a shared thread. Prompts, records, scoring modes, the
+    prefilter and checkpoints behave as in ResumeProcessingService.
+
+    Use the coroutine methods (aprocess_zip_file, arank_resume, ...); the
+    inherited blocking methods that call the API don't work with the async
+    client.
+
+    Args:
+        deadline: Seconds allowed for an aprocess_zip_file call (None: no
+            limit); resumes finished before it passes stay in the checkpoint
+        Other arguments as for ResumeProcessingService; max_workers is the
+        number of resumes scored at once.
+    """
+
+    openai_client_class = AsyncOpenAI
+    llm_client_class = AsyncLLMClient
+    batch_scorer_class = batching.AsyncBatchScorer
+
+    def __init__(self, *args, deadline=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deadline = deadline or None
+
+    @staticmethod
+    async def _run_blocking(func, *args, **kwargs):
+        """
+        Run a blocking call without blocking the event loop
+
+        Calls share one thread, as sync_to_async does in Django, so hooks that
+        write to the database (e.g. SQLite) never run concurrently, across
+        sessions as well.
+        """
+        return await sync_to_async(func, thread_sensitive=True)(*args, **kwargs)
+
+    @staticmethod
+    async def _run_in_executor(func, *args, **kwargs):
+        """Run a slow blocking call, such as text extraction, in the event loop's default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def _acount_progress(self, **counts):
+        # on_progress may write to a database, which must not block the loop
+        await self._run_blocking(self._count_progress, **counts)
+
+    async def _acomplete(self, prompt, use_cache=False, excerpts=()):
+        """Send a single-message chat completion and return the answer text (see _complete)"""
+        if use_cache:
+            cache_key = ResponseCache.make_key(self.model, prompt)
+            cached_answer = await self._run_blocking(self.response_cache.get, cache_key)
+            if cached_answer is not None:
+                return cached_answer
+
+        answer = self._answer_text(await self.llm_client.complete(prompt))
+        self._count_sent(excerpts)
+
+        if use_cache:
+            try:
+                json.loads(answer)
+            except json.JSONDecodeError:
+                return answer
+            await self._run_blocking(self.response_cache.set, cache_key, answer)
+        return answer
+
+    def _batch_complete(self, prompt, excerpts):
+        return self._acomplete(prompt, use_cache=True, excerpts=excerpts)
+
+    async def acreate_optimized_prompt(self, job_description):
+        """Use OpenAI to create an optimized ranking prompt from job description"""
+        try:
+            return await self._acomplete(self._criteria_prompt(job_description))
+        except Exception as e:
+            print(f"[ERROR] Failed to create optimized prompt: {e}")
+            return None
+
+    async def aextract_candidate_info(self, text):
+        """Extract candidate information from resume text"""
+        try:
+            excerpt = self._fit(text, text_compaction.DEFAULT_CONTACT_TOKEN_BUDGET)
+            return await self._acomplete(self._contact_prompt(excerpt), use_cache=True, excerpts=[excerpt])
+        except Exception as e:
+            print(f"[ERROR] OpenAI API failed for candidate info extraction: {e}")
+            return None
+
+    async def arank_resume(self, text, optimized_criteria):
+        """Rank resume using the optimized criteria from job description"""
+        if not optimized_criteria:
+            return None
+
+        try:
+            excerpt = self._fit(text)
+            return await self._acomplete(
+                self._ranking_prompt(excerpt, optimized_criteria), use_cache=True, excerpts=[excerpt]
+            )
+
+        except json.JSONDecodeError:
+            print("[ERROR] Could not parse optimized criteria from job description")
+            return None
+        except Exception as e:
+            print(f"[ERROR] OpenAI API failed: {e}")
+            return None
+
+    async def ascore_resume(self, text, optimized_criteria):
+        """Extract candidate information and rank the resume in a single request"""
+        if not optimized_criteria:
+            return None
+
+        try:
+            excerpt = self._fit(text)
+            return await self._acomplete(
+                self._scoring_prompt(excerpt, optimized_criteria), use_cache=True, excerpts=[excerpt]
+            )
+
+        except json.JSONDecodeError:
+            print("[ERROR] Could not parse optimized criteria from job description")
+            return None
+        except Exception as e:
+            print(f"[ERROR] OpenAI API failed: {e}")
+            return None
+
+    async def _ascore_single(self, text, optimized_criteria):
+        """Score one resume with a single_call request; returns the parsed answer or None"""
+        answer = await self.ascore_resume(text, optimized_criteria)
+        try:
+            return json.loads(answer) if answer else None
+        except json.JSONDecodeError:
+            return None
+
+    async def aprocess_resume_text(self, text, filename, optimized_criteria, contact_info=None):
+        """
+        Score a resume from its extracted text (see process_resume_text)
+
+        When the LLM has to look up contact details, that request and the
+        ranking request are sent concurrently.
+        """
+        if not text:
+            return None
+
+        print(f"Processing: {filename}...")
+
+        candidate_info = self._contact_details(text, contact_info)
+        if self.scoring_mode == SCORING_MODE_KEYWORD:
+            return self._keyword_record(text, filename, optimized_criteria, candidate_info)
+
+        candidate_info_result = None
+
+        if self.scoring_mode in (SCORING_MODE_SINGLE_CALL, SCORING_MODE_BATCHED):
+            ranking_result = await self.ascore_resume(text, optimized_criteria)
+            candidate_info_result = ranking_result
+        elif has_contact_details(candidate_info):
+            ranking_result = await self.arank_resume(text, optimized_criteria)
+        else:
+            candidate_info_result, ranking_result = await gather_or_cancel(
+                self.aextract_candidate_info(text), self.arank_resume(text, optimized_criteria)
+            )
+
+        return self._finish_record(
+            text, filename, optimized_criteria, candidate_info, candidate_info_result, ranking_result
+        )
+
+    async def aprocess_zip_file(self, zip_file_path, job_description, optimized_criteria=None):
+        """
+        Process a zip file containing resumes and return ranked results
+
+        Returns the same dict as process_zip_file. When ``deadline`` passes,
+        the resumes still in progress are cancelled and an error is
+        returned; cancelling the calling task cancels them as well.
+        """
+        try:
+            zip_ref = await self._run_blocking(zipfile.ZipFile, zip_file_path, 'r')
+        except zipfile.BadZipFile:
+            return {
+                'success': False,
+                'error': 'Invalid zip file. Please upload a valid zip file.'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Error processing resumes: {str(e)}'
+            }
+
+        try:
+            with zip_ref:
+                return await asyncio.wait_for(
+                    self._aprocess_zip(zip_ref, job_description, optimized_criteria), self.deadline
+                )
+        except asyncio.TimeoutError:
+            error = f'Processing did not finish within {self.deadline:g} seconds.'
+            if self.checkpoint is not None:
+                error += ' The resumes finished so far were kept; processing the upload again only scores the rest.'
+            return {
+                'success': False,
+                'error': error
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Error processing resumes: {str(e)}'
+            }
+
+    async def _aprocess_zip(self, zip_ref, job_description, optimized_criteria):
+        """Rank the resumes of an open ZipFile (see aprocess_zip_file)"""
+        resume_members = self.list_resume_members(zip_ref)
+
+        if not resume_members:
+            return {
+                'success': False,
+                'error': NO_RESUMES_ERROR
+            }
+
+        self.job_description = job_description
+        local_criteria = False
+        if not optimized_criteria:
+            print("Creating optimized ranking criteria from job description...")
+            optimized_criteria = await self.acreate_optimized_prompt(job_description)
+        if not optimized_criteria:
+            optimized_criteria = self._local_criteria(job_description)
+            local_criteria = True
+        if not optimized_criteria:
+            return {
+                'success': False,
+                'error': NO_CRITERIA_ERROR
+            }
+
+        before = await self._run_blocking(self._start_run, resume_members)
+        texts = {}
+        results = await self.aprocess_zip_members(zip_ref, resume_members, optimized_criteria, texts)
+        return await self._run_blocking(
+            self._run_result, results, resume_members, optimized_criteria, local_criteria, texts, before
+        )
+
+    async def aprocess_zip_members(self, zip_ref, members, optimized_criteria, texts=None):
+        """
+        Extract and score the resumes of an open ZipFile (see process_zip_members)
+
+        Up to max_workers resumes are scored at once; in two_call and
+        single_call mode without a prefilter, each resume is scored as soon
+        as its text is extracted.
+        """
+        extract_first = (
+            self.scoring_mode in (SCORING_MODE_BATCHED, SCORING_MODE_KEYWORD)
+            or self.prefilter_top_k or self.prefilter_threshold
+        )
+        scoring_slots = asyncio.Semaphore(self.max_workers)
+
+        async def score(filename, file_hash, text, contact_info):
+            async with scoring_slots:
+                resume_data = await self.aprocess_resume_text(text, filename, optimized_criteria, contact_info)
+            return await self._run_blocking(self._tag_record, resume_data, file_hash, text, texts)
+
+        async def keep_extracted(filename, file_hash, text, contact_info):
+            return filename, file_hash, text, contact_info
+
+        results, duplicates, restored = await self._amap_members(
+            zip_ref, members, keep_extracted if extract_first else score
+        )
+        if not extract_first:
+            return self._attach_duplicates(results, duplicates, restored)
+
+        extracted = results
+        if self.scoring_mode == SCORING_MODE_KEYWORD:
+            results = await self._run_blocking(self._keyword_score_extracted, extracted, optimized_criteria, texts)
+            return self._attach_duplicates(results, duplicates, restored)
+
+        kept = [index for index, item in enumerate(extracted) if item and item[2]]
+        if self.prefilter_top_k or self.prefilter_threshold:
+            kept = await self._run_blocking(self._shortlist, extracted, kept, optimized_criteria)
+
+        results = [None] * len(extracted)
+        if self.scoring_mode == SCORING_MODE_BATCHED:
+            records = await self._ascore_in_batches([extracted[index] for index in kept], optimized_criteria, texts)
+        else:
+            records = await gather_or_cancel(*(score(*extracted[index]) for index in kept))
+        for index, resume_data in zip(kept, records):
+            results[index] = resume_data
+        return self._attach_duplicates(results, duplicates, restored)
+
+    async def _ascore_in_batches(self, items, optimized_criteria, texts=None):
+        """Score extracted resumes several per request (see _score_in_batches)"""
+        resume_texts = [text or '' for _, _, text, _ in items]
+        batch_scorer = self._batch_scorer(
+            optimized_criteria, lambda index: self._ascore_single(resume_texts[index], optimized_criteria)
+        )
+        if batch_scorer is None:
+            await self._acount_progress(failed=len(items))
+            return [None] * len(items)
+
+        records = [None] * len(items)
+
+        async def record_batch(answers):
+            for index, ranking_data in answers.items():
+                records[index] = await self._run_blocking(
+                    self._batch_record, items[index], ranking_data, optimized_criteria, texts
+                )
+
+        excerpts = [self._fit(text) for text in resume_texts]
+        try:
+            await batch_scorer.score(excerpts, concurrency=self.max_workers, on_batch=record_batch)
+        finally:
+            for key, value in batch_scorer.stats.items():
+                self.batch_stats[key] += value
+        return records
+
+    async def _amap_members(self, zip_ref, members, handle):
+        """
+        Extract the resumes of a ZipFile and pass each text to ``handle`` (see _map_members)
+
+        Members are read one at a time; at most
+        2 * max(max_workers, extract_workers) are extracted or handled at
+        once. ``handle(filename, file_hash, text, contact_info)`` is a
+        coroutine function.
+        """
+        first_seen = {}
+        duplicates = {}
+        restored = {}
+        window = asyncio.Semaphore(max(self.max_workers, self.extract_workers) * 2)
+        extract_pool = ProcessPoolExecutor(max_workers=self.extract_workers) if self.extract_workers > 1 else None
+        loop = asyncio.get_running_loop()
+
+        async def extract(data, filename, file_hash):
+            if extract_pool is None:
+                return await self._run_in_executor(self.extract_text_from_bytes, data, filename, file_hash)
+            cached_text = await self._run_blocking(self.extraction_cache.get, file_hash)
+            if cached_text is not None:
+                return cached_text
+            try:
+                outcome = await loop.run_in_executor(
+                    extract_pool, extractors.extract_in_worker, data, filename, self.extract_timeout
+                )
+            except Exception as e:
+                # The worker process itself died (e.g. crashed in a native library)
+                print(f"[ERROR] Failed to extract {filename}: {e}")
+                return ""
+            return await self._run_blocking(self._worker_text, outcome, filename, file_hash)
+
+        async def handle_in_window(filename, file_hash, data, text, contact_info):
+            try:
+                if text is None:
+                    text = await extract(data, filename, file_hash)
+                await self._acount_progress(**{'extracted' if text else 'failed': 1})
+                self._count_extracted(text)
+                return await handle(filename, file_hash, text, contact_info)
+            finally:
+                window.release()
+
+        tasks = {}
+        try:
+            for index, member in enumerate(members):
+                await window.acquire()
+                filename = os.path.basename(member.filename)
+                data = await self._run_blocking(self._read_member, zip_ref, member)
+                if data is None:
+                    await self._acount_progress(failed=1)
+                    window.release()
+                    continue
+
+                file_hash = sha256_bytes(data)
+                if file_hash in first_seen:
+                    original = first_seen[file_hash]
+                    duplicates.setdefault(original, []).append(filename)
+                    self.dedup['duplicate_files'] += 1
+                    await self._acount_progress(skipped=1)
+                    print(f"[!] {filename} has the same content as "
+                          f"{os.path.basename(members[original].filename)}; scoring it once")
+                    window.release()
+                    continue
+                first_seen[file_hash] = index
+
+                restored[index] = await self._run_blocking(self._restore, file_hash, filename)
+                if restored[index]:
+                    window.release()
+                    continue
+
+                known = await self._run_blocking(self._lookup_resume, file_hash)
+                tasks[index] = asyncio.ensure_future(handle_in_window(
+                    filename, file_hash, data, known['text'] if known else None, known
+                ))
+
+            handled = dict(zip(tasks, await gather_or_cancel(*tasks.values())))
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            if extract_pool is not None:
+                extract_pool.shutdown(wait=False)
+        return [handled.get(index) for index in range(len(members))], duplicates, restored
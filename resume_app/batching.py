@@ -0,0 +1,311 @@
+import json
+import asyncio
+import threading
+
+from .text_compaction import count_tokens
+
+# Prompt tokens per batched request (evaluation prompt and resumes) and
+# resumes per request; smaller batches leave more room for the answer
+DEFAULT_TOKEN_BUDGET = 8000
+DEFAULT_MAX_BATCH_SIZE = 8
+
+
+def pack_batches(sizes, token_budget=DEFAULT_TOKEN_BUDGET, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 overhead=0):
+    """
+    Group items into batches that fit a token budget
+
+    Items are packed in order; a batch is closed when the next item would
+    exceed ``token_budget`` or the batch holds ``max_batch_size`` items. An
+    item larger than the budget gets a batch of its own.
+
+    Args:
+        sizes: Token count of each item
+        token_budget: Maximum tokens per batch, including ``overhead``
+        max_batch_size: Maximum items per batch
+        overhead: Tokens every batch spends on its shared preamble
+
+    Returns:
+        list: Lists of item indices
+    """
+    batches = []
+    current = []
+    used = overhead
+    for index, size in enumerate(sizes):
+        if current and (used + size > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+            used = overhead
+        current.append(index)
+        used += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_prompt(evaluation_prompt, entries):
+    """
+    Build a prompt that scores several resumes in one request
+
+    Args:
+        evaluation_prompt: Evaluation prompt from the criteria JSON
+        entries: (resume id, resume text) pairs; texts are sent as given, so
+            callers fit them to a token budget first
+    """
+    resumes = '\n\n'.join(
+        f"=== Resume {resume_id} ===\n{text}" for resume_id, text in entries
+    )
+    return f"""
+{evaluation_prompt}
+
+Please analyze each of the following resumes separately and provide scores based on the criteria above.
+Also extract each candidate's full name, email address and phone number.
+
+Respond with a JSON object containing one entry per resume, using the id from the resume's header:
+{{
+    "results": [
+        {{
+            "id": "<resume id>",
+            "name": "<candidate full name>",
+            "email": "<email address>",
+            "phone": "<phone number>",
+            "total_score": <number>,
+            "skill_scores": {{
+                "skill_name": <score>,
+                ...
+            }},
+            "summary": "<brief explanation of scoring>"
+        }}
+    ]
+}}
+
+If any contact information is not found, use "Not Found" as the value.
+
+Resumes:
+{resumes}
+"""
+
+
+def parse_batch_response(answer, resume_ids):
+    """
+    Pick the usable per-resume entries out of a batched answer
+
+    Entries with an unknown id or without a numeric total_score are
+    dropped, so those resumes are retried.
+
+    Returns:
+        dict: Parsed entry by resume id
+    """
+    data = json.loads(answer)
+    entries = data.get('results', []) if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        return {}
+
+    parsed = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        resume_id = str(entry.get('id', '')).strip()
+        if resume_id in resume_ids and _is_number(entry.get('total_score')):
+            parsed.setdefault(resume_id, entry)
+    return parsed
+
+
+def _is_number(value):
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+class BatchScorer:
+    """
+    Score resumes several per request, splitting batches that fail
+
+    When a batched answer is missing every resume (e.g. it was cut off or
+    is not valid JSON), the batch is split in half and each half retried;
+    when only some are missing, those are retried together. A resume that
+    still fails on its own is handed to ``score_one``. A request that raises
+    fails its whole batch without splitting, since smaller requests would
+    fail the same way.
+
+    Args:
+        evaluation_prompt: Evaluation prompt from the criteria JSON
+        complete: Callable(prompt, texts) returning the LLM answer text,
+            where texts are the resume texts in the prompt
+        score_one: Callable(index) returning a parsed single-resume answer
+            or None, for resumes that fail in a batch of one
+        token_budget: Prompt tokens per batched request
+        max_batch_size: Resumes per batched request
+    """
+
+    def __init__(self, evaluation_prompt, complete, score_one, token_budget=DEFAULT_TOKEN_BUDGET,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+        self.evaluation_prompt = evaluation_prompt
+        self.complete = complete
+        self.score_one = score_one
+        self.token_budget = token_budget
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.overhead = count_tokens(build_batch_prompt(evaluation_prompt, []))
+        # Batched prompts scored (cache hits included), requests that raised,
+        # batches split after failing, and resumes scored on their own after
+        # failing in a batch
+        self.stats = {'batches': 0, 'failed': 0, 'splits': 0, 'single_retries': 0}
+        self._lock = threading.Lock()
+
+    def pack(self, texts):
+        """Group resume texts into batches of indices (see pack_batches)"""
+        sizes = [count_tokens(text) for text in texts]
+        return pack_batches(sizes, self.token_budget, self.max_batch_size, self.overhead)
+
+    def score(self, texts, executor=None, on_batch=None):
+        """
+        Score resume texts in batches
+
+        Args:
+            texts: Resume texts, already fit to the prompt token budget
+            executor: Optional executor to send batches concurrently
+            on_batch: Optional callable({index: answer or None}) called in
+                the calling thread as each batch is done, in batch order
+
+        Returns:
+            list: Parsed answer (or None) for each text
+        """
+        batches = self.pack(texts)
+        if executor is None:
+            answers = (self._score_batch(texts, batch) for batch in batches)
+        else:
+            answers = executor.map(lambda batch: self._score_batch(texts, batch), batches)
+
+        results = [None] * len(texts)
+        for batch_answers in answers:
+            for index, entry in batch_answers.items():
+                results[index] = entry
+            if on_batch is not None:
+                on_batch(batch_answers)
+        return results
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _batch_prompt(self, texts, indices):
+        """Build the prompt for a batch of text indices; returns (resume ids, prompt)"""
+        resume_ids = [f'R{position}' for position in range(1, len(indices) + 1)]
+        prompt = build_batch_prompt(
+            self.evaluation_prompt, [(resume_id, texts[index]) for resume_id, index in zip(resume_ids, indices)]
+        )
+        self._count('batches')
+        return resume_ids, prompt
+
+    def _request_failed(self, indices, error):
+        """Results of a batch whose request raised"""
+        print(f"[ERROR] OpenAI API failed for a batch of {len(indices)} resume(s): {error}")
+        self._count('failed')
+        return {index: None for index in indices}
+
+    @staticmethod
+    def _parse_answer(answer, resume_ids, indices):
+        """Map a batched answer back to text indices; returns ({index: answer or None}, missing indices)"""
+        try:
+            parsed = parse_batch_response(answer, set(resume_ids))
+        except (json.JSONDecodeError, AttributeError):
+            print(f"[!] Could not parse the answer for a batch of {len(indices)} resume(s)")
+            parsed = {}
+
+        results = {index: parsed.get(resume_id) for resume_id, index in zip(resume_ids, indices)}
+        return results, [index for index in indices if results[index] is None]
+
+    def _score_batch(self, texts, indices):
+        """Score one batch of text indices, retrying failures; returns {index: answer or None}"""
+        resume_ids, prompt = self._batch_prompt(texts, indices)
+        try:
+            answer = self.complete(prompt, [texts[index] for index in indices])
+        except Exception as e:
+            return self._request_failed(indices, e)
+
+        results, missing = self._parse_answer(answer, resume_ids, indices)
+        if not missing:
+            return results
+
+        if len(indices) == 1:
+            self._count('single_retries')
+            results[indices[0]] = self.score_one(indices[0])
+        elif len(missing) == len(indices):
+            self._count('splits')
+            half = len(indices) // 2
+            results.update(self._score_batch(texts, indices[:half]))
+            results.update(self._score_batch(texts, indices[half:]))
+        else:
+            results.update(self._score_batch(texts, missing))
+        return results
+
+
+class AsyncBatchScorer(BatchScorer):
+    """
+    BatchScorer whose ``complete`` and ``score_one`` are coroutine functions
+
+    Batches are retried and split the same way. score() is a coroutine that
+    runs up to ``concurrency`` batches at once and cancels the batches still
+    running if it fails or is cancelled itself.
+    """
+
+    async def score(self, texts, concurrency=1, on_batch=None):
+        """
+        Score resume texts in batches
+
+        Args:
+            texts: Resume texts, already fit to the prompt token budget
+            concurrency: Batches scored at once
+            on_batch: Optional coroutine function({index: answer or None})
+                awaited as each batch is done, in batch order
+
+        Returns:
+            list: Parsed answer (or None) for each text
+        """
+        slots = asyncio.Semaphore(max(1, int(concurrency)))
+
+        async def score_batch(batch):
+            async with slots:
+                return await self._score_batch(texts, batch)
+
+        tasks = [asyncio.ensure_future(score_batch(batch)) for batch in self.pack(texts)]
+        results = [None] * len(texts)
+        try:
+            for task in tasks:
+                batch_answers = await task
+                for index, entry in batch_answers.items():
+                    results[index] = entry
+                if on_batch is not None:
+                    await on_batch(batch_answers)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return results
+
+    async def _score_batch(self, texts, indices):
+        """Score one batch of text indices, retrying failures; returns {index: answer or None}"""
+        resume_ids, prompt = self._batch_prompt(texts, indices)
+        try:
+            answer = await self.complete(prompt, [texts[index] for index in indices])
+        except Exception as e:
+            return self._request_failed(indices, e)
+
+        results, missing = self._parse_answer(answer, resume_ids, indices)
+        if not missing:
+            return results
+
+        if len(indices) == 1:
+            self._count('single_retries')
+            results[indices[0]] = await self.score_one(indices[0])
+        elif len(missing) == len(indices):
+            self._count('splits')
+            half = len(indices) // 2
+            results.update(await self._score_batch(texts, indices[:half]))
+            results.update(await self._score_batch(texts, indices[half:]))
+        else:
+            results.update(await self._score_batch(texts, missing))
+        return results
@@ -0,0 +1,192 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Caches live next to the project by default so the CLI and the web app share them
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache'
+)
+# Writes between exact recounts of a cache's size (other processes may write
+# to the same file) and purges of its expired entries
+SIZE_CHECK_INTERVAL = 100
+# Eviction frees space down to this share of the size limit, so a full cache
+# is not recounted on every write
+EVICT_TARGET = 0.9
+
+
+def sha256_bytes(data):
+    """Return the hex SHA-256 digest of a bytes object"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(file_path, chunk_size=1024 * 1024):
+    """Return the hex SHA-256 digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SQLiteCache:
+    """
+    Small persistent key/value cache stored in a SQLite file
+
+    Entries are evicted least-recently-used first once the total stored size
+    exceeds ``max_bytes``, and expire ``ttl`` seconds after being written when
+    a ttl is given. Safe to share between threads; separate processes can use
+    the same file concurrently.
+
+    The stored size is tracked as entries are written and only summed over
+    the whole table every SIZE_CHECK_INTERVAL writes, or when the tracked
+    size goes over the limit; writes of other processes are picked up then.
+    """
+
+    table = 'cache'
+
+    def __init__(self, path, max_bytes, ttl=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Bytes stored (as far as this process knows) and writes since the last recount
+        self._total = 0
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                'key TEXT PRIMARY KEY, '
+                'value TEXT NOT NULL, '
+                'size INTEGER NOT NULL, '
+                'created_at REAL NOT NULL DEFAULT 0, '
+                'last_used REAL NOT NULL)'
+            )
+            columns = {row[1] for row in self._conn.execute(f'PRAGMA table_info({self.table})')}
+            if 'created_at' not in columns:
+                self._conn.execute(
+                    f'ALTER TABLE {self.table} ADD COLUMN created_at REAL NOT NULL DEFAULT 0'
+                )
+            self._conn.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.table}_last_used_idx ON {self.table} (last_used)'
+            )
+            self._recount()
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f'SELECT value, created_at, size FROM {self.table} WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and self.ttl and row[1] + self.ttl < now:
+                self._conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+                self._total -= row[2]
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                f'UPDATE {self.table} SET last_used = ? WHERE key = ?', (now, key)
+            )
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, value):
+        """Store value under key and evict old entries if over the size limit"""
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            replaced = self._conn.execute(
+                f'SELECT size FROM {self.table} WHERE key = ?', (key,)
+            ).fetchone()
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, value, size, now, now)
+            )
+            self._total += size - (replaced[0] if replaced else 0)
+            self._writes += 1
+            if self._writes >= SIZE_CHECK_INTERVAL or self._total > self.max_bytes:
+                self._evict()
+
+    def _recount(self):
+        """Delete expired entries and sum the size of the others"""
+        if self.ttl:
+            self._conn.execute(
+                f'DELETE FROM {self.table} WHERE created_at < ?', (time.time() - self.ttl,)
+            )
+        self._total = self._conn.execute(f'SELECT COALESCE(SUM(size), 0) FROM {self.table}').fetchone()[0]
+        self._writes = 0
+
+    def _evict(self):
+        """Recount the cache and, if over max_bytes, delete least recently used entries down to EVICT_TARGET"""
+        self._recount()
+        total = self._total
+        if total <= self.max_bytes:
+            return
+
+        stale_keys = []
+        for key, size in self._conn.execute(
+            f'SELECT key, size FROM {self.table} ORDER BY last_used ASC'
+        ):
+            stale_keys.append((key,))
+            total -= size
+            if total <= self.max_bytes * EVICT_TARGET:
+                break
+        self._conn.executemany(f'DELETE FROM {self.table} WHERE key = ?', stale_keys)
+        self._total = total
+
+    def stats(self):
+        """Return hit/miss counters for this process"""
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+class ExtractionCache(SQLiteCache):
+    """Extracted resume text keyed by the SHA-256 of the original file bytes"""
+
+    table = 'extracted_text'
+
+    def __init__(self, path=None, max_mb=None):
+        path = path or os.getenv(
+            'EXTRACTION_CACHE_PATH', os.path.join(DEFAULT_CACHE_DIR, 'extraction_cache.sqlite3')
+        )
+        max_mb = max_mb if max_mb is not None else float(os.getenv('EXTRACTION_CACHE_MAX_MB', '256'))
+        super().__init__(path, int(max_mb * 1024 * 1024))
+
+
+class ResponseCache(SQLiteCache):
+    """
+    Chat completion answers keyed by model and prompt
+
+    Scoring prompts embed the criteria and the truncated resume text, so the
+    key changes whenever any of them do. Calls use temperature=0, which makes
+    replaying an answer equivalent to asking again.
+    """
+
+    table = 'llm_responses'
+
+    def __init__(self, path=None, max_mb=None, ttl_hours=None):
+        path = path or os.getenv(
+            'LLM_CACHE_PATH', os.path.join(DEFAULT_CACHE_DIR, 'llm_cache.sqlite3')
+        )
+        max_mb = max_mb if max_mb is not None else float(os.getenv('LLM_CACHE_MAX_MB', '128'))
+        ttl_hours = ttl_hours if ttl_hours is not None else float(os.getenv('LLM_CACHE_TTL_HOURS', '168'))
+        super().__init__(path, int(max_mb * 1024 * 1024), ttl=ttl_hours * 3600 or None)
+
+    @staticmethod
+    def make_key(model, prompt):
+        """Build the cache key for a model/prompt pair"""
+        return sha256_bytes(f"{model}\0{prompt}".encode('utf-8'))
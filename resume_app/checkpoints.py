@@ -0,0 +1,98 @@
+import os
+import json
+import threading
+
+
+class Checkpoint:
+    """
+    Results of the resumes finished so far in a run, by file hash
+
+    A run given a checkpoint skips the resumes it already holds and adds
+    each resume's record as soon as it is scored, so an interrupted run can
+    be resumed without paying for finished work again. Failed resumes are
+    not added and are retried. This class keeps records in memory;
+    subclasses persist them in save().
+
+    Args:
+        records: Records of resumes finished earlier, by file hash
+    """
+
+    def __init__(self, records=None):
+        self.records = dict(records or {})
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, file_hash):
+        """Return a copy of the finished record for a file hash, or None"""
+        record = self.records.get(file_hash)
+        return dict(record) if record else None
+
+    def add(self, file_hash, record, text=None):
+        """Store the record of a finished resume; safe to call from several threads"""
+        if not file_hash or not record:
+            return
+        with self._lock:
+            if file_hash in self.records:
+                return
+            self.save(file_hash, record, text)
+            self.records[file_hash] = dict(record)
+
+    def save(self, file_hash, record, text):
+        """Persist one finished record (nothing to do for an in-memory checkpoint)"""
+
+    def close(self):
+        """Release any file or connection held by the checkpoint"""
+
+
+class JsonlCheckpoint(Checkpoint):
+    """
+    Checkpoint kept in a JSON Lines file, one finished resume per line
+
+    Every line is flushed and synced to disk as it is written, so a crash
+    loses at most the line being written; a truncated last line is ignored
+    when the file is read back.
+
+    Args:
+        path: Checkpoint file
+        resume: Load the records already in the file (otherwise it is started over)
+    """
+
+    def __init__(self, path, resume=False):
+        records = self.read(path) if resume and os.path.exists(path) else {}
+        super().__init__(records)
+        self.path = path
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._file.tell() and not self._ends_with_newline(path):
+            # Start after the truncated line rather than appending to it
+            self._file.write('\n')
+
+    @staticmethod
+    def _ends_with_newline(path):
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    @staticmethod
+    def read(path):
+        """Load the records of a checkpoint file, by file hash"""
+        records = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The run stopped part way through writing this line
+                    continue
+                if isinstance(entry, dict) and entry.get('file_hash') and entry.get('record'):
+                    records[entry['file_hash']] = entry['record']
+        return records
+
+    def save(self, file_hash, record, text):
+        self._file.write(json.dumps({'file_hash': file_hash, 'record': record}, default=str) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
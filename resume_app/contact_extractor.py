@@ -0,0 +1,132 @@
+import re
+
+from .text_compaction import HEADING_SECTIONS, heading_section
+
+NOT_FOUND = 'Not Found'
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b')
+# Phone numbers in the usual groupings, on one line: groups are split by a
+# single space, tab, dot or dash, and the number may not start or end
+# inside a word or a decimal such as "3.9"
+PHONE_PATTERN = re.compile(r'''
+    (?<![\w+])(?<!\d\.)
+    (?:
+        \+\d{1,3}(?:[ \t.-]?(?:\(\d{1,5}\)|\d{1,5})){2,5}
+      | (?:1[ \t.-]?)?(?:\(\d{3}\)|\d{3})[ \t.-]?\d{3}[ \t.-]?\d{4}
+      | (?:\(\d{2,5}\)|\d{2,5})(?:[ \t.-]?\d{2,5}){1,3}
+    )
+    (?![\w+]|\.\d)
+''', re.VERBOSE)
+# Runs of years ("2012 2016", "2010-2014-2018") are dates, not phone numbers,
+# and neither are years run into a number ("2019-2021 555 010 1234")
+YEARS_PATTERN = re.compile(r'(?:(?:19|20)\d\d[ \t.-]?)+')
+LEADING_YEARS_PATTERN = re.compile(r'^(?:(?:19|20)\d\d[ \t.-]+)+')
+# Labels of ID numbers that are as long as phone numbers ("Student ID: 20201234567")
+ID_LABEL_PATTERN = re.compile(
+    r'\b(?:id|identification|student|employee|roll|registration|reg|account|acct|passport|licen[cs]e|ssn'
+    r'|serial)\b(?:\s*(?:no|num|number|#))?[\s.:#-]*$',
+    re.IGNORECASE
+)
+NAME_WORD_PATTERN = re.compile(r"^[A-Z][A-Za-z'.-]*$")
+NAME_PARTICLES = {'de', 'da', 'del', 'der', 'di', 'la', 'le', 'van', 'von', 'bin', 'al'}
+# Headings and job titles that commonly sit above or below the name
+NON_NAME_LINE_PATTERN = re.compile(
+    r'resume|curriculum|vitae|\bcv\b|profile|summary|objective|contact|address|linkedin|github'
+    r'|skills|experience|education|engineer|developer|manager|analyst|designer|consultant'
+    r'|scientist|architect|administrator|specialist|intern\b|senior|junior|lead\b',
+    re.IGNORECASE
+)
+# Words of section headings ("Work History", "Core Competencies"), never part of a name
+HEADING_WORDS = {word for heading in HEADING_SECTIONS for word in heading.split() if len(word) > 3}
+
+MIN_PHONE_DIGITS = 10
+MAX_PHONE_DIGITS = 15
+NAME_SEARCH_LINES = 8
+
+
+def normalize_phone(raw_phone):
+    """Reduce a phone number to its digits, keeping a leading + for country codes"""
+    digits = re.sub(r'\D', '', raw_phone)
+    if raw_phone.strip().startswith('+'):
+        return f"+{digits}"
+    return digits
+
+
+def find_email(text):
+    """Return the first email address in text, or None"""
+    match = EMAIL_PATTERN.search(text)
+    return match.group(0) if match else None
+
+
+def find_phone(text):
+    """Return the first plausible phone number in text, normalized, or None"""
+    for match in PHONE_PATTERN.finditer(text):
+        candidate = match.group(0)
+        if YEARS_PATTERN.fullmatch(candidate):
+            continue
+        number = LEADING_YEARS_PATTERN.sub('', candidate)
+        if sum(c.isdigit() for c in number) >= MIN_PHONE_DIGITS:
+            candidate = number
+        line_start = text.rfind('\n', 0, match.start()) + 1
+        if ID_LABEL_PATTERN.search(text[line_start:match.start()]):
+            continue
+        digit_count = sum(c.isdigit() for c in candidate)
+        if MIN_PHONE_DIGITS <= digit_count <= MAX_PHONE_DIGITS:
+            return normalize_phone(candidate)
+    return None
+
+
+def find_name(text):
+    """Best-effort candidate name: the first short, capitalized line near the top, before any section heading"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for line in lines[:NAME_SEARCH_LINES]:
+        if heading_section(line):
+            # Lines under a heading are section content, not the name
+            break
+        if '@' in line or any(c.isdigit() for c in line) or NON_NAME_LINE_PATTERN.search(line):
+            continue
+        words = line.replace(',', ' ').split()
+        if not 2 <= len(words) <= 4 or any(word.lower() in HEADING_WORDS for word in words):
+            continue
+        if (NAME_WORD_PATTERN.match(words[0]) and NAME_WORD_PATTERN.match(words[-1])
+                and all(NAME_WORD_PATTERN.match(word) or word in NAME_PARTICLES for word in words[1:-1])):
+            # Keep the capitalization as written ("McDonald", "MCDONALD")
+            return ' '.join(words)
+    return None
+
+
+def extract_contact_info(text):
+    """
+    Extract name, email and phone from resume text without calling the LLM
+
+    Returns:
+        dict: {"name", "email", "phone"}, using "Not Found" for missing values
+    """
+    return {
+        'name': find_name(text) or NOT_FOUND,
+        'email': find_email(text) or NOT_FOUND,
+        'phone': find_phone(text) or NOT_FOUND,
+    }
+
+
+def has_contact_details(contact_info):
+    """Return True if the name and an email or phone number were found (the LLM is asked otherwise)"""
+    return contact_info['name'] != NOT_FOUND and (
+        contact_info['email'] != NOT_FOUND or contact_info['phone'] != NOT_FOUND
+    )
+
+
+def merge_contact_info(local_info, llm_info):
+    """
+    Combine the local pass with the contact fields of an LLM answer
+
+    The LLM's name wins whenever it gives one, since the local pass only
+    guesses the name from the layout; emails and phone numbers found
+    locally are kept, and only missing ones are taken from the answer.
+    """
+    merged = dict(local_info)
+    for key, value in merged.items():
+        answer = llm_info.get(key)
+        if answer and answer != NOT_FOUND and (key == 'name' or value == NOT_FOUND):
+            merged[key] = answer
+    return merged
@@ -0,0 +1,229 @@
+import io
+import os
+import time
+import signal
+import zipfile
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+
+import textract
+
+try:
+    import pypdf
+except ImportError:  # optional, faster than pdfminer when installed
+    pypdf = None
+
+try:
+    from pdfminer.high_level import extract_text as pdfminer_extract_text
+except ImportError:  # installed with textract, but guard anyway
+    pdfminer_extract_text = None
+
+
+# Extension -> function(data) -> text. These run in-process; formats without
+# an entry (such as legacy .doc), and files whose extractor returns None,
+# fall back to textract, which spawns external tools per file.
+_EXTRACTORS = {}
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+class ExtractionTimeout(Exception):
+    """Raised when extracting a single file takes longer than allowed"""
+
+
+def register_extractor(*extensions):
+    """Register a function(data) -> text as the extractor for file extensions"""
+    def decorator(func):
+        for extension in extensions:
+            _EXTRACTORS[extension.lower()] = func
+        return func
+    return decorator
+
+
+def get_extractor(filename):
+    """Return the native extractor for a filename, or None to use textract"""
+    return _EXTRACTORS.get(os.path.splitext(filename)[1].lower())
+
+
+class ExtractionTimings:
+    """Thread-safe per-backend counters of files, failures and seconds spent"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, backend, seconds, failed=False):
+        with self._lock:
+            stats = self._stats.setdefault(backend, {'files': 0, 'failures': 0, 'seconds': 0.0})
+            stats['files'] += 1
+            stats['seconds'] += seconds
+            if failed:
+                stats['failures'] += 1
+
+    def snapshot(self):
+        """Return a copy of the counters with the average time per file"""
+        with self._lock:
+            return {
+                backend: dict(stats, avg_ms=round(stats['seconds'] * 1000 / stats['files'], 2))
+                for backend, stats in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def raw(self):
+        """Return a copy of the counters, suitable for merge()"""
+        with self._lock:
+            return {backend: dict(stats) for backend, stats in self._stats.items()}
+
+    def merge(self, other_stats):
+        """Add counters collected elsewhere (e.g. in a worker process)"""
+        with self._lock:
+            for backend, other in other_stats.items():
+                stats = self._stats.setdefault(backend, {'files': 0, 'failures': 0, 'seconds': 0.0})
+                for key in ('files', 'failures', 'seconds'):
+                    stats[key] += other[key]
+
+
+timings = ExtractionTimings()
+
+
+def get_extraction_timings():
+    """Return per-backend extraction timings collected in this process"""
+    return timings.snapshot()
+
+
+@register_extractor('.txt')
+def extract_txt(data):
+    """Decode plain text, falling back to Latin-1 for non-UTF-8 files"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+@register_extractor('.docx')
+def extract_docx(data):
+    """Read paragraph text from a DOCX package with the standard library"""
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        document = package.read('word/document.xml')
+
+    paragraphs = []
+    for paragraph in ET.fromstring(document).iter(f'{WORD_NAMESPACE}p'):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f'{WORD_NAMESPACE}t' and node.text:
+                parts.append(node.text)
+            elif node.tag == f'{WORD_NAMESPACE}tab':
+                parts.append('\t')
+            elif node.tag in (f'{WORD_NAMESPACE}br', f'{WORD_NAMESPACE}cr'):
+                parts.append('\n')
+        paragraphs.append(''.join(parts))
+    return '\n'.join(paragraphs)
+
+
+@register_extractor('.pdf')
+def extract_pdf(data):
+    """Extract PDF text with pypdf if installed, otherwise pdfminer (None without either: use textract)"""
+    if pypdf is not None:
+        reader = pypdf.PdfReader(io.BytesIO(data))
+        return '\n'.join(page.extract_text() or '' for page in reader.pages)
+    if pdfminer_extract_text is not None:
+        return pdfminer_extract_text(io.BytesIO(data))
+    return None
+
+
+def extract_with_textract(data, filename):
+    """Run textract on a temporary copy of the file (spawns external tools)"""
+    suffix = os.path.splitext(filename)[1].lower()
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+        temp_file.write(data)
+    try:
+        return textract.process(temp_file.name).decode('utf-8')
+    finally:
+        os.remove(temp_file.name)
+
+
+def extract_text_from_bytes(data, filename):
+    """
+    Extract text from resume file contents
+
+    Uses the registered in-process extractor for the file type and falls
+    back to textract when there is none, it returns None or it fails.
+    Raises the textract error if every backend fails.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    extractor = get_extractor(filename)
+
+    if extractor is not None:
+        started = time.perf_counter()
+        try:
+            text = extractor(data)
+        except ExtractionTimeout:
+            timings.record(extension.lstrip('.'), time.perf_counter() - started, failed=True)
+            raise
+        except Exception as e:
+            timings.record(extension.lstrip('.'), time.perf_counter() - started, failed=True)
+            print(f"[!] In-process extraction failed for {filename}, falling back to textract: {e}")
+        else:
+            if text is not None:
+                timings.record(extension.lstrip('.'), time.perf_counter() - started)
+                return text.strip()
+
+    started = time.perf_counter()
+    try:
+        text = extract_with_textract(data, filename)
+    except Exception:
+        timings.record(f'textract{extension}', time.perf_counter() - started, failed=True)
+        raise
+    timings.record(f'textract{extension}', time.perf_counter() - started)
+    return text.strip()
+
+
+def extract_text_from_file(file_path):
+    """Extract text from a resume file on disk"""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    return extract_text_from_bytes(data, os.path.basename(file_path))
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+
+def extract_in_worker(data, filename, timeout=None):
+    """
+    Entry point for process-pool extraction workers
+
+    Extracts one file, aborting after ``timeout`` seconds where SIGALRM is
+    available (POSIX). Never raises; returns ``(text, timings, error)`` so
+    the parent process can merge the timings of failed files too.
+    """
+    timings.reset()
+    text, error = "", None
+    use_alarm = bool(timeout) and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        text = extract_text_from_bytes(data, filename)
+    except ExtractionTimeout:
+        error = f"timed out after {timeout}s"
+    except Exception as e:
+        error = str(e)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return text, timings.raw(), error
+
+
+def extract_file_in_worker(file_path, timeout=None):
+    """Process-pool entry point for a file on disk (see extract_in_worker)"""
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return "", {}, str(e)
+    return extract_in_worker(data, os.path.basename(file_path), timeout)
@@ -0,0 +1,77 @@
+import re
+import hashlib
+
+import numpy as np
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+# Near-duplicate lookups split the fingerprint into bands: two fingerprints
+# within MAX_NEAR_DUPLICATE_DISTANCE bits of each other share at least one
+# band, so the database only compares rows that match a band exactly.
+SIMHASH_BANDS = 6
+MAX_NEAR_DUPLICATE_DISTANCE = SIMHASH_BANDS - 1
+# 11 or 10 bits per band
+BAND_WIDTHS = [
+    SIMHASH_BITS // SIMHASH_BANDS + (1 if band < SIMHASH_BITS % SIMHASH_BANDS else 0)
+    for band in range(SIMHASH_BANDS)
+]
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def _shingles(text):
+    """Yield overlapping word n-grams of normalized text"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        if words:
+            yield ' '.join(words)
+        return
+    for i in range(len(words) - SHINGLE_SIZE + 1):
+        yield ' '.join(words[i:i + SHINGLE_SIZE])
+
+
+def simhash(text):
+    """
+    Compute a 64-bit SimHash fingerprint of resume text
+
+    Resumes that differ only in formatting, whitespace or a few edited words
+    get fingerprints that differ in a few bits.
+
+    Returns:
+        int: Unsigned 64-bit fingerprint, or None if the text has no words
+    """
+    # Each distinct shingle counts once, so repeated boilerplate doesn't dominate
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for shingle in set(_shingles(text))
+    ]
+    if not hashes:
+        return None
+    bits = (np.array(hashes, dtype=np.uint64)[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    # A bit is set when more shingles have it set than unset
+    weights = 2 * bits.sum(axis=0, dtype=np.int64) - len(hashes)
+    return sum(1 << bit for bit in np.flatnonzero(weights > 0).tolist())
+
+
+def hamming_distance(first, second):
+    """Number of differing bits between two fingerprints"""
+    return bin(first ^ second).count('1')
+
+
+def simhash_bands(fingerprint):
+    """Split a fingerprint into SIMHASH_BANDS integers of BAND_WIDTHS bits"""
+    bands = []
+    for width in BAND_WIDTHS:
+        bands.append(fingerprint & ((1 << width) - 1))
+        fingerprint >>= width
+    return bands
+
+
+def to_signed(fingerprint):
+    """Store an unsigned 64-bit fingerprint in a signed 64-bit database column"""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def to_unsigned(value):
+    """Inverse of to_signed"""
+    return value + (1 << 64) if value < 0 else value
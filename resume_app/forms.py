@@ -7,7 +7,7 @@ class ResumeUploadForm(forms.ModelForm):
 
     class Meta:
         model = ResumeUploadSession
-        fields = ['job_description', 'zip_file']
+        fields = ['job_description', 'zip_file', 'scoring_mode', 'prefilter_top_k', 'prefilter_threshold']
         widgets = {
             'job_description': forms.Textarea(attrs={
                 'class': 'form-control',
@@ -17,15 +17,39 @@ class ResumeUploadForm(forms.ModelForm):
             'zip_file': forms.FileInput(attrs={
                 'class': 'form-control',
                 'accept': '.zip'
+            }),
+            'scoring_mode': forms.Select(attrs={
+                'class': 'form-select'
+            }),
+            'prefilter_top_k': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'min': 1,
+                'placeholder': 'All resumes'
+            }),
+            'prefilter_threshold': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'min': 0,
+                'max': 1,
+                'step': 0.01,
+                'placeholder': 'No minimum'
             })
         }
         labels = {
             'job_description': 'Job Description',
-            'zip_file': 'Upload Resumes (ZIP file)'
+            'zip_file': 'Upload Resumes (ZIP file)',
+            'scoring_mode': 'Scoring Mode',
+            'prefilter_top_k': 'Shortlist Size',
+            'prefilter_threshold': 'Minimum Similarity'
         }
         help_texts = {
             'job_description': 'Provide a detailed job description including required and preferred skills.',
-            'zip_file': 'Upload a ZIP file containing resumes in PDF, DOCX, or TXT format.'
+            'zip_file': 'Upload a ZIP file containing resumes in PDF, DOCX, or TXT format.',
+            'scoring_mode': 'Fast mode sends one request per resume instead of two. '
+                            'Batched mode scores several resumes per request. '
+                            'Offline mode scores skill keywords locally without AI calls.',
+            'prefilter_top_k': 'Only send the N resumes most similar to the job description to the AI. '
+                               'Leave empty to score every resume.',
+            'prefilter_threshold': 'Skip resumes whose similarity to the job description (0 to 1) is lower.'
         }
 
     def clean_zip_file(self):
@@ -53,3 +77,88 @@ class ResumeUploadForm(forms.ModelForm):
                 raise forms.ValidationError('Job description must be at least 50 characters long.')
 
         return job_description
+
+
+class ResultsFilterForm(forms.Form):
+    """Sorting, filtering and page size options for the results page"""
+
+    SORT_RANK = 'rank'
+    SORT_RANK_REVERSED = '-rank'
+    SORT_SKILL = 'skill'
+    SORT_CHOICES = [
+        (SORT_RANK, 'Total score (high to low)'),
+        (SORT_RANK_REVERSED, 'Total score (low to high)'),
+        (SORT_SKILL, 'Selected skill score (high to low)'),
+    ]
+    PER_PAGE_CHOICES = [(25, '25'), (50, '50'), (100, '100')]
+    DEFAULT_PER_PAGE = 50
+
+    sort = forms.ChoiceField(
+        choices=SORT_CHOICES, required=False,
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+    skill = forms.ChoiceField(
+        choices=[], required=False,
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+    min_score = forms.FloatField(
+        min_value=0, required=False, label='Min. total score',
+        widget=forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': 'any'})
+    )
+    min_skill_score = forms.FloatField(
+        min_value=0, required=False, label='Min. skill score',
+        widget=forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': 'any'})
+    )
+    per_page = forms.TypedChoiceField(
+        choices=PER_PAGE_CHOICES, coerce=int, required=False, empty_value=DEFAULT_PER_PAGE,
+        label='Per page', widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+
+    def __init__(self, *args, skills=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['skill'].choices = [('', 'Any skill')] + [(skill, skill) for skill in skills]
+
+    def clean(self):
+        """Sorting or filtering by skill score needs a skill"""
+        cleaned_data = super().clean()
+        if not cleaned_data.get('skill'):
+            if cleaned_data.get('sort') == self.SORT_SKILL:
+                self.add_error('skill', 'Select a skill to sort by.')
+            if cleaned_data.get('min_skill_score') is not None:
+                self.add_error('skill', 'Select a skill to filter by.')
+        return cleaned_data
+
+
+class CandidateSearchForm(forms.Form):
+    """Search options for candidates across all sessions"""
+
+    q = forms.CharField(
+        required=False, max_length=200, label='Search',
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Name, email, phone, skill or words from the resume'
+        })
+    )
+    skill = forms.CharField(
+        required=False, max_length=255,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. Kubernetes'})
+    )
+    min_skill_score = forms.FloatField(
+        min_value=0, required=False, label='Min. skill score',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': 'any'})
+    )
+    min_score = forms.FloatField(
+        min_value=0, required=False, label='Min. total score',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': 'any'})
+    )
+
+    def clean(self):
+        """A skill score threshold needs a skill"""
+        cleaned_data = super().clean()
+        if cleaned_data.get('min_skill_score') is not None and not cleaned_data.get('skill'):
+            self.add_error('skill', 'Enter the skill to filter by.')
+        return cleaned_data
+
+    def has_filters(self):
+        """Return True if any search option was given"""
+        return any(value not in (None, '') for value in self.cleaned_data.values())
@@ -0,0 +1,694 @@
+import os
+import json
+import math
+import time
+import queue
+import socket
+import threading
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from . import batching, llm_client, text_compaction
+from .checkpoints import Checkpoint
+from .fingerprint import MAX_NEAR_DUPLICATE_DISTANCE, hamming_distance, simhash, simhash_bands, to_signed, to_unsigned
+from .models import CandidateResult, CandidateSkillScore, Resume, ResumeUploadSession, ScoringCriteria
+from .search import index_candidates, remove_candidates
+from .async_service import AsyncResumeProcessingService
+from .services import ResumeProcessingService
+
+
+# Minutes a running session may go without storing a finished resume before
+# it is considered abandoned by its worker and requeued
+STALE_SESSION_MINUTES = 60
+# Seconds between writes of a running session's progress counts
+PROGRESS_SAVE_INTERVAL = 1.0
+# Progress counts of the service, by session field
+PROGRESS_FIELDS = {
+    'total': 'resumes_total',
+    'extracted': 'resumes_extracted',
+    'scored': 'resumes_scored',
+    'failed': 'resumes_failed',
+    'skipped': 'resumes_skipped',
+}
+
+
+def default_worker_id():
+    """Identify this worker process in the session table"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def build_service(session=None, asynchronous=False):
+    """
+    Create a ResumeProcessingService from environment and session options
+
+    With ``asynchronous``, an AsyncResumeProcessingService is created instead.
+    """
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        return None
+
+    # Get model from environment or use default
+    model = os.getenv('MODEL', 'gpt-3.5-turbo')
+    # Number of resumes scored concurrently (1 = serial)
+    max_workers = int(os.getenv('MAX_WORKERS', '1'))
+
+    options = {
+        # Processes used for text extraction (1 = extract in the scoring threads)
+        'extract_workers': int(os.getenv('EXTRACT_WORKERS', '1')),
+        'extract_timeout': float(os.getenv('EXTRACT_TIMEOUT', '60')),
+        # 1 = score with keyword matching when the LLM fails
+        'keyword_fallback': bool(int(os.getenv('KEYWORD_FALLBACK', '0'))),
+        # Batched mode: prompt tokens and resumes per request
+        'batch_token_budget': int(os.getenv('BATCH_TOKEN_BUDGET', str(batching.DEFAULT_TOKEN_BUDGET))),
+        'batch_size': int(os.getenv('BATCH_SIZE', str(batching.DEFAULT_MAX_BATCH_SIZE))),
+        # Tokens of resume text per scoring prompt
+        'resume_token_budget': int(
+            os.getenv('RESUME_TOKEN_BUDGET', str(text_compaction.DEFAULT_RESUME_TOKEN_BUDGET))
+        ),
+        # OpenAI rate limits of the account (0 = no limit), retries and request timeout
+        'requests_per_minute': int(os.getenv('LLM_REQUESTS_PER_MINUTE', '0')) or None,
+        'tokens_per_minute': int(os.getenv('LLM_TOKENS_PER_MINUTE', '0')) or None,
+        'max_retries': int(os.getenv('LLM_MAX_RETRIES', str(llm_client.DEFAULT_MAX_RETRIES))),
+        'request_timeout': float(os.getenv('LLM_TIMEOUT', str(llm_client.DEFAULT_REQUEST_TIMEOUT))),
+    }
+    if asynchronous:
+        # Seconds a session may take before it is stopped (0 = no limit)
+        options['deadline'] = float(os.getenv('SESSION_DEADLINE', '0')) or None
+    if session is not None:
+        options['scoring_mode'] = session.scoring_mode
+        options['prefilter_top_k'] = session.prefilter_top_k
+        options['prefilter_threshold'] = session.prefilter_threshold
+
+    service_class = AsyncResumeProcessingService if asynchronous else ResumeProcessingService
+    return service_class(api_key, model, max_workers=max_workers, resume_lookup=lookup_resume, **options)
+
+
+def enqueue_session(session):
+    """Put an upload session on the queue for a worker to pick up"""
+    session.status = ResumeUploadSession.STATUS_PENDING
+    session.processed = False
+    session.error_message = None
+    session.worker_id = ''
+    session.started_at = None
+    session.heartbeat_at = None
+    session.finished_at = None
+    for field in PROGRESS_FIELDS.values():
+        setattr(session, field, 0)
+    session.save()
+
+
+def claim_next_session(worker_id):
+    """
+    Claim the oldest pending session for this worker
+
+    The claim is a conditional UPDATE on the status column, so concurrent
+    workers never pick the same session, even on SQLite.
+
+    Returns:
+        ResumeUploadSession or None if the queue is empty
+    """
+    while True:
+        session_id = (
+            ResumeUploadSession.objects
+            .filter(status=ResumeUploadSession.STATUS_PENDING)
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if session_id is None:
+            return None
+
+        claimed = ResumeUploadSession.objects.filter(
+            id=session_id,
+            status=ResumeUploadSession.STATUS_PENDING
+        ).update(
+            status=ResumeUploadSession.STATUS_RUNNING,
+            worker_id=worker_id,
+            started_at=timezone.now(),
+            heartbeat_at=None,
+            **{field: 0 for field in PROGRESS_FIELDS.values()}
+        )
+        if claimed:
+            return ResumeUploadSession.objects.get(id=session_id)
+        # Another worker claimed it first; try the next one
+
+
+def requeue_stale_sessions(stale_after=STALE_SESSION_MINUTES):
+    """
+    Put running sessions whose worker stopped reporting back on the queue
+
+    A session is stale when it has stored no finished resume for
+    ``stale_after`` minutes (counted from its claim if it stored none). The
+    candidates it already stored are kept, so the next worker only
+    processes the remaining resumes.
+
+    Returns:
+        int: Number of sessions requeued
+    """
+    return ResumeUploadSession.objects.filter(stale_sessions(stale_after)).update(
+        status=ResumeUploadSession.STATUS_PENDING, worker_id='', started_at=None, heartbeat_at=None
+    )
+
+
+def stale_sessions(stale_after=STALE_SESSION_MINUTES):
+    """Q matching running sessions that stored no finished resume for ``stale_after`` minutes"""
+    cutoff = timezone.now() - timedelta(minutes=stale_after)
+    return Q(status=ResumeUploadSession.STATUS_RUNNING) & (
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+
+
+def get_cached_criteria(job_description, llm_model):
+    """Return stored ScoringCriteria for a job description and model, or None"""
+    jd_hash = ScoringCriteria.hash_job_description(job_description)
+    criteria = ScoringCriteria.objects.filter(jd_hash=jd_hash, llm_model=llm_model).first()
+    if criteria:
+        ScoringCriteria.objects.filter(id=criteria.id).update(
+            use_count=F('use_count') + 1, last_used_at=timezone.now()
+        )
+    return criteria
+
+
+def store_criteria(job_description, llm_model, optimized_criteria):
+    """Save generated criteria for reuse; returns None if they are not valid JSON"""
+    try:
+        json.loads(optimized_criteria)
+    except (TypeError, json.JSONDecodeError):
+        return None
+
+    jd_hash = ScoringCriteria.hash_job_description(job_description)
+    try:
+        criteria, _ = ScoringCriteria.objects.get_or_create(
+            jd_hash=jd_hash,
+            llm_model=llm_model,
+            defaults={'criteria': optimized_criteria, 'use_count': 1}
+        )
+    except IntegrityError:
+        # Another worker stored criteria for this job description first
+        criteria = ScoringCriteria.objects.get(jd_hash=jd_hash, llm_model=llm_model)
+    return criteria
+
+
+# Keys of a scored resume record that are not per-skill scores
+RECORD_FIELDS = {
+    'Rank', 'File Name', 'File Hash', 'Candidate Name', 'Email', 'Phone', 'Total Score', 'Summary', 'Duplicate Files'
+}
+# Rows compared bit by bit when looking for a near-duplicate resume
+NEAR_DUPLICATE_CANDIDATES = 1000
+
+
+def lookup_resume(file_hash):
+    """Return the stored text and contact details of a resume seen before, or None"""
+    resume = Resume.objects.filter(file_hash=file_hash).only('text', 'name', 'email', 'phone').first()
+    if resume is None:
+        return None
+    return {'text': resume.text, 'name': resume.name, 'email': resume.email, 'phone': resume.phone}
+
+
+def find_near_duplicate(fingerprint):
+    """Return the stored Resume whose text fingerprint is closest to ``fingerprint``, or None"""
+    bands = simhash_bands(fingerprint)
+    same_band = Q()
+    for band, value in enumerate(bands):
+        same_band |= Q(**{f'simhash_band{band}': value})
+
+    best, best_distance = None, MAX_NEAR_DUPLICATE_DISTANCE + 1
+    matches = Resume.objects.filter(same_band).only('id', 'simhash', 'near_duplicate_of')
+    for resume in matches[:NEAR_DUPLICATE_CANDIDATES]:
+        distance = hamming_distance(fingerprint, to_unsigned(resume.simhash))
+        if distance < best_distance:
+            best, best_distance = resume, distance
+    return best
+
+
+def save_resumes(records, texts=None):
+    """
+    Store the resumes behind scored records, one Resume per file hash
+
+    New resumes get their text, contact details and fingerprint stored and
+    are linked to a near-duplicate if one exists; known ones have their
+    seen count bumped.
+
+    Returns:
+        dict: Resume by file hash
+    """
+    texts = texts or {}
+    records_by_hash = {record['File Hash']: record for record in records if record.get('File Hash')}
+    existing = Resume.objects.only('id', 'file_hash').in_bulk(list(records_by_hash), field_name='file_hash')
+
+    new_resumes = []
+    for file_hash, record in records_by_hash.items():
+        if file_hash in existing:
+            continue
+        text = texts.get(file_hash, '')
+        resume = Resume(
+            file_hash=file_hash,
+            text=text,
+            name=str(record.get('Candidate Name') or '')[:255],
+            email=str(record.get('Email') or '')[:255],
+            phone=str(record.get('Phone') or '')[:50],
+        )
+        fingerprint = simhash(text)
+        if fingerprint is not None:
+            resume.simhash = to_signed(fingerprint)
+            for band, value in enumerate(simhash_bands(fingerprint)):
+                setattr(resume, f'simhash_band{band}', value)
+            near_duplicate = find_near_duplicate(fingerprint)
+            if near_duplicate is not None:
+                resume.near_duplicate_of_id = near_duplicate.near_duplicate_of_id or near_duplicate.id
+        new_resumes.append(resume)
+
+    # Another worker may store the same resume concurrently
+    Resume.objects.bulk_create(new_resumes, ignore_conflicts=True)
+    if existing:
+        Resume.objects.filter(id__in=[resume.id for resume in existing.values()]).update(
+            seen_count=F('seen_count') + 1, last_seen_at=timezone.now()
+        )
+    return Resume.objects.only('id', 'file_hash').in_bulk(list(records_by_hash), field_name='file_hash')
+
+
+def _to_float(value):
+    """Convert a score from the model's answer to float, or None if it is not a number"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def _duplicate_file_names(record):
+    """Duplicate files listed on a record, which may be missing or NaN in DataFrame output"""
+    file_names = record.get('Duplicate Files')
+    return list(file_names) if isinstance(file_names, (list, tuple)) else []
+
+
+def create_candidates(session, ranked_records, texts=None):
+    """
+    Store scored resume records as candidates of a session
+
+    Candidates and skill scores are each written with a single bulk insert
+    and linked to their Resume (see save_resumes). Records are the dicts
+    returned by ResumeProcessingService.process_zip_file, with
+    '<skill> Score' keys for the per-skill scores.
+
+    Args:
+        session: ResumeUploadSession the candidates belong to
+        ranked_records: (rank, record) pairs
+        texts: Optional dict of extracted text of new resumes by file hash
+
+    Returns:
+        list: The created CandidateResult objects
+    """
+    ranked_records = list(ranked_records)
+    resumes = save_resumes([record for _, record in ranked_records], texts)
+    candidates = CandidateResult.objects.bulk_create([
+        CandidateResult(
+            session=session,
+            rank=rank,
+            total_score=_to_float(record.get('Total Score')) or 0,
+            name=str(record.get('Candidate Name') or '')[:255],
+            email=str(record.get('Email') or '')[:255],
+            phone=str(record.get('Phone') or '')[:50],
+            file_name=str(record.get('File Name') or '')[:255],
+            file_hash=record.get('File Hash') or '',
+            resume=resumes.get(record.get('File Hash')),
+            summary=str(record.get('Summary') or ''),
+            duplicate_file_names=_duplicate_file_names(record),
+        )
+        for rank, record in ranked_records
+    ])
+
+    skill_scores = []
+    for candidate, (_, record) in zip(candidates, ranked_records):
+        for key, value in record.items():
+            score = _to_float(value)
+            # Skills missing from a resume come out of the DataFrame as NaN
+            if key.endswith(' Score') and key not in RECORD_FIELDS and score is not None:
+                skill_scores.append(CandidateSkillScore(
+                    candidate=candidate, skill=key[:-len(' Score')][:255], score=score
+                ))
+    CandidateSkillScore.objects.bulk_create(skill_scores)
+    return candidates
+
+
+def save_candidate_results(session, records, texts=None):
+    """
+    Replace the stored results of a session with ranked resume records
+
+    See create_candidates for the records and ``texts``. The session's
+    results_count is updated to match.
+
+    Returns:
+        list: The created CandidateResult objects
+    """
+    with transaction.atomic():
+        remove_candidates(list(session.candidates.values_list('id', flat=True)))
+        session.candidates.all().delete()
+        candidates = create_candidates(
+            session, [(record.get('Rank') or index, record) for index, record in enumerate(records, start=1)], texts
+        )
+        session.results_count = len(candidates)
+        ResumeUploadSession.objects.filter(id=session.id).update(results_count=session.results_count)
+    return candidates
+
+
+def candidate_records(session):
+    """
+    Rebuild the records of a session's stored candidates
+
+    Returns:
+        dict: Record by file hash, shaped like the records of process_zip_file
+    """
+    records = {}
+    for candidate in session.candidates.exclude(file_hash='').prefetch_related('skill_scores'):
+        record = {
+            'File Name': candidate.file_name,
+            'Candidate Name': candidate.name,
+            'Email': candidate.email,
+            'Phone': candidate.phone,
+            'Total Score': candidate.total_score,
+            'Summary': candidate.summary,
+        }
+        for skill_score in candidate.skill_scores.all():
+            record[f'{skill_score.skill} Score'] = skill_score.score
+        record['File Hash'] = candidate.file_hash
+        record['Duplicate Files'] = list(candidate.duplicate_file_names or [])
+        records[candidate.file_hash] = record
+    return records
+
+
+class SessionWriter:
+    """
+    Thread that makes a running session's database writes one at a time
+
+    Scoring threads hand their checkpoint and progress writes to submit()
+    rather than writing themselves: SQLite fails concurrent writers with
+    "database is locked" instead of making them wait, which would leave
+    finished resumes unstored. close() waits for the queued writes.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f'session-{session.id}-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args):
+        """Queue func(*args) to run on the writer thread"""
+        self._queue.put((func, args))
+
+    def _run(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                func, args = item
+                try:
+                    func(*args)
+                except Exception as e:
+                    print(f"[!] Session {self.session.id}: could not save progress: {e}")
+        finally:
+            # Django opens a connection per thread
+            connection.close()
+
+    def close(self):
+        """Run the writes still queued, then stop the thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+
+class SessionCheckpoint(Checkpoint):
+    """
+    Checkpoint kept as the candidates of an upload session
+
+    Each finished resume is stored as an unranked candidate (rank 0) as soon
+    as it is scored, and the session's heartbeat is bumped. A requeued
+    session starts from the candidates already stored; rank_candidates
+    ranks them all once the run completes.
+
+    Args:
+        session: ResumeUploadSession being processed
+        writer: Optional SessionWriter the candidates are stored through;
+            without one, they are stored by the calling thread
+    """
+
+    def __init__(self, session, writer=None):
+        super().__init__(candidate_records(session))
+        self.session = session
+        self.writer = writer
+
+    def save(self, file_hash, record, text):
+        if self.writer is not None:
+            self.writer.submit(self._store, file_hash, record, text)
+        else:
+            self._store(file_hash, record, text)
+
+    def _store(self, file_hash, record, text):
+        # Another worker may have picked up the session after it was requeued
+        if not CandidateResult.objects.filter(session=self.session, file_hash=file_hash).exists():
+            with transaction.atomic():
+                candidates = create_candidates(self.session, [(0, record)], {file_hash: text})
+            try:
+                index_candidates(candidates, {file_hash: text})
+            except Exception as e:
+                print(f"[!] Session {self.session.id}: could not update the search index: {e}")
+        ResumeUploadSession.objects.filter(id=self.session.id).update(heartbeat_at=timezone.now())
+
+
+class SessionProgress:
+    """
+    Store the progress counts of a running session for the status page
+
+    Used as the service's on_progress callback. Counts are written whenever
+    a resume is finished (scored, failed or skipped); reports that only add
+    extracted resumes are written at most once per ``interval`` seconds, so
+    fast extraction doesn't turn into a write per file.
+    """
+
+    def __init__(self, session, interval=PROGRESS_SAVE_INTERVAL, writer=None):
+        self.session = session
+        self.interval = interval
+        self.writer = writer
+        self.saved = None
+        self.saved_at = 0.0
+        # Latest counts waiting for the writer; reports made before it gets
+        # to them are folded into one write
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def __call__(self, progress):
+        # The service calls this with its progress lock held, one call at a time
+        now = time.monotonic()
+        finished = (progress['scored'], progress['failed'], progress['skipped'])
+        if self.saved is not None and finished == self.saved and now - self.saved_at < self.interval:
+            return
+        self.saved = finished
+        self.saved_at = now
+        if self.writer is None:
+            self._save(progress)
+            return
+        with self._lock:
+            queued = self._pending is not None
+            self._pending = dict(progress)
+        if not queued:
+            self.writer.submit(self._save_pending)
+
+    def _save_pending(self):
+        with self._lock:
+            progress, self._pending = self._pending, None
+        self._save(progress)
+
+    def _save(self, progress):
+        ResumeUploadSession.objects.filter(id=self.session.id).update(
+            **{field: progress[key] for key, field in PROGRESS_FIELDS.items()}
+        )
+
+
+def rank_candidates(session, records, texts=None):
+    """
+    Rank the candidates stored while a session ran
+
+    ``records`` are the ranked records of process_zip_file. Candidates
+    stored by the session's checkpoint get their rank and duplicate files
+    updated; records without a stored candidate are created, and stored
+    candidates missing from ``records`` are removed. The session's
+    results_count is updated to match.
+
+    Returns:
+        list: The ranked CandidateResult objects
+    """
+    with transaction.atomic():
+        stored = {candidate.file_hash: candidate for candidate in session.candidates.all()}
+        ranked = []
+        missing = []
+        for index, record in enumerate(records, start=1):
+            rank = record.get('Rank') or index
+            candidate = stored.pop(record.get('File Hash') or '', None)
+            if candidate is None:
+                missing.append((rank, record))
+                continue
+            candidate.rank = rank
+            candidate.duplicate_file_names = _duplicate_file_names(record)
+            ranked.append(candidate)
+        CandidateResult.objects.bulk_update(ranked, ['rank', 'duplicate_file_names'])
+
+        if stored:
+            leftover = [candidate.id for candidate in stored.values()]
+            remove_candidates(leftover)
+            CandidateResult.objects.filter(id__in=leftover).delete()
+
+        created = create_candidates(session, missing, texts)
+        session.results_count = len(ranked) + len(created)
+        ResumeUploadSession.objects.filter(id=session.id).update(results_count=session.results_count)
+
+    try:
+        index_candidates(created, texts)
+    except Exception as e:
+        # Search is a convenience; the ranked results are already saved
+        print(f"[!] Session {session.id}: could not update the search index: {e}")
+    return ranked + created
+
+
+def fail_session(session, error_message):
+    """Mark a session as failed with the given error"""
+    session.status = ResumeUploadSession.STATUS_FAILED
+    session.error_message = error_message
+    session.finished_at = timezone.now()
+    session.save()
+
+
+def run_session(session, service=None):
+    """
+    Process a claimed session and store its results
+
+    Returns:
+        bool: True if the session completed successfully
+    """
+    service = service or build_service(session)
+    if service is None:
+        fail_session(session, 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.')
+        return False
+    # Checkpoint and progress writes of the scoring threads go through one thread
+    writer = SessionWriter(session)
+    try:
+        scoring_criteria = start_session(session, service, writer)
+        try:
+            result = service.process_zip_file(
+                session.zip_file.path,
+                session.job_description,
+                optimized_criteria=scoring_criteria.criteria if scoring_criteria else None
+            )
+        except Exception as e:
+            result = {'success': False, 'error': f'Error processing resumes: {str(e)}'}
+    finally:
+        # Finished resumes are stored before the session is ranked or failed
+        writer.close()
+    return finish_session(session, service, result, scoring_criteria)
+
+
+async def arun_session(session, service=None):
+    """
+    Process a claimed session with AsyncResumeProcessingService and store its results
+
+    The asyncio counterpart of run_session, for async views and the
+    process_uploads --async-sessions worker. Database work runs through
+    sync_to_async; cancelling the task cancels the session's requests, and
+    the resumes finished so far stay stored for a requeue.
+
+    Returns:
+        bool: True if the session completed successfully
+    """
+    service = service or await sync_to_async(build_service)(session, asynchronous=True)
+    if service is None:
+        await sync_to_async(fail_session)(
+            session, 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.'
+        )
+        return False
+    scoring_criteria = await sync_to_async(start_session)(session, service)
+
+    try:
+        result = await service.aprocess_zip_file(
+            session.zip_file.path,
+            session.job_description,
+            optimized_criteria=scoring_criteria.criteria if scoring_criteria else None
+        )
+    except Exception as e:
+        await sync_to_async(fail_session)(session, f'Error processing resumes: {str(e)}')
+        return False
+    return await sync_to_async(finish_session)(session, service, result, scoring_criteria)
+
+
+def start_session(session, service, writer=None):
+    """
+    Attach a session's checkpoint and progress to a service
+
+    Args:
+        session: Claimed ResumeUploadSession
+        service: Service that will process it
+        writer: Optional SessionWriter for the checkpoint and progress
+            writes (async services make them on one thread already)
+
+    Returns:
+        ScoringCriteria stored for the session's job description, or None
+    """
+    # Resumes are stored as they finish; a requeued session skips those already stored
+    service.checkpoint = SessionCheckpoint(session, writer)
+    if service.checkpoint:
+        print(f"[i] Session {session.id}: resuming with {len(service.checkpoint)} resume(s) already scored")
+    # Counts shown on the status page while the session runs
+    service.on_progress = SessionProgress(session, writer=writer)
+
+    # Criteria are reused when the same job description was seen before
+    return get_cached_criteria(session.job_description, service.model)
+
+
+def finish_session(session, service, result, scoring_criteria=None):
+    """
+    Store the result of process_zip_file for a session, or mark it as failed
+
+    Returns:
+        bool: True if the session completed successfully
+    """
+    if not result['success']:
+        fail_session(session, result['error'])
+        return False
+
+    if scoring_criteria is None and not result.get('local_criteria'):
+        # Locally built fallback criteria are not cached, so the LLM gets
+        # another chance on the next upload
+        scoring_criteria = store_criteria(
+            session.job_description, service.model, result['optimized_criteria']
+        )
+
+    rank_candidates(session, result['results'], result.get('texts'))
+    session.processed = True
+    session.scoring_criteria = scoring_criteria
+    session.criteria = result.get('criteria', {})
+    session.prefilter_skipped = result['prefilter']['skipped']
+    session.llm_calls_saved = result['prefilter']['calls_saved']
+    session.resume_tokens = result['compaction']['original_tokens']
+    session.resume_tokens_sent = result['compaction']['sent_tokens']
+    for key, field in PROGRESS_FIELDS.items():
+        setattr(session, field, result['progress'][key])
+    session.status = ResumeUploadSession.STATUS_COMPLETED
+    session.finished_at = timezone.now()
+    session.save()
+
+    print(f"[✔] Session {session.id}: processed {result['total_processed']} out of {result['total_files']} resumes "
+          f"(LLM cache: {result['llm_cache']['hits']} hits, {result['llm_cache']['misses']} misses; "
+          f"{result['usage']['requests']} requests, "
+          f"{result['usage']['prompt_tokens'] + result['usage']['completion_tokens']} tokens; "
+          f"{result['dedup']['known_resumes']} known resumes, "
+          f"{result['dedup']['duplicate_files']} duplicate files; "
+          f"prefilter skipped {result['prefilter']['skipped']} resumes, "
+          f"{result['prefilter']['calls_saved']} calls saved; "
+          f"{result['keyword_fallbacks']} keyword fallbacks; "
+          f"{result['batching']['batches']} batches, {result['batching']['splits']} split; "
+          f"resume text {result['compaction']['original_tokens']} -> "
+          f"{result['compaction']['sent_tokens']} tokens; "
+          f"{result['retries']['retries']} retries, {result['retries']['rate_limited']} rate limited; "
+          f"{result['restored']} restored from an earlier run)")
+    return True
@@ -0,0 +1,288 @@
+import re
+import json
+from functools import lru_cache
+
+import numpy as np
+
+from .prefilter import tokenize
+
+# A skill mentioned this many times gets full points; fewer mentions get a
+# proportional share
+FULL_CREDIT_MENTIONS = 2
+
+# Skills the scorer knows by other names. The first name is used when
+# criteria are built from a job description without the LLM.
+KNOWN_SKILLS = [
+    ('Python',),
+    ('Java',),
+    ('JavaScript', 'JS', 'ECMAScript'),
+    ('TypeScript',),
+    ('Golang',),
+    ('C++', 'CPP'),
+    ('C#', 'CSharp'),
+    ('.NET', 'dotnet', 'ASP.NET'),
+    ('Ruby', 'Ruby on Rails', 'Rails'),
+    ('PHP',),
+    ('Rust',),
+    ('Scala',),
+    ('Kotlin',),
+    ('SQL',),
+    ('PostgreSQL', 'Postgres'),
+    ('MySQL',),
+    ('MongoDB', 'Mongo'),
+    ('Redis',),
+    ('Django',),
+    ('Flask',),
+    ('FastAPI',),
+    ('Spring Boot',),
+    ('React', 'ReactJS', 'React.js'),
+    ('Angular', 'AngularJS'),
+    ('Vue', 'Vue.js', 'VueJS'),
+    ('Node.js', 'NodeJS'),
+    ('HTML', 'HTML5'),
+    ('CSS', 'CSS3'),
+    ('REST API', 'REST APIs', 'RESTful'),
+    ('GraphQL',),
+    ('Docker',),
+    ('Kubernetes', 'K8s'),
+    ('Terraform',),
+    ('AWS', 'Amazon Web Services'),
+    ('Azure', 'Microsoft Azure'),
+    ('GCP', 'Google Cloud', 'Google Cloud Platform'),
+    ('CI/CD', 'Continuous Integration', 'Jenkins', 'GitHub Actions', 'GitLab CI'),
+    ('Git',),
+    ('Linux', 'Unix'),
+    ('Machine Learning', 'ML'),
+    ('Deep Learning',),
+    ('NLP', 'Natural Language Processing'),
+    ('TensorFlow',),
+    ('PyTorch',),
+    ('Pandas',),
+    ('NumPy',),
+    ('Spark', 'Apache Spark', 'PySpark'),
+    ('Kafka', 'Apache Kafka'),
+    ('Airflow', 'Apache Airflow'),
+    ('Microservices',),
+    ('Agile', 'Scrum'),
+]
+
+# Words that qualify a skill rather than name it, dropped from skill names
+# such as "Python programming" or "Strong SQL knowledge"
+QUALIFIER_WORDS = {
+    'experience', 'experienced', 'programming', 'development', 'developer', 'framework', 'frameworks',
+    'skills', 'skill', 'knowledge', 'proficiency', 'proficient', 'language', 'languages', 'strong',
+    'solid', 'understanding', 'familiarity', 'basic', 'advanced', 'expertise', 'with', 'in', 'of',
+    'using', 'the', 'and', 'or', 'years', 'hands-on',
+}
+
+# Separators between alternatives in a skill name, as in "Docker/Kubernetes"
+ALTERNATIVE_SEPARATORS = re.compile(r'\s*(?:,|/|&|\band\b|\bor\b|\(|\))\s*', re.IGNORECASE)
+
+
+def _build_synonyms():
+    """Map the tokens of each known skill name to the tokens of all its names"""
+    synonyms = {}
+    for names in KNOWN_SKILLS:
+        terms = {tuple(tokenize(name)) for name in names}
+        for term in terms:
+            synonyms.setdefault(term, set()).update(terms)
+    return synonyms
+
+
+_synonyms = _build_synonyms()
+
+
+def skill_terms(skill):
+    """
+    Token sequences that count as a mention of a skill
+
+    Covers the skill name, the alternatives in it ("Docker/Kubernetes",
+    "Amazon Web Services (AWS)"), the name without qualifier words and the
+    known synonyms of each.
+
+    Returns:
+        set: Tuples of tokens
+    """
+    candidates = {skill}
+    if tuple(tokenize(skill)) not in _synonyms:
+        candidates.update(part for part in ALTERNATIVE_SEPARATORS.split(skill) if len(part) >= 2)
+
+    terms = set()
+    for candidate in candidates:
+        tokens = tuple(tokenize(candidate))
+        core = tuple(token for token in tokens if token not in QUALIFIER_WORDS)
+        for term in (tokens, core):
+            if term:
+                terms.add(term)
+                terms.update(_synonyms.get(term, ()))
+    return terms
+
+
+class SkillMatcher:
+    """Count whole-word mentions of many skills in one pass over each text"""
+
+    def __init__(self, skills):
+        self.skills = list(skills)
+        terms = {}
+        skill_columns = []
+        for column, skill in enumerate(self.skills):
+            for term in skill_terms(skill):
+                skill_columns.append((terms.setdefault(term, len(terms)), column))
+
+        # Terms indexed by their first token, longest first
+        self._starts = {}
+        for term, index in sorted(terms.items(), key=lambda item: -len(item[0])):
+            self._starts.setdefault(term[0], []).append((term, index))
+
+        # Term x skill incidence: a term may count for several skills
+        self._incidence = np.zeros((len(terms), len(self.skills)))
+        for index, column in skill_columns:
+            self._incidence[index, column] = 1
+
+    def hit_matrix(self, texts):
+        """
+        Count skill mentions for a batch of texts
+
+        Returns:
+            numpy.ndarray: texts x skills matrix of mention counts
+        """
+        n_terms = len(self._incidence)
+        hits = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text or '')
+            for position, token in enumerate(tokens):
+                for term, index in self._starts.get(token, ()):
+                    if len(term) == 1 or tuple(tokens[position:position + len(term)]) == term:
+                        hits.append(row * n_terms + index)
+                        break
+
+        term_counts = np.bincount(
+            np.array(hits, dtype=np.int64), minlength=len(texts) * n_terms
+        ).reshape(len(texts), n_terms)
+        return term_counts @ self._incidence
+
+
+class KeywordScorer:
+    """
+    Score resumes against criteria JSON without the LLM
+
+    Each skill earns its max_points once it is mentioned
+    FULL_CREDIT_MENTIONS times, and a proportional share for fewer mentions.
+    Totals are scaled to the criteria's total_max_score. Results have the
+    same shape as a parsed rank_resume answer.
+    """
+
+    def __init__(self, optimized_criteria):
+        criteria_data = (
+            json.loads(optimized_criteria) if isinstance(optimized_criteria, str) else optimized_criteria
+        )
+        skills = criteria_data.get('required_skills', []) + criteria_data.get('bonus_skills', [])
+        if not skills:
+            raise ValueError('Criteria have no skills to match')
+
+        self.matcher = SkillMatcher(str(skill.get('skill', '')) for skill in skills)
+        self.max_points = np.array([_to_points(skill.get('max_points')) for skill in skills])
+        self.total_max_score = _to_points(criteria_data.get('total_max_score'), default=100)
+
+    @property
+    def skills(self):
+        """Skill names in criteria order"""
+        return self.matcher.skills
+
+    def score_matrix(self, texts):
+        """
+        Score a batch of texts in one pass
+
+        Returns:
+            tuple: (total scores, texts x skills matrix of skill points) as NumPy arrays
+        """
+        hits = self.matcher.hit_matrix(texts)
+        points = np.minimum(hits, FULL_CREDIT_MENTIONS) / FULL_CREDIT_MENTIONS * self.max_points
+        available = self.max_points.sum()
+        totals = points.sum(axis=1) * (self.total_max_score / available if available else 0)
+        return totals, points
+
+    def score(self, texts):
+        """
+        Score a batch of texts
+
+        Returns:
+            list: One {'total_score', 'skill_scores', 'summary'} dict per text
+        """
+        totals, points = self.score_matrix(texts)
+        results = []
+        for total, row in zip(totals.round(1).tolist(), points.round(1).tolist()):
+            found = [skill for skill, score in zip(self.skills, row) if score]
+            missing = [skill for skill, score in zip(self.skills, row) if not score]
+            summary = f"Keyword match: mentions {', '.join(found) or 'none of the skills'}"
+            if missing:
+                summary += f"; not found: {', '.join(missing)}"
+            results.append({
+                'total_score': total,
+                'skill_scores': dict(zip(self.skills, row)),
+                'summary': summary,
+            })
+        return results
+
+
+def _to_points(value, default=0.0):
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+@lru_cache(maxsize=32)
+def get_scorer(optimized_criteria):
+    """Return a KeywordScorer for a criteria JSON string, reused across resumes"""
+    return KeywordScorer(optimized_criteria)
+
+
+@lru_cache(maxsize=32)
+def scorer_for(optimized_criteria, job_description=''):
+    """
+    Return a KeywordScorer for criteria JSON, or for the job description's skills
+
+    Criteria the keyword scorer cannot match (text that is not JSON, or JSON
+    without skills) fall back to criteria_from_job_description, as when the
+    LLM cannot create criteria at all.
+
+    Raises:
+        ValueError: If neither the criteria nor the job description name a skill
+    """
+    try:
+        return get_scorer(optimized_criteria)
+    except (ValueError, TypeError, AttributeError) as e:
+        fallback = criteria_from_job_description(job_description or '')
+        if not fallback:
+            raise ValueError(f'Criteria cannot be keyword-matched ({e}) and the job description names no known skills')
+        print(f"[!] Criteria cannot be keyword-matched ({e}); using the skills named in the job description")
+        return get_scorer(fallback)
+
+
+def criteria_from_job_description(job_description):
+    """
+    Build criteria JSON from the known skills a job description mentions
+
+    Used when the LLM cannot create criteria. Every skill found is required
+    and worth the same number of points.
+
+    Returns:
+        str: Criteria JSON, or None if no known skill is mentioned
+    """
+    names = [names[0] for names in KNOWN_SKILLS]
+    counts = SkillMatcher(names).hit_matrix([job_description])[0]
+    found = [name for name, count in zip(names, counts) if count]
+    if not found:
+        return None
+
+    points = round(100 / len(found), 2)
+    return json.dumps({
+        'required_skills': [
+            {'skill': name, 'max_points': points, 'description': f'Mentions {name}'} for name in found
+        ],
+        'bonus_skills': [],
+        'scoring_guidelines': {},
+        'total_max_score': 100,
+        'evaluation_prompt': f"Evaluate the resume for experience with {', '.join(found)}.",
+    })
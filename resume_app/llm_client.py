@@ -0,0 +1,376 @@
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+
+import openai
+
+from .text_compaction import count_tokens
+
+# Retries after a rate limit, timeout or server error, before giving up
+DEFAULT_MAX_RETRIES = 5
+# Seconds allowed per request (the OpenAI client's own retries are turned off)
+DEFAULT_REQUEST_TIMEOUT = 60
+# Completion tokens reserved per request until its real usage is known
+DEFAULT_COMPLETION_TOKENS = 500
+# The wait before retry n is a random delay of up to
+# min(BACKOFF_MAX, BACKOFF_BASE * 2 ** n) seconds
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at a fixed rate per minute
+
+    reserve() takes the tokens at once, letting the bucket go into debt,
+    and returns how long the caller has to wait before spending them, so
+    callers are served in arrival order without holding a lock while they
+    wait.
+
+    Args:
+        per_minute: Tokens added per minute
+        capacity: Largest burst (defaults to one minute's worth)
+        clock: Function returning the current time in seconds
+    """
+
+    def __init__(self, per_minute, capacity=None, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.clock = clock
+        self.level = float(self.capacity)
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        """Take amount tokens; returns the seconds to wait before using them"""
+        with self._lock:
+            self._refill()
+            self.level -= amount
+            return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount):
+        """Give back unused tokens (or, when negative, charge extra ones)"""
+        with self._lock:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+
+class AdaptiveConcurrency:
+    """
+    Limit on requests in flight that adapts to rate limiting
+
+    The limit is halved when a request is rate limited and grows back by one
+    after a limit's worth of successful requests (additive increase,
+    multiplicative decrease). Requests started before the last decrease
+    don't decrease it again, so a burst of 429s halves the limit once.
+
+    Args:
+        max_limit: Highest number of requests in flight
+        min_limit: Lowest limit the adaptation may reach
+        clock: Function returning the current time in seconds
+    """
+
+    def __init__(self, max_limit, min_limit=1, clock=time.monotonic):
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(int(min_limit), self.max_limit))
+        self.clock = clock
+        self.limit = self.max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._decreased_at = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot; returns the start time to pass to release()"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            return self.clock()
+
+    def release(self, started, rate_limited=False):
+        """Free a slot and adapt the limit to the request's outcome"""
+        with self._condition:
+            self.in_flight -= 1
+            self._adapt(started, rate_limited)
+            self._condition.notify_all()
+
+    def _adapt(self, started, rate_limited):
+        """Halve the limit after a rate limit, or count a success towards raising it"""
+        if rate_limited:
+            if started >= self._decreased_at:
+                self.limit = max(self.min_limit, self.limit // 2)
+                self._decreased_at = self.clock()
+                self._successes = 0
+        else:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+
+
+class AsyncAdaptiveConcurrency(AdaptiveConcurrency):
+    """
+    AdaptiveConcurrency for coroutines running on one event loop
+
+    acquire() is awaited instead of blocking a thread; release() stays a
+    plain call so it can run in ``finally`` blocks of cancelled tasks.
+    """
+
+    def __init__(self, max_limit, min_limit=1, clock=time.monotonic):
+        super().__init__(max_limit, min_limit, clock)
+        self._waiters = deque()
+
+    async def acquire(self):
+        """Wait for a free slot; returns the start time to pass to release()"""
+        while self.in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass a wake-up this task can no longer use on to another waiter
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+        return self.clock()
+
+    def release(self, started, rate_limited=False):
+        """Free a slot and adapt the limit to the request's outcome"""
+        self.in_flight -= 1
+        self._adapt(started, rate_limited)
+        self._wake()
+
+    def _wake(self):
+        free = self.limit - self.in_flight
+        for waiter in list(self._waiters):
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+def is_rate_limit(error):
+    """True for a 429 that is worth retrying (not an exhausted quota)"""
+    if not (isinstance(error, openai.RateLimitError) or getattr(error, 'status_code', None) == 429):
+        return False
+    return getattr(error, 'code', None) != 'insufficient_quota'
+
+
+def is_retryable(error):
+    """True for rate limits, timeouts, connection errors and server errors"""
+    if is_rate_limit(error):
+        return True
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, TimeoutError)):
+        return True
+    status_code = getattr(error, 'status_code', None)
+    return isinstance(status_code, int) and (status_code >= 500 or status_code in (408, 409))
+
+
+def retry_delay(attempt, error=None):
+    """
+    Seconds to wait before retry number ``attempt`` (starting at 0)
+
+    Uses the server's Retry-After header when it sends one, otherwise
+    exponential backoff with full jitter so retrying clients spread out.
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        retry_after = float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        retry_after = None
+    if retry_after is not None and retry_after >= 0:
+        return min(retry_after, BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class LLMClient:
+    """
+    Chat completions with rate limits, retries and adaptive concurrency
+
+    Every request waits for the requests-per-minute and tokens-per-minute
+    buckets and a concurrency slot. Rate limits, timeouts and server errors
+    are retried with jittered exponential backoff; a 429 also halves the
+    concurrency limit, which grows back as requests succeed. Shared by the
+    CLI and ResumeProcessingService.
+
+    Args:
+        client: OpenAI client, created with max_retries=0 so retries happen here
+        model: Model name
+        requests_per_minute: Request rate limit (None: no limit)
+        tokens_per_minute: Prompt and completion token rate limit (None: no limit)
+        max_concurrency: Highest number of requests in flight
+        max_retries: Retries per request before the error is raised
+        completion_tokens: Completion tokens reserved per request
+        clock: Function returning the current time in seconds, for the
+            rate limits and the concurrency limit
+        sleep: Function that waits a number of seconds (a coroutine
+            function for AsyncLLMClient)
+    """
+
+    def __init__(self, client, model, requests_per_minute=None, tokens_per_minute=None, max_concurrency=1,
+                 max_retries=DEFAULT_MAX_RETRIES, completion_tokens=DEFAULT_COMPLETION_TOKENS,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.client = client
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute, clock=clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency, clock=clock)
+        self.sleep = sleep
+        self.max_retries = max(0, int(max_retries))
+        self.completion_tokens = completion_tokens
+        # Retries made, and how many of them followed a rate limit or a
+        # timeout; failures are requests that gave up
+        self.stats = {'retries': 0, 'rate_limited': 0, 'timeouts': 0, 'failures': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _estimate_tokens(self, prompt):
+        """Tokens reserved for a request until its real usage is known"""
+        return count_tokens(prompt, self.model) + self.completion_tokens
+
+    def _reserve_budget(self, estimated_tokens):
+        """Reserve a request and its estimated tokens; returns the seconds to wait before sending it"""
+        delay = 0.0
+        if self.requests:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(estimated_tokens))
+        return delay
+
+    def _failed(self, error, attempt, estimated_tokens):
+        """
+        Account for a failed request
+
+        Returns:
+            float: Seconds to wait before retrying, or None when the error
+                should be raised
+        """
+        if self.tokens:
+            # A failed request uses no tokens
+            self.tokens.refund(estimated_tokens)
+        if not is_retryable(error) or attempt >= self.max_retries:
+            self._count('failures')
+            return None
+        delay = retry_delay(attempt, error)
+        self._count('retries')
+        if is_rate_limit(error):
+            self._count('rate_limited')
+        elif isinstance(error, (openai.APITimeoutError, TimeoutError)):
+            self._count('timeouts')
+        print(f"[!] OpenAI request failed ({type(error).__name__}); retry {attempt + 1} of "
+              f"{self.max_retries} in {delay:.1f}s")
+        return delay
+
+    def _succeeded(self, response, estimated_tokens):
+        """Charge the tokens a request really used against its estimate"""
+        usage = getattr(response, 'usage', None)
+        if self.tokens and usage:
+            self.tokens.refund(estimated_tokens - usage.prompt_tokens - usage.completion_tokens)
+
+    def complete(self, prompt, temperature=0):
+        """
+        Send a single-message chat completion
+
+        Returns:
+            The OpenAI response object
+
+        Raises:
+            The last error once retries are used up, or at once for errors
+            that are not worth retrying
+        """
+        estimated_tokens = self._estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            delay = self._reserve_budget(estimated_tokens)
+            if delay:
+                self.sleep(delay)
+            started = self.concurrency.acquire()
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature
+                )
+            except Exception as e:
+                self.concurrency.release(started, rate_limited=is_rate_limit(e))
+                delay = self._failed(e, attempt, estimated_tokens)
+                if delay is None:
+                    raise
+                self.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # e.g. KeyboardInterrupt; free the slot so other threads can finish
+                self.concurrency.release(started)
+                raise
+
+            self.concurrency.release(started)
+            self._succeeded(response, estimated_tokens)
+            return response
+
+
+class AsyncLLMClient(LLMClient):
+    """
+    LLMClient for an AsyncOpenAI client
+
+    Same rate limits, retries and adaptive concurrency, but complete() is a
+    coroutine: waits for the buckets, a slot or a retry are awaited rather
+    than slept, and a cancelled request frees its slot and tokens. Used by
+    AsyncResumeProcessingService.
+    """
+
+    def __init__(self, client, model, requests_per_minute=None, tokens_per_minute=None, max_concurrency=1,
+                 max_retries=DEFAULT_MAX_RETRIES, completion_tokens=DEFAULT_COMPLETION_TOKENS,
+                 clock=time.monotonic, sleep=asyncio.sleep):
+        super().__init__(client, model, requests_per_minute, tokens_per_minute, max_concurrency, max_retries,
+                         completion_tokens, clock, sleep)
+        self.concurrency = AsyncAdaptiveConcurrency(max_concurrency, clock=clock)
+
+    async def complete(self, prompt, temperature=0):
+        """Send a single-message chat completion (see LLMClient.complete)"""
+        estimated_tokens = self._estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            delay = self._reserve_budget(estimated_tokens)
+            if delay:
+                await self.sleep(delay)
+            started = await self.concurrency.acquire()
+            try:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature
+                )
+            except Exception as e:
+                self.concurrency.release(started, rate_limited=is_rate_limit(e))
+                delay = self._failed(e, attempt, estimated_tokens)
+                if delay is None:
+                    raise
+                await self.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled, e.g. by a session deadline
+                self.concurrency.release(started)
+                if self.tokens:
+                    self.tokens.refund(estimated_tokens)
+                raise
+
+            self.concurrency.release(started)
+            self._succeeded(response, estimated_tokens)
+            return response
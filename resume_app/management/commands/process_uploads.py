@@ -0,0 +1,128 @@
+import os
+import time
+import asyncio
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from resume_app.jobs import (
+    STALE_SESSION_MINUTES, arun_session, claim_next_session, default_worker_id, requeue_stale_sessions, run_session
+)
+
+
+class Command(BaseCommand):
+    """Worker that claims queued upload sessions and processes them"""
+
+    help = 'Process queued resume upload sessions. Run several workers to scale out.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of polling for new sessions'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between queue polls when idle (default: 2)'
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=0,
+            help='Exit after processing this many sessions (default: unlimited)'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=float,
+            default=STALE_SESSION_MINUTES,
+            help='Requeue running sessions that stored no finished resume for this many minutes, '
+                 f'keeping their results (default: {STALE_SESSION_MINUTES}; 0 = never)'
+        )
+        parser.add_argument(
+            '--async-sessions',
+            type=int,
+            default=0,
+            help='Process up to this many sessions at once on one asyncio event loop, with the async '
+                 'OpenAI client (default: 0, one session at a time in threads)'
+        )
+        parser.add_argument(
+            '--worker-id',
+            default=None,
+            help='Identifier recorded on claimed sessions (default: hostname:pid)'
+        )
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id'] or default_worker_id()
+        if not os.getenv('OPENAI_API_KEY'):
+            self.stderr.write(self.style.WARNING(
+                'OPENAI_API_KEY is not set; claimed sessions will be marked as failed.'
+            ))
+
+        self.stdout.write(f"Worker {worker_id} waiting for sessions...")
+        self.jobs_done = 0
+        try:
+            if options['async_sessions'] > 0:
+                asyncio.run(self.process_async(worker_id, options))
+            else:
+                while not options['max_jobs'] or self.jobs_done < options['max_jobs']:
+                    session = self.claim(worker_id, options)
+                    if session is None:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    self.stdout.write(f"Processing session {session.id}...")
+                    self.report(session, run_session(session))
+                    self.jobs_done += 1
+        except KeyboardInterrupt:
+            self.stdout.write('Worker stopped.')
+
+        self.stdout.write(f"Worker {worker_id} processed {self.jobs_done} session(s).")
+
+    def claim(self, worker_id, options):
+        """Requeue stale sessions, then claim the next pending one (or None)"""
+        if options['stale_after']:
+            requeued = requeue_stale_sessions(options['stale_after'])
+            if requeued:
+                self.stdout.write(self.style.WARNING(
+                    f"Requeued {requeued} session(s) abandoned by their worker"
+                ))
+        return claim_next_session(worker_id)
+
+    def report(self, session, completed):
+        """Print the outcome of a processed session"""
+        if completed:
+            self.stdout.write(self.style.SUCCESS(f"Session {session.id} completed"))
+        else:
+            self.stdout.write(self.style.ERROR(f"Session {session.id} failed: {session.error_message}"))
+
+    async def process_async(self, worker_id, options):
+        """Run up to --async-sessions sessions at once on this event loop"""
+        running = {}
+        claimed = 0
+        while True:
+            while len(running) < options['async_sessions'] and (
+                    not options['max_jobs'] or claimed < options['max_jobs']):
+                session = await sync_to_async(self.claim)(worker_id, options)
+                if session is None:
+                    break
+                self.stdout.write(f"Processing session {session.id}...")
+                running[asyncio.ensure_future(arun_session(session))] = session
+                claimed += 1
+
+            if not running:
+                if options['once'] or (options['max_jobs'] and claimed >= options['max_jobs']):
+                    return
+                await asyncio.sleep(options['poll_interval'])
+                continue
+
+            done, _ = await asyncio.wait(running, timeout=options['poll_interval'],
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                session = running.pop(task)
+                if task.exception() is not None:
+                    self.stdout.write(self.style.ERROR(f"Session {session.id} failed: {task.exception()}"))
+                else:
+                    self.report(session, task.result())
+                self.jobs_done += 1
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from resume_app.caches import ExtractionCache
+from resume_app.models import CandidateResult, Resume
+from resume_app.search import INDEX_BATCH_SIZE, clear_index, index_candidates, search_index_available
+
+
+class Command(BaseCommand):
+    """Rebuild the candidate search index from stored results"""
+
+    help = ('Rebuild the full-text candidate search index. Resume text is taken from the '
+            'stored resumes, or from the extraction cache for results without one.')
+
+    def handle(self, *args, **options):
+        if not search_index_available():
+            self.stderr.write(self.style.WARNING('Full-text search is only available on SQLite.'))
+            return
+
+        extraction_cache = ExtractionCache()
+        clear_index()
+
+        indexed = with_text = 0
+        batch = []
+        candidates = CandidateResult.objects.only(
+            'id', 'name', 'email', 'phone', 'file_name', 'file_hash'
+        ).order_by('id')
+        for candidate in candidates.iterator(chunk_size=INDEX_BATCH_SIZE):
+            batch.append(candidate)
+            if len(batch) == INDEX_BATCH_SIZE:
+                with_text += self._index_batch(batch, extraction_cache)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            with_text += self._index_batch(batch, extraction_cache)
+            indexed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {indexed} candidates ({with_text} with resume text).'
+        ))
+
+    def _index_batch(self, candidates, extraction_cache):
+        """Index one batch of candidates; returns how many had resume text"""
+        # The text stored with each resume is what index_candidates got when
+        # the candidate was first indexed
+        file_hashes = {candidate.file_hash for candidate in candidates if candidate.file_hash}
+        texts = dict(
+            Resume.objects.filter(file_hash__in=file_hashes).exclude(text='').values_list('file_hash', 'text')
+        )
+        for file_hash in file_hashes - set(texts):
+            text = extraction_cache.get(file_hash)
+            if text:
+                texts[file_hash] = text
+        index_candidates(candidates, texts)
+        return sum(1 for candidate in candidates if candidate.file_hash in texts)
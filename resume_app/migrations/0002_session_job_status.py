@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:06
+
+from django.db import migrations, models
+
+
+def set_legacy_status(apps, schema_editor):
+    """Sessions created before the job queue were processed inline; never queue them"""
+    ResumeUploadSession = apps.get_model("resume_app", "ResumeUploadSession")
+    ResumeUploadSession.objects.filter(processed=True).update(status="completed")
+    ResumeUploadSession.objects.filter(processed=False).update(status="failed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resume_app", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="finished_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("running", "Running"),
+                    ("completed", "Completed"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="worker_id",
+            field=models.CharField(blank=True, default="", max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name="resumeuploadsession",
+            index=models.Index(
+                fields=["status", "created_at"], name="session_status_created_idx"
+            ),
+        ),
+        migrations.RunPython(set_legacy_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resume_app", "0002_session_job_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScoringCriteria",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("jd_hash", models.CharField(max_length=64)),
+                ("llm_model", models.CharField(max_length=100)),
+                (
+                    "criteria",
+                    models.TextField(
+                        help_text="Raw criteria JSON returned by the model"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_used_at", models.DateTimeField(auto_now=True)),
+                ("use_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name_plural": "scoring criteria",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("jd_hash", "llm_model"),
+                        name="unique_criteria_per_jd_model",
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="scoring_criteria",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="sessions",
+                to="resume_app.scoringcriteria",
+            ),
+        ),
+    ]
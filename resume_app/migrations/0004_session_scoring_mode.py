@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resume_app", "0003_scoring_criteria"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="scoring_mode",
+            field=models.CharField(
+                choices=[
+                    ("two_call", "Standard (separate contact extraction and scoring)"),
+                    (
+                        "single_call",
+                        "Fast (contact extraction and scoring in one request)",
+                    ),
+                ],
+                default="two_call",
+                max_length=20,
+            ),
+        ),
+    ]
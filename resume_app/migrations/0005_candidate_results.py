@@ -0,0 +1,201 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:17
+
+import math
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+RECORD_FIELDS = {
+    "Rank",
+    "File Name",
+    "File Hash",
+    "Candidate Name",
+    "Email",
+    "Phone",
+    "Total Score",
+    "Summary",
+}
+
+
+def to_float(value):
+    """Convert a stored score to float, or None if it is not a number"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def move_results_to_rows(apps, schema_editor):
+    """Copy the results JSON of existing sessions into CandidateResult rows"""
+    ResumeUploadSession = apps.get_model("resume_app", "ResumeUploadSession")
+    CandidateResult = apps.get_model("resume_app", "CandidateResult")
+    CandidateSkillScore = apps.get_model("resume_app", "CandidateSkillScore")
+
+    for session in ResumeUploadSession.objects.exclude(results=None).iterator():
+        records = session.results if isinstance(session.results, list) else []
+        candidates = CandidateResult.objects.bulk_create(
+            CandidateResult(
+                session=session,
+                rank=record.get("Rank") or index,
+                total_score=to_float(record.get("Total Score")) or 0,
+                name=str(record.get("Candidate Name") or "")[:255],
+                email=str(record.get("Email") or "")[:255],
+                phone=str(record.get("Phone") or "")[:50],
+                file_name=str(record.get("File Name") or "")[:255],
+                file_hash=str(record.get("File Hash") or ""),
+                summary=str(record.get("Summary") or ""),
+            )
+            for index, record in enumerate(records, start=1)
+        )
+        CandidateSkillScore.objects.bulk_create(
+            CandidateSkillScore(
+                candidate=candidate, skill=key[: -len(" Score")], score=score
+            )
+            for candidate, record in zip(candidates, records)
+            for key, value in record.items()
+            if key.endswith(" Score")
+            and key not in RECORD_FIELDS
+            and (score := to_float(value)) is not None
+        )
+        session.results = None
+        session.save(update_fields=["results"])
+
+
+def move_rows_to_results(apps, schema_editor):
+    """Rebuild the results JSON from CandidateResult rows"""
+    ResumeUploadSession = apps.get_model("resume_app", "ResumeUploadSession")
+    CandidateResult = apps.get_model("resume_app", "CandidateResult")
+
+    for session in ResumeUploadSession.objects.filter(
+        candidates__isnull=False
+    ).distinct():
+        records = []
+        for candidate in CandidateResult.objects.filter(session=session).order_by(
+            "rank"
+        ):
+            record = {
+                "Rank": candidate.rank,
+                "File Name": candidate.file_name,
+                "File Hash": candidate.file_hash,
+                "Candidate Name": candidate.name,
+                "Email": candidate.email,
+                "Phone": candidate.phone,
+                "Total Score": candidate.total_score,
+                "Summary": candidate.summary,
+            }
+            for skill_score in candidate.skill_scores.all():
+                record[f"{skill_score.skill} Score"] = skill_score.score
+            records.append(record)
+        session.results = records
+        session.save(update_fields=["results"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resume_app", "0004_session_scoring_mode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CandidateResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rank", models.PositiveIntegerField()),
+                ("total_score", models.FloatField(default=0)),
+                ("name", models.CharField(blank=True, default="", max_length=255)),
+                ("email", models.CharField(blank=True, default="", max_length=255)),
+                ("phone", models.CharField(blank=True, default="", max_length=50)),
+                ("file_name", models.CharField(max_length=255)),
+                (
+                    "file_hash",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="SHA-256 of the resume file",
+                        max_length=64,
+                    ),
+                ),
+                ("summary", models.TextField(blank=True, default="")),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="candidates",
+                        to="resume_app.resumeuploadsession",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["session", "rank"],
+            },
+        ),
+        migrations.CreateModel(
+            name="CandidateSkillScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("skill", models.CharField(max_length=255)),
+                ("score", models.FloatField()),
+                (
+                    "candidate",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="skill_scores",
+                        to="resume_app.candidateresult",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="candidateresult",
+            index=models.Index(
+                fields=["session", "rank"], name="candidate_session_rank_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="candidateresult",
+            index=models.Index(
+                fields=["session", "-total_score"], name="candidate_session_score_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="candidateresult",
+            index=models.Index(fields=["name"], name="candidate_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="candidateresult",
+            index=models.Index(fields=["email"], name="candidate_email_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="candidateresult",
+            index=models.Index(fields=["file_hash"], name="candidate_file_hash_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="candidateskillscore",
+            index=models.Index(fields=["skill", "score"], name="skill_score_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="candidateskillscore",
+            constraint=models.UniqueConstraint(
+                fields=("candidate", "skill"), name="unique_skill_per_candidate"
+            ),
+        ),
+        migrations.RunPython(move_results_to_rows, move_rows_to_results),
+    ]
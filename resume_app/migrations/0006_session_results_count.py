@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def count_results(apps, schema_editor):
+    """Fill results_count from the CandidateResult rows of existing sessions"""
+    ResumeUploadSession = apps.get_model("resume_app", "ResumeUploadSession")
+    CandidateResult = apps.get_model("resume_app", "CandidateResult")
+    counts = (
+        CandidateResult.objects.filter(session=OuterRef("pk"))
+        .order_by()
+        .values("session")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    ResumeUploadSession.objects.filter(
+        id__in=CandidateResult.objects.values("session")
+    ).update(results_count=Subquery(counts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resume_app", "0005_candidate_results"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="results_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="resumeuploadsession",
+            index=models.Index(fields=["-created_at"], name="session_created_idx"),
+        ),
+        migrations.RunPython(count_results, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_search_table(apps, schema_editor):
+    """Create the FTS5 candidate search table on SQLite"""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS resume_app_candidate_search USING fts5("
+        "name, email, phone, file_name, skills, content, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS resume_app_candidate_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resume_app", "0006_session_results_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resume_app", "0007_candidate_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="candidateresult",
+            name="duplicate_file_names",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name="Resume",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "file_hash",
+                    models.CharField(
+                        help_text="SHA-256 of the resume file",
+                        max_length=64,
+                        unique=True,
+                    ),
+                ),
+                ("text", models.TextField(blank=True, default="")),
+                ("name", models.CharField(blank=True, default="", max_length=255)),
+                ("email", models.CharField(blank=True, default="", max_length=255)),
+                ("phone", models.CharField(blank=True, default="", max_length=50)),
+                (
+                    "simhash",
+                    models.BigIntegerField(
+                        blank=True,
+                        help_text="64-bit SimHash of the text, stored signed",
+                        null=True,
+                    ),
+                ),
+                ("simhash_band0", models.PositiveIntegerField(blank=True, null=True)),
+                ("simhash_band1", models.PositiveIntegerField(blank=True, null=True)),
+                ("simhash_band2", models.PositiveIntegerField(blank=True, null=True)),
+                ("simhash_band3", models.PositiveIntegerField(blank=True, null=True)),
+                ("simhash_band4", models.PositiveIntegerField(blank=True, null=True)),
+                ("simhash_band5", models.PositiveIntegerField(blank=True, null=True)),
+                ("first_seen_at", models.DateTimeField(auto_now_add=True)),
+                ("last_seen_at", models.DateTimeField(auto_now=True)),
+                ("seen_count", models.PositiveIntegerField(default=1)),
+                (
+                    "near_duplicate_of",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="near_duplicates",
+                        to="resume_app.resume",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="candidateresult",
+            name="resume",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="results",
+                to="resume_app.resume",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(
+                fields=["simhash_band0"], name="resume_simhash_band0_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(
+                fields=["simhash_band1"], name="resume_simhash_band1_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(
+                fields=["simhash_band2"], name="resume_simhash_band2_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(
+                fields=["simhash_band3"], name="resume_simhash_band3_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(
+                fields=["simhash_band4"], name="resume_simhash_band4_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(
+                fields=["simhash_band5"], name="resume_simhash_band5_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:30
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resume_app", "0008_resume_dedup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="llm_calls_saved",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="prefilter_skipped",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="prefilter_threshold",
+            field=models.FloatField(
+                blank=True,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(0.0),
+                    django.core.validators.MaxValueValidator(1.0),
+                ],
+            ),
+        ),
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="prefilter_top_k",
+            field=models.PositiveIntegerField(
+                blank=True,
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resume_app", "0009_session_prefilter"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="resumeuploadsession",
+            name="scoring_mode",
+            field=models.CharField(
+                choices=[
+                    ("two_call", "Standard (separate contact extraction and scoring)"),
+                    (
+                        "single_call",
+                        "Fast (contact extraction and scoring in one request)",
+                    ),
+                    ("keyword", "Offline (keyword matching, no AI scoring)"),
+                ],
+                default="two_call",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resume_app", "0011_session_batched_mode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="resume_tokens",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="resumeuploadsession",
+            name="resume_tokens_sent",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
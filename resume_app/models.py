@@ -1,26 +1,208 @@
 from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
 import json
+import hashlib
+
+
+class ScoringCriteria(models.Model):
+    """Scoring criteria generated from a job description, reused across uploads"""
+
+    jd_hash = models.CharField(max_length=64)
+    llm_model = models.CharField(max_length=100)
+    criteria = models.TextField(help_text='Raw criteria JSON returned by the model')
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+    use_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'scoring criteria'
+        constraints = [
+            models.UniqueConstraint(fields=['jd_hash', 'llm_model'], name='unique_criteria_per_jd_model'),
+        ]
+
+    def __str__(self):
+        return f"Criteria {self.jd_hash[:12]} ({self.llm_model})"
+
+    @staticmethod
+    def hash_job_description(job_description):
+        """Hash a job description, ignoring case and whitespace differences"""
+        normalized = ' '.join(job_description.split()).lower()
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
 
 
 class ResumeUploadSession(models.Model):
     """Model to store resume upload sessions"""
 
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    # Values match the scoring modes of ResumeProcessingService
+    SCORING_MODE_CHOICES = [
+        ('two_call', 'Standard (separate contact extraction and scoring)'),
+        ('single_call', 'Fast (contact extraction and scoring in one request)'),
+        ('batched', 'Batched (several resumes per request, fewest tokens)'),
+        ('keyword', 'Offline (keyword matching, no AI scoring)'),
+    ]
+
     job_description = models.TextField()
     zip_file = models.FileField(upload_to='uploads/')
     created_at = models.DateTimeField(auto_now_add=True)
     processed = models.BooleanField(default=False)
+    # Legacy ranked results; results are now stored as CandidateResult rows
     results = models.JSONField(null=True, blank=True)
+    # Number of ranked CandidateResult rows, kept up to date by jobs.rank_candidates
+    results_count = models.PositiveIntegerField(default=0)
     criteria = models.JSONField(null=True, blank=True)
     error_message = models.TextField(null=True, blank=True)
+    scoring_mode = models.CharField(max_length=20, choices=SCORING_MODE_CHOICES, default='two_call')
+    scoring_criteria = models.ForeignKey(
+        ScoringCriteria, null=True, blank=True, on_delete=models.SET_NULL, related_name='sessions'
+    )
+    # Local similarity prefilter (see resume_app.prefilter); empty scores every resume
+    prefilter_top_k = models.PositiveIntegerField(null=True, blank=True, validators=[MinValueValidator(1)])
+    prefilter_threshold = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(0.0), MaxValueValidator(1.0)]
+    )
+    # Resumes the prefilter kept away from the LLM, and the API requests that saved
+    prefilter_skipped = models.PositiveIntegerField(default=0)
+    llm_calls_saved = models.PositiveIntegerField(default=0)
+    # Tokens of resume text extracted (once per resume), and sent after
+    # compaction in the requests made
+    resume_tokens = models.PositiveIntegerField(default=0)
+    resume_tokens_sent = models.PositiveIntegerField(default=0)
+    # Progress of the running worker: resume files in the upload, extracted,
+    # scored, failed, and skipped as duplicates or by the prefilter
+    resumes_total = models.PositiveIntegerField(default=0)
+    resumes_extracted = models.PositiveIntegerField(default=0)
+    resumes_scored = models.PositiveIntegerField(default=0)
+    resumes_failed = models.PositiveIntegerField(default=0)
+    resumes_skipped = models.PositiveIntegerField(default=0)
+
+    # Job queue bookkeeping (see resume_app.jobs)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    worker_id = models.CharField(max_length=100, blank=True, default='')
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Last time the worker stored a finished resume; running sessions that
+    # stop reporting are requeued (see jobs.requeue_stale_sessions)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='session_status_created_idx'),
+            models.Index(fields=['-created_at'], name='session_created_idx'),
+        ]
 
     def __str__(self):
         return f"Session {self.id} - {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
 
     def get_results_count(self):
         """Return the number of processed resumes"""
-        if self.results:
-            return len(self.results)
-        return 0
+        return self.results_count
+
+    @property
+    def is_finished(self):
+        """Return True once a worker has completed or failed this session"""
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+
+class Resume(models.Model):
+    """
+    A resume file seen in one or more uploads, identified by its content hash
+
+    Stores the extracted text and contact details once, so later uploads of
+    the same file skip extraction and contact lookup. ``simhash`` is a
+    fingerprint of the text for finding near-duplicates (the same resume
+    re-exported or lightly edited); the band columns index its 10-11 bit parts
+    (see resume_app.fingerprint).
+    """
+
+    file_hash = models.CharField(max_length=64, unique=True, help_text='SHA-256 of the resume file')
+    text = models.TextField(blank=True, default='')
+    name = models.CharField(max_length=255, blank=True, default='')
+    email = models.CharField(max_length=255, blank=True, default='')
+    phone = models.CharField(max_length=50, blank=True, default='')
+    simhash = models.BigIntegerField(null=True, blank=True, help_text='64-bit SimHash of the text, stored signed')
+    simhash_band0 = models.PositiveIntegerField(null=True, blank=True)
+    simhash_band1 = models.PositiveIntegerField(null=True, blank=True)
+    simhash_band2 = models.PositiveIntegerField(null=True, blank=True)
+    simhash_band3 = models.PositiveIntegerField(null=True, blank=True)
+    simhash_band4 = models.PositiveIntegerField(null=True, blank=True)
+    simhash_band5 = models.PositiveIntegerField(null=True, blank=True)
+    near_duplicate_of = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='near_duplicates'
+    )
+    first_seen_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(auto_now=True)
+    seen_count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['simhash_band0'], name='resume_simhash_band0_idx'),
+            models.Index(fields=['simhash_band1'], name='resume_simhash_band1_idx'),
+            models.Index(fields=['simhash_band2'], name='resume_simhash_band2_idx'),
+            models.Index(fields=['simhash_band3'], name='resume_simhash_band3_idx'),
+            models.Index(fields=['simhash_band4'], name='resume_simhash_band4_idx'),
+            models.Index(fields=['simhash_band5'], name='resume_simhash_band5_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name or 'Resume'} ({self.file_hash[:12]})"
+
+
+class CandidateResult(models.Model):
+    """One ranked resume of a processed upload session"""
+
+    session = models.ForeignKey(ResumeUploadSession, on_delete=models.CASCADE, related_name='candidates')
+    rank = models.PositiveIntegerField()
+    total_score = models.FloatField(default=0)
+    name = models.CharField(max_length=255, blank=True, default='')
+    email = models.CharField(max_length=255, blank=True, default='')
+    phone = models.CharField(max_length=50, blank=True, default='')
+    file_name = models.CharField(max_length=255)
+    file_hash = models.CharField(max_length=64, blank=True, default='', help_text='SHA-256 of the resume file')
+    resume = models.ForeignKey(Resume, null=True, blank=True, on_delete=models.SET_NULL, related_name='results')
+    summary = models.TextField(blank=True, default='')
+    # Other files in the same upload with identical content; scored once
+    duplicate_file_names = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ['session', 'rank']
+        indexes = [
+            models.Index(fields=['session', 'rank'], name='candidate_session_rank_idx'),
+            models.Index(fields=['session', '-total_score'], name='candidate_session_score_idx'),
+            models.Index(fields=['name'], name='candidate_name_idx'),
+            models.Index(fields=['email'], name='candidate_email_idx'),
+            models.Index(fields=['file_hash'], name='candidate_file_hash_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} {self.name} (session {self.session_id})"
+
+
+class CandidateSkillScore(models.Model):
+    """Score of one candidate for one skill of the scoring criteria"""
+
+    candidate = models.ForeignKey(CandidateResult, on_delete=models.CASCADE, related_name='skill_scores')
+    skill = models.CharField(max_length=255)
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'skill'], name='unique_skill_per_candidate'),
+        ]
+        indexes = [
+            models.Index(fields=['skill', 'score'], name='skill_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.skill}: {self.score}"
@@ -0,0 +1,127 @@
+import re
+import json
+import zlib
+
+import numpy as np
+
+# Hashed bag of words: unigrams and bigrams are hashed into a fixed number of
+# buckets, so no vocabulary has to be built or stored
+DEFAULT_FEATURES = 2 ** 18
+# Keeps tokens such as "c++", "c#" and "node.js" intact
+TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#.]*')
+
+
+def tokenize(text):
+    """Lowercase word tokens of text"""
+    return [token.rstrip('.') for token in TOKEN_PATTERN.findall(text.lower())]
+
+
+def hashed_counts(text, n_features=DEFAULT_FEATURES):
+    """
+    Count the hashed unigram and bigram features of a text
+
+    Returns:
+        tuple: (feature indices, counts) as NumPy arrays
+    """
+    tokens = tokenize(text)
+    terms = tokens + [f'{first} {second}' for first, second in zip(tokens, tokens[1:])]
+    if not terms:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+    hashes = np.fromiter(
+        (zlib.crc32(term.encode('utf-8')) for term in terms), dtype=np.int64, count=len(terms)
+    ) % n_features
+    indices, counts = np.unique(hashes, return_counts=True)
+    return indices, counts.astype(np.float64)
+
+
+def build_query(optimized_criteria):
+    """
+    Build the prefilter query from the criteria JSON
+
+    Each skill name is weighted by its max_points so heavily weighted skills
+    count more; descriptions get a tenth of that weight. Falls back to the
+    raw text when the criteria are not valid JSON.
+
+    Returns:
+        list: (text, weight) pairs for similarity_scores
+    """
+    try:
+        criteria_data = json.loads(optimized_criteria)
+    except (TypeError, json.JSONDecodeError):
+        return [(optimized_criteria or '', 1.0)]
+    if not isinstance(criteria_data, dict):
+        return [(optimized_criteria, 1.0)]
+
+    parts = []
+    for skill in criteria_data.get('required_skills', []) + criteria_data.get('bonus_skills', []):
+        try:
+            points = max(float(skill.get('max_points', 0)), 1.0)
+        except (TypeError, ValueError):
+            points = 1.0
+        parts.append((str(skill.get('skill', '')), points))
+        parts.append((str(skill.get('description', '')), points / 10))
+    return parts
+
+
+def similarity_scores(texts, query, n_features=DEFAULT_FEATURES):
+    """
+    Cosine similarity between each text and the query under TF-IDF weighting
+
+    ``query`` is a string or a list of (text, weight) pairs from build_query.
+    IDF is computed over the given texts, so scores are relative to the
+    batch. All texts are scored in one vectorized pass.
+
+    Returns:
+        numpy.ndarray: One score in [0, 1] per text; 0 for empty texts
+    """
+    if not texts:
+        return np.zeros(0)
+
+    doc_features = [hashed_counts(text or '', n_features) for text in texts]
+    lengths = np.array([len(indices) for indices, _ in doc_features])
+    doc_ids = np.repeat(np.arange(len(texts)), lengths)
+    indices = np.concatenate([indices for indices, _ in doc_features])
+    counts = np.concatenate([counts for _, counts in doc_features])
+
+    document_frequency = np.bincount(indices, minlength=n_features)
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+    # Sublinear term frequency so one word repeated many times can't dominate
+    weights = (1 + np.log(counts)) * idf[indices]
+    doc_norms = np.sqrt(np.bincount(doc_ids, weights=weights ** 2, minlength=len(texts)))
+
+    query_vector = np.zeros(n_features)
+    for part, weight in ([(query, 1.0)] if isinstance(query, str) else query):
+        query_indices, query_counts = hashed_counts(part, n_features)
+        query_vector[query_indices] += weight * (1 + np.log(query_counts))
+    query_vector *= idf
+    query_norm = np.linalg.norm(query_vector)
+    if not query_norm:
+        return np.zeros(len(texts))
+
+    dots = np.bincount(doc_ids, weights=weights * query_vector[indices], minlength=len(texts))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(doc_norms > 0, dots / (doc_norms * query_norm), 0.0)
+    return scores
+
+
+def shortlist(scores, top_k=None, threshold=None):
+    """
+    Pick the texts worth sending to the LLM
+
+    Args:
+        scores: Similarity scores from similarity_scores
+        top_k: Keep at most this many of the best scores (None or 0: no limit)
+        threshold: Drop scores below this value (None or 0: no minimum)
+
+    Returns:
+        list: Indices of the kept texts, in their original order
+    """
+    keep = np.ones(len(scores), dtype=bool)
+    if threshold:
+        keep &= scores >= threshold
+    if top_k and top_k < keep.sum():
+        # Stable sort keeps the earlier text on ties
+        ranked = [index for index in np.argsort(-scores, kind='stable') if keep[index]]
+        keep[:] = False
+        keep[ranked[:top_k]] = True
+    return np.flatnonzero(keep).tolist()
@@ -0,0 +1,326 @@
+import os
+import csv
+import json
+import math
+import heapq
+import tempfile
+
+import xlsxwriter
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional, Parquet reports when installed
+    pyarrow = None
+
+REPORT_SHEET = 'Resume Rankings'
+# Columns of every resume record; skill columns ("<skill> Score") follow
+RECORD_COLUMNS = ('File Name', 'Candidate Name', 'Email', 'Phone', 'Total Score', 'Summary')
+REPORT_FORMATS = ('xlsx', 'csv', 'parquet')
+# Report format by output file extension (anything else is written as Excel)
+FORMAT_EXTENSIONS = {'.xlsx': 'xlsx', '.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet'}
+# Excel column widths fit the longest value, up to this many characters
+MAX_COLUMN_WIDTH = 50
+# Rows buffered per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 10000
+# Characters of CSV or JSON Lines text sent per chunk of a streamed report
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _sort_score(value):
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return math.inf
+    # Missing scores are ranked last
+    return math.inf if math.isnan(score) else -score
+
+
+def rank_records(records):
+    """Sort resume records by total score, highest first (ties keep their order)"""
+    return sorted(records, key=lambda record: _sort_score(record.get('Total Score')))
+
+
+def report_columns(records):
+    """
+    Report columns: Rank, then every record key in the order first seen
+
+    Records built by the CLI and ResumeProcessingService put file name,
+    contact details, total score and summary first, followed by one
+    "<skill> Score" column per skill.
+    """
+    columns = {'Rank': None}
+    for record in records:
+        for key in record:
+            columns.setdefault(key, None)
+    return list(columns)
+
+
+def ranked_rows(records):
+    """Yield ranked records with their Rank added (records are not changed)"""
+    for rank, record in enumerate(records, 1):
+        row = dict(record)
+        row['Rank'] = rank
+        yield row
+
+
+def report_format(path):
+    """Report format written for an output path, from its extension"""
+    return FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'xlsx')
+
+
+class RecordSpill:
+    """
+    Resume records kept in a temporary JSON Lines file instead of in memory
+
+    Only each record's sort key and file offset stay in memory, and records
+    are read back one at a time in rank order, so a report can be ranked
+    and written without holding every record. Records are ranked and their
+    columns ordered as rank_records and report_columns would do for a list
+    in ``order`` order.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        # (sort key, order, file offset) per record
+        self._entries = []
+        # (order, position) of the first record with each key
+        self._columns = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, record, order=None):
+        """Spill a record; ``order`` (default: the order added) breaks score ties and orders the columns"""
+        order = len(self._entries) if order is None else order
+        self._file.seek(0, os.SEEK_END)
+        self._entries.append((_sort_score(record.get('Total Score')), order, self._file.tell()))
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str).encode('utf-8') + b'\n')
+        for position, key in enumerate(record):
+            first = (order, position)
+            if key not in self._columns or first < self._columns[key]:
+                self._columns[key] = first
+
+    def columns(self):
+        """Report columns (see report_columns)"""
+        return ['Rank'] + sorted(self._columns, key=self._columns.get)
+
+    def ranked(self):
+        """Yield the records in rank order"""
+        return self._read(sorted(self._entries))
+
+    def top(self, count):
+        """The first ``count`` records in rank order"""
+        return list(self._read(heapq.nsmallest(count, self._entries)))
+
+    def _read(self, entries):
+        for _, _, offset in entries:
+            self._file.seek(offset)
+            yield json.loads(self._file.readline())
+
+    def close(self):
+        """Delete the spill file"""
+        self._file.close()
+
+
+class ColumnWidths:
+    """
+    Excel column widths, updated as rows are written
+
+    A column stops being measured once it reaches MAX_COLUMN_WIDTH, so
+    long summaries are not converted to text for every row.
+    """
+
+    def __init__(self, columns, max_width=MAX_COLUMN_WIDTH):
+        self.max_width = max_width
+        self.lengths = [len(str(column)) for column in columns]
+
+    def update(self, values):
+        """Account for one row of cell values"""
+        for index, value in enumerate(values):
+            if value is not None and self.lengths[index] + 2 < self.max_width:
+                self.lengths[index] = max(self.lengths[index], len(str(value)))
+
+    def widths(self):
+        """Width of each column, with two characters of padding"""
+        return [min(length + 2, self.max_width) for length in self.lengths]
+
+
+def write_xlsx(path, columns, rows):
+    """
+    Write report rows to an Excel file in constant memory
+
+    Rows go straight to disk through xlsxwriter's constant_memory mode, so
+    memory use does not grow with the number of rows.
+
+    Args:
+        path: Output file, or a binary file object
+        columns: Column names, in order
+        rows: Iterable of row dicts (missing keys are left blank)
+
+    Returns:
+        int: Rows written
+    """
+    workbook = xlsxwriter.Workbook(path, {
+        'constant_memory': True,
+        # Keep summaries and file names as plain text, as pandas did
+        'strings_to_urls': False,
+        'nan_inf_to_errors': True,
+    })
+    try:
+        worksheet = workbook.add_worksheet(REPORT_SHEET)
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+        worksheet.write_row(0, 0, columns, header_format)
+
+        widths = ColumnWidths(columns)
+        count = 0
+        for count, row in enumerate(rows, 1):
+            values = [row.get(column) for column in columns]
+            worksheet.write_row(count, 0, values)
+            widths.update(values)
+
+        # Column settings are written when the workbook is closed
+        for index, width in enumerate(widths.widths()):
+            worksheet.set_column(index, index, width)
+    finally:
+        workbook.close()
+    return count
+
+
+def write_csv(path, columns, rows):
+    """Write report rows to a CSV file one at a time; returns the rows written"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for count, row in enumerate(rows, 1):
+            writer.writerow([row.get(column) for column in columns])
+    return count
+
+
+def _is_numeric_column(column):
+    return column == 'Rank' or column.endswith(' Score')
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def write_parquet(path, columns, rows, row_group_size=PARQUET_ROW_GROUP_SIZE):
+    """
+    Write report rows to a Parquet file, one row group at a time
+
+    Rank and score columns are stored as numbers, the others as text.
+    Needs pyarrow.
+
+    Returns:
+        int: Rows written
+    """
+    if pyarrow is None:
+        raise ImportError('Parquet reports need pyarrow (pip install pyarrow)')
+
+    schema = pyarrow.schema([
+        (column, pyarrow.int64() if column == 'Rank' else
+         pyarrow.float64() if _is_numeric_column(column) else pyarrow.string())
+        for column in columns
+    ])
+    converters = [
+        (lambda value: None if value is None else int(value)) if column == 'Rank' else
+        _number if _is_numeric_column(column) else
+        (lambda value: None if value is None else str(value))
+        for column in columns
+    ]
+
+    count = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        chunk = []
+
+        def flush():
+            arrays = [
+                pyarrow.array([convert(row.get(column)) for row in chunk], type=field.type)
+                for column, convert, field in zip(columns, converters, schema)
+            ]
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+            chunk.clear()
+
+        for count, row in enumerate(rows, 1):
+            chunk.append(row)
+            if len(chunk) >= row_group_size:
+                flush()
+        if chunk or not count:
+            flush()
+    return count
+
+
+class _Echo:
+    """File-like object whose write() returns what it was given"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(columns, rows):
+    """Yield report rows as CSV text, header first, in chunks of about STREAM_CHUNK_SIZE characters"""
+    writer = csv.writer(_Echo())
+    lines = (writer.writerow([row.get(column) for column in columns]) for row in rows)
+    return _chunks(writer.writerow(columns), lines)
+
+
+def iter_jsonl(columns, rows):
+    """Yield report rows as JSON Lines, one object per row with keys in column order, in chunks"""
+    lines = (
+        json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False, default=str) + '\n'
+        for row in rows
+    )
+    return _chunks('', lines)
+
+
+def _chunks(first, lines, size=STREAM_CHUNK_SIZE):
+    """Join lines into chunks of at least size characters (the last one may be shorter)"""
+    chunk = [first]
+    length = len(first)
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(chunk)
+            chunk = []
+            length = 0
+    if length:
+        yield ''.join(chunk)
+
+
+REPORT_WRITERS = {'xlsx': write_xlsx, 'csv': write_csv, 'parquet': write_parquet}
+
+
+def write_report(path, records, output_format=None):
+    """
+    Rank resume records and write them as a report
+
+    Args:
+        path: Output file
+        records: List of resume records (dicts from build_resume_record or
+            ResumeProcessingService) in processing order, or a RecordSpill
+            holding them
+        output_format: 'xlsx', 'csv' or 'parquet' (default: from the
+            path's extension)
+
+    Returns:
+        int: Rows written
+    """
+    # Skill columns follow the order the resumes were processed in
+    if isinstance(records, RecordSpill):
+        columns, ranked = records.columns(), records.ranked()
+    else:
+        columns, ranked = report_columns(records), rank_records(records)
+    writer = REPORT_WRITERS[output_format or report_format(path)]
+    return writer(path, columns, ranked_rows(ranked))
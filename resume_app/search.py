@@ -0,0 +1,193 @@
+from django.db import connection, transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from .models import CandidateResult, CandidateSkillScore
+
+# SQLite FTS5 table over candidate names, contact details, skills and resume
+# text. Rows use the CandidateResult id as rowid. Created by migration 0007
+# on SQLite only; other databases fall back to LIKE queries.
+SEARCH_TABLE = 'resume_app_candidate_search'
+SEARCH_COLUMNS = ('name', 'email', 'phone', 'file_name', 'skills', 'content')
+
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+SNIPPET_TOKENS = 16
+
+INDEX_BATCH_SIZE = 1000
+
+
+def search_index_available():
+    """Return True if the database has the full-text search table"""
+    return connection.vendor == 'sqlite'
+
+
+def to_match_query(query):
+    """
+    Turn free text into an FTS5 query that matches all of its words
+
+    Each word is quoted, so characters that are FTS5 syntax (as in "C++" or
+    "node.js") are searched for literally instead of raising an error.
+    """
+    terms = ['"{}"'.format(term.replace('"', '""')) for term in query.split()]
+    return ' '.join(terms)
+
+
+def remove_candidates(candidate_ids):
+    """Drop candidates from the search index"""
+    if not search_index_available() or not candidate_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+            [(candidate_id,) for candidate_id in candidate_ids]
+        )
+
+
+def index_candidates(candidates, texts=None):
+    """
+    Add ranked candidates to the search index
+
+    Args:
+        candidates: CandidateResult objects, e.g. from save_candidate_results
+        texts: Optional dict of extracted resume text by file hash
+    """
+    if not search_index_available():
+        return
+    texts = texts or {}
+    candidates = list(candidates)
+
+    skills = {}
+    for candidate_id, skill in CandidateSkillScore.objects.filter(
+        candidate__in=candidates
+    ).values_list('candidate_id', 'skill'):
+        skills.setdefault(candidate_id, []).append(skill)
+
+    rows = [
+        (
+            candidate.id, candidate.name, candidate.email, candidate.phone, candidate.file_name,
+            ' '.join(skills.get(candidate.id, [])), texts.get(candidate.file_hash, '')
+        )
+        for candidate in candidates
+    ]
+    placeholders = ', '.join(['%s'] * (len(SEARCH_COLUMNS) + 1))
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), INDEX_BATCH_SIZE):
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, {", ".join(SEARCH_COLUMNS)}) '
+                f'VALUES ({placeholders})',
+                rows[start:start + INDEX_BATCH_SIZE]
+            )
+
+
+def clear_index():
+    """Remove every row from the search index"""
+    if search_index_available():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+
+def resolve_skill_names(skill):
+    """
+    Return the stored skill names matching ``skill``
+
+    Exact matches use the (skill, score) index; other capitalizations are
+    only looked up when there is no exact match.
+    """
+    if CandidateSkillScore.objects.filter(skill=skill).exists():
+        return [skill]
+    return list(
+        CandidateSkillScore.objects
+        .filter(skill__iexact=skill)
+        .order_by()
+        .values_list('skill', flat=True)
+        .distinct()
+    )
+
+
+def search_candidates(query='', skill='', min_skill_score=None, min_score=None):
+    """
+    Search candidates across all sessions
+
+    Args:
+        query: Free text matched against names, emails, phone numbers, file
+            names, skills and resume text; an email address is matched
+            exactly against candidate emails
+        skill: Only candidates scored on this skill
+        min_skill_score: Minimum score for ``skill``
+        min_score: Minimum total score
+
+    Returns:
+        QuerySet of CandidateResult, best scores first, annotated with
+        ``skill_score`` when a skill is given
+    """
+    candidates = CandidateResult.objects.select_related('session').defer(
+        'summary', 'session__job_description', 'session__results', 'session__criteria'
+    )
+
+    query = query.strip()
+    if query and '@' in query and len(query.split()) == 1:
+        candidates = candidates.filter(email__iexact=query)
+    elif query and search_index_available():
+        candidates = candidates.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+            (to_match_query(query),)
+        ))
+    elif query:
+        words = Q()
+        for word in query.split():
+            words &= (Q(name__icontains=word) | Q(email__icontains=word)
+                      | Q(file_name__icontains=word) | Q(summary__icontains=word))
+        candidates = candidates.filter(words)
+
+    if min_score is not None:
+        candidates = candidates.filter(total_score__gte=min_score)
+
+    if skill:
+        skill_names = resolve_skill_names(skill)
+        skill_scores = CandidateSkillScore.objects.filter(skill__in=skill_names)
+        if min_skill_score is not None:
+            skill_scores = skill_scores.filter(score__gte=min_skill_score)
+        best_skill_score = (
+            CandidateSkillScore.objects
+            .filter(candidate=OuterRef('pk'), skill__in=skill_names)
+            .order_by('-score')
+            .values('score')[:1]
+        )
+        candidates = candidates.filter(
+            id__in=skill_scores.values('candidate')
+        ).annotate(skill_score=Subquery(best_skill_score))
+        return candidates.order_by('-skill_score', '-total_score', 'id')
+
+    return candidates.order_by('-total_score', 'id')
+
+
+def get_snippets(candidate_ids, query):
+    """
+    Return highlighted resume text snippets for search results
+
+    Returns:
+        dict: Safe HTML snippet by candidate id, with matches in <mark> tags
+    """
+    query = query.strip()
+    if not query or not candidate_ids or not search_index_available():
+        return {}
+
+    placeholders = ', '.join(['%s'] * len(candidate_ids))
+    content_column = SEARCH_COLUMNS.index('content')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, snippet({SEARCH_TABLE}, {content_column}, %s, %s, '...', {SNIPPET_TOKENS}) "
+            f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND rowid IN ({placeholders})',
+            [SNIPPET_START, SNIPPET_END, to_match_query(query), *candidate_ids]
+        )
+        rows = cursor.fetchall()
+
+    return {
+        candidate_id: mark_safe(
+            escape(snippet).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+        )
+        for candidate_id, snippet in rows
+        if snippet
+    }
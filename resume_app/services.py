@@ -1,33 +1,232 @@
 import os
 import json
 import zipfile
-import tempfile
-import shutil
-import textract
+import threading
 import pandas as pd
+from contextlib import nullcontext
 from openai import OpenAI
-from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from .caches import ExtractionCache, ResponseCache, sha256_bytes
+from .contact_extractor import NOT_FOUND, extract_contact_info, has_contact_details, merge_contact_info
+from . import batching, extractors, keyword_scorer, prefilter, text_compaction
+from .llm_client import DEFAULT_MAX_RETRIES, DEFAULT_REQUEST_TIMEOUT, LLMClient
+
+
+# Scoring modes: 'two_call' extracts contact info and ranks in separate
+# requests, 'single_call' gets both from one structured response, 'batched'
+# scores several resumes per request, 'keyword' scores skill mentions
+# locally without the LLM
+SCORING_MODE_TWO_CALL = 'two_call'
+SCORING_MODE_SINGLE_CALL = 'single_call'
+SCORING_MODE_BATCHED = 'batched'
+SCORING_MODE_KEYWORD = 'keyword'
+SCORING_MODES = (SCORING_MODE_TWO_CALL, SCORING_MODE_SINGLE_CALL, SCORING_MODE_BATCHED, SCORING_MODE_KEYWORD)
+
+# Counts kept in ResumeProcessingService.progress
+PROGRESS_KEYS = ('total', 'extracted', 'scored', 'failed', 'skipped')
+
+RESUME_EXTENSIONS = ('.pdf', '.docx', '.txt', '.doc')
+# ZIP members larger than this are skipped instead of being read into memory
+MAX_RESUME_FILE_SIZE = 20 * 1024 * 1024
+
+NO_RESUMES_ERROR = 'No resume files found in the zip file. Please upload PDF, DOCX, or TXT files.'
+NO_CRITERIA_ERROR = 'Failed to create optimized criteria from job description.'
 
 
 class ResumeProcessingService:
     """Service class to handle resume processing and ranking"""
 
-    def __init__(self, openai_api_key, model='gpt-3.5-turbo'):
-        self.client = OpenAI(api_key=openai_api_key)
+    # OpenAI client, request wrapper and batch scorer classes (replaced by
+    # AsyncResumeProcessingService with their async counterparts)
+    openai_client_class = OpenAI
+    llm_client_class = LLMClient
+    batch_scorer_class = batching.BatchScorer
+
+    def __init__(self, openai_api_key, model='gpt-3.5-turbo', max_workers=1, max_in_flight=None,
+                 extraction_cache=None, response_cache=None, scoring_mode=SCORING_MODE_TWO_CALL,
+                 extract_workers=1, extract_timeout=60, resume_lookup=None,
+                 prefilter_top_k=None, prefilter_threshold=None, keyword_fallback=False,
+                 batch_token_budget=batching.DEFAULT_TOKEN_BUDGET, batch_size=batching.DEFAULT_MAX_BATCH_SIZE,
+                 resume_token_budget=text_compaction.DEFAULT_RESUME_TOKEN_BUDGET,
+                 requests_per_minute=None, tokens_per_minute=None, max_retries=DEFAULT_MAX_RETRIES,
+                 request_timeout=DEFAULT_REQUEST_TIMEOUT, checkpoint=None):
+        if scoring_mode not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode: {scoring_mode}")
+
         self.model = model
+        self.scoring_mode = scoring_mode
+        # Extracted text is reused across runs for files with identical bytes
+        self.extraction_cache = extraction_cache or ExtractionCache()
+        # Worker processes for text extraction (1 extracts in the scoring threads)
+        self.extract_workers = max(1, int(extract_workers))
+        # Seconds allowed per file in an extraction worker process
+        self.extract_timeout = extract_timeout
+        # Scoring answers are replayed for identical model/prompt pairs
+        self.response_cache = response_cache or ResponseCache()
+        # Number of resumes processed concurrently (1 keeps the serial path)
+        self.max_workers = max(1, int(max_workers))
+        # Upper bound on OpenAI requests in flight across all worker threads;
+        # the client lowers it while the API is rate limiting
+        self.max_in_flight = max(1, int(max_in_flight or self.max_workers * 2))
+        # Rate limits (None: no limit) and retries with backoff for every request
+        self.llm_client = self.llm_client_class(
+            self.openai_client_class(api_key=openai_api_key, max_retries=0, timeout=request_timeout),
+            model,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_concurrency=self.max_in_flight,
+            max_retries=max_retries
+        )
+        # Requests and tokens sent to the API (cache hits are not counted)
+        self.usage = {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        self._usage_lock = threading.Lock()
+        # Optional callable(file_hash) -> {'text', 'name', 'email', 'phone'} or
+        # None, for resumes already processed in earlier uploads. Only called
+        # from the thread that runs process_zip_file.
+        self.resume_lookup = resume_lookup
+        # Resumes reused from resume_lookup, and exact duplicates skipped within an upload
+        self.dedup = {'known_resumes': 0, 'duplicate_files': 0}
+        # Optional resume_app.checkpoints.Checkpoint: ZIP members it holds are
+        # not extracted or scored again, and every newly scored resume is
+        # added to it as soon as it is done
+        self.checkpoint = checkpoint
+        self.restored = 0
+        # Local similarity prefilter: only the prefilter_top_k most similar
+        # resumes and/or those scoring at least prefilter_threshold are sent
+        # to the LLM (both None: score everything)
+        self.prefilter_top_k = prefilter_top_k or None
+        self.prefilter_threshold = prefilter_threshold or None
+        self.prefilter_stats = {'shortlisted': 0, 'skipped': 0, 'calls_saved': 0}
+        # Job description of the current upload; keyword scoring matches the
+        # skills it names when the criteria cannot be keyword-matched
+        self.job_description = ''
+        # Score resumes with the keyword scorer when the LLM fails (and build
+        # criteria from the job description when they can't be generated)
+        self.keyword_fallback = keyword_fallback
+        self.keyword_fallbacks = 0
+        # Batched mode: prompt tokens and resumes per request (see resume_app.batching)
+        self.batch_token_budget = batch_token_budget
+        self.batch_size = batch_size
+        self.batch_stats = {'batches': 0, 'failed': 0, 'splits': 0, 'single_retries': 0}
+        # Resume text is compacted to this many tokens per scoring prompt (see
+        # resume_app.text_compaction); tokens are counted once per extracted
+        # resume, and for the excerpts of each request actually sent
+        self.resume_token_budget = resume_token_budget
+        self.compaction_stats = {'excerpts': 0, 'original_tokens': 0, 'sent_tokens': 0}
+        # Progress of the current process_zip_file call: resume files found,
+        # extracted, scored (taken from the checkpoint included), failed, and
+        # skipped as duplicates or by the prefilter
+        self.progress = dict.fromkeys(PROGRESS_KEYS, 0)
+        # Optional callable(progress dict) called whenever the counts change,
+        # from the scoring threads with the progress lock held
+        self.on_progress = None
+        self._progress_lock = threading.Lock()
+
+    def _complete(self, prompt, use_cache=False, excerpts=()):
+        """
+        Send a single-message chat completion and return the answer text
+
+        With ``use_cache`` the answer is looked up in (and stored to) the
+        response cache. Only answers that parse as JSON are stored, so a
+        malformed reply is retried on the next run. ``excerpts`` are the
+        resume texts in the prompt, counted as sent unless the answer came
+        from the cache.
+        """
+        if use_cache:
+            cache_key = ResponseCache.make_key(self.model, prompt)
+            cached_answer = self.response_cache.get(cache_key)
+            if cached_answer is not None:
+                return cached_answer
+
+        answer = self._request_completion(prompt)
+        self._count_sent(excerpts)
+
+        if use_cache:
+            try:
+                json.loads(answer)
+            except json.JSONDecodeError:
+                return answer
+            self.response_cache.set(cache_key, answer)
+        return answer
+
+    def _request_completion(self, prompt):
+        """Call the OpenAI API through the rate-limited, retrying client"""
+        return self._answer_text(self.llm_client.complete(prompt))
+
+    def _answer_text(self, response):
+        """Count the tokens of an API response and return its answer text"""
+        usage = getattr(response, 'usage', None)
+        with self._usage_lock:
+            self.usage['requests'] += 1
+            if usage:
+                self.usage['prompt_tokens'] += usage.prompt_tokens
+                self.usage['completion_tokens'] += usage.completion_tokens
+
+        return response.choices[0].message.content.strip()
+
+    def _count_extracted(self, text):
+        """Count the tokens of a resume's extracted text (once per resume)"""
+        if not text or self.scoring_mode == SCORING_MODE_KEYWORD:
+            return
+        original_tokens = text_compaction.count_tokens(text, self.model)
+        with self._usage_lock:
+            self.compaction_stats['original_tokens'] += original_tokens
+
+    def _count_sent(self, excerpts):
+        """Count the tokens of the resume excerpts in a request that was sent"""
+        if not excerpts:
+            return
+        sent_tokens = sum(text_compaction.count_tokens(excerpt, self.model) for excerpt in excerpts)
+        with self._usage_lock:
+            self.compaction_stats['excerpts'] += len(excerpts)
+            self.compaction_stats['sent_tokens'] += sent_tokens
+
+    def _fit(self, text, token_budget=None):
+        """Compact resume text to a token budget (the scoring budget by default)"""
+        return text_compaction.fit_to_budget(text or '', token_budget or self.resume_token_budget, self.model)
+
+    def _count_progress(self, **counts):
+        """Add to the progress counts and report them to on_progress"""
+        with self._progress_lock:
+            for key, value in counts.items():
+                self.progress[key] += value
+            if self.on_progress is not None:
+                try:
+                    self.on_progress(dict(self.progress))
+                except Exception as e:
+                    print(f"[!] Could not report progress: {e}")
 
     def extract_text(self, file_path):
-        """Extract text from resume file"""
+        """Extract text from resume file, consulting the extraction cache first"""
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            print(f"[ERROR] Failed to read {file_path}: {e}")
+            return ""
+
+        return self.extract_text_from_bytes(data, os.path.basename(file_path))
+
+    def extract_text_from_bytes(self, data, filename, file_hash=None):
+        """Extract text from resume file contents held in memory"""
+        file_hash = file_hash or sha256_bytes(data)
+        cached_text = self.extraction_cache.get(file_hash)
+        if cached_text is not None:
+            return cached_text
+
         try:
-            text = textract.process(file_path).decode('utf-8')
-            return text.strip()
+            text = extractors.extract_text_from_bytes(data, filename)
         except Exception as e:
-            print(f"[ERROR] Failed to extract {file_path}: {e}")
+            print(f"[ERROR] Failed to extract {filename}: {e}")
             return ""
 
-    def create_optimized_prompt(self, job_description):
-        """Use OpenAI to create an optimized ranking prompt from job description"""
-        prompt = f"""
+        if text:
+            self.extraction_cache.set(file_hash, text)
+        return text
+
+    def _criteria_prompt(self, job_description):
+        """Prompt asking the LLM for scoring criteria for a job description"""
+        return f"""
 You are an expert HR consultant specializing in creating technical recruitment assessment criteria.
 
 Given the following job description, please analyze it and create a comprehensive scoring system for evaluating candidates' resumes.
@@ -69,21 +268,9 @@ Please respond with a JSON object containing the optimized prompt structure:
 Make sure the total points add up to 100 and focus on the most critical requirements from the job description.
 """
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0
-            )
-            answer = response.choices[0].message.content.strip()
-            return answer
-        except Exception as e:
-            print(f"[ERROR] Failed to create optimized prompt: {e}")
-            return None
-
-    def extract_candidate_info(self, text):
-        """Extract candidate information from resume text"""
-        prompt = f"""
+    def _contact_prompt(self, excerpt):
+        """Prompt asking the LLM for the contact details in a resume excerpt (see _fit)"""
+        return f"""
 You are an expert HR assistant extracting candidate information from resumes.
 
 Please extract the following information from the resume:
@@ -101,37 +288,59 @@ Respond in the following JSON format:
 If any information is not found, use "Not Found" as the value.
 
 Resume:
-{text[:2000]}
+{excerpt}
 """
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0
-            )
-            answer = response.choices[0].message.content.strip()
-            return answer
-        except Exception as e:
-            print(f"[ERROR] OpenAI API failed for candidate info extraction: {e}")
-            return None
 
-    def rank_resume(self, text, optimized_criteria):
-        """Rank resume using the optimized criteria from job description"""
-        if not optimized_criteria:
-            return None
+    def _ranking_prompt(self, excerpt, optimized_criteria):
+        """
+        Prompt scoring a resume excerpt against the criteria (two_call mode)
 
-        try:
-            criteria_data = json.loads(optimized_criteria)
-            evaluation_prompt = criteria_data.get('evaluation_prompt', '')
+        Raises:
+            json.JSONDecodeError: The criteria are not valid JSON
+        """
+        criteria_data = json.loads(optimized_criteria)
+        evaluation_prompt = criteria_data.get('evaluation_prompt', '')
+
+        return f"""
+{evaluation_prompt}
+
+Please analyze the following resume and provide scores based on the criteria above.
+
+Respond in the following JSON format:
+{{
+    "total_score": <number>,
+    "skill_scores": {{
+        "skill_name": <score>,
+        ...
+    }},
+    "summary": "<brief explanation of scoring>"
+}}
+
+Resume:
+{excerpt}
+"""
+
+    def _scoring_prompt(self, excerpt, optimized_criteria):
+        """
+        Prompt scoring a resume excerpt and extracting its contact details in one request
 
-            # Create the actual ranking prompt
-            prompt = f"""
+        Raises:
+            json.JSONDecodeError: The criteria are not valid JSON
+        """
+        criteria_data = json.loads(optimized_criteria)
+        evaluation_prompt = criteria_data.get('evaluation_prompt', '')
+
+        return f"""
 {evaluation_prompt}
 
 Please analyze the following resume and provide scores based on the criteria above.
+Also extract the candidate's full name, email address and phone number.
 
 Respond in the following JSON format:
 {{
+    "name": "<candidate full name>",
+    "email": "<email address>",
+    "phone": "<phone number>",
     "total_score": <number>,
     "skill_scores": {{
         "skill_name": <score>,
@@ -140,17 +349,57 @@ Respond in the following JSON format:
     "summary": "<brief explanation of scoring>"
 }}
 
+If any contact information is not found, use "Not Found" as the value.
+
 Resume:
-{text[:3000]}
+{excerpt}
 """
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0
+    def create_optimized_prompt(self, job_description):
+        """Use OpenAI to create an optimized ranking prompt from job description"""
+        try:
+            return self._complete(self._criteria_prompt(job_description))
+        except Exception as e:
+            print(f"[ERROR] Failed to create optimized prompt: {e}")
+            return None
+
+    def extract_candidate_info(self, text):
+        """Extract candidate information from resume text"""
+        try:
+            excerpt = self._fit(text, text_compaction.DEFAULT_CONTACT_TOKEN_BUDGET)
+            return self._complete(self._contact_prompt(excerpt), use_cache=True, excerpts=[excerpt])
+        except Exception as e:
+            print(f"[ERROR] OpenAI API failed for candidate info extraction: {e}")
+            return None
+
+    def rank_resume(self, text, optimized_criteria):
+        """Rank resume using the optimized criteria from job description"""
+        if not optimized_criteria:
+            return None
+
+        try:
+            excerpt = self._fit(text)
+            return self._complete(
+                self._ranking_prompt(excerpt, optimized_criteria), use_cache=True, excerpts=[excerpt]
+            )
+
+        except json.JSONDecodeError:
+            print("[ERROR] Could not parse optimized criteria from job description")
+            return None
+        except Exception as e:
+            print(f"[ERROR] OpenAI API failed: {e}")
+            return None
+
+    def score_resume(self, text, optimized_criteria):
+        """Extract candidate information and rank the resume in a single request"""
+        if not optimized_criteria:
+            return None
+
+        try:
+            excerpt = self._fit(text)
+            return self._complete(
+                self._scoring_prompt(excerpt, optimized_criteria), use_cache=True, excerpts=[excerpt]
             )
-            answer = response.choices[0].message.content.strip()
-            return answer
 
         except json.JSONDecodeError:
             print("[ERROR] Could not parse optimized criteria from job description")
@@ -159,144 +408,650 @@ Resume:
             print(f"[ERROR] OpenAI API failed: {e}")
             return None
 
-    def process_resume(self, file_path, filename, optimized_criteria):
+    def process_resume(self, file_path, filename, optimized_criteria, call_executor=None):
         """Process a single resume file"""
         text = self.extract_text(file_path)
+        return self.process_resume_text(text, filename, optimized_criteria, call_executor)
+
+    def process_resume_text(self, text, filename, optimized_criteria, call_executor=None, contact_info=None):
+        """
+        Score a resume from its extracted text
+
+        Contact details come from ``contact_info`` when given (e.g. stored
+        for a known resume) or a local regex pass; the LLM extraction call
+        is only made when the name, or both email and phone, are missing. When
+        ``call_executor`` is given, that call runs on it while the ranking
+        call runs in the current thread. In keyword mode, or when the LLM
+        fails and keyword_fallback is set, the keyword scorer is used.
+        """
         if not text:
             return None
 
         print(f"Processing: {filename}...")
 
-        # Extract candidate information
-        candidate_info_result = self.extract_candidate_info(text)
-        candidate_info = {}
+        candidate_info = self._contact_details(text, contact_info)
+        if self.scoring_mode == SCORING_MODE_KEYWORD:
+            return self._keyword_record(text, filename, optimized_criteria, candidate_info)
+
+        candidate_info_result = None
+
+        if self.scoring_mode in (SCORING_MODE_SINGLE_CALL, SCORING_MODE_BATCHED):
+            # Contact fields come back in the same JSON as the scores; a lone
+            # resume in batched mode is scored like this too
+            ranking_result = self.score_resume(text, optimized_criteria)
+            candidate_info_result = ranking_result
+        elif has_contact_details(candidate_info):
+            ranking_result = self.rank_resume(text, optimized_criteria)
+        elif call_executor is not None:
+            info_future = call_executor.submit(self.extract_candidate_info, text)
+            ranking_result = self.rank_resume(text, optimized_criteria)
+            candidate_info_result = info_future.result()
+        else:
+            # Fall back to the LLM for candidate information
+            candidate_info_result = self.extract_candidate_info(text)
+            # Get ranking scores using optimized criteria
+            ranking_result = self.rank_resume(text, optimized_criteria)
+
+        return self._finish_record(
+            text, filename, optimized_criteria, candidate_info, candidate_info_result, ranking_result
+        )
+
+    def _finish_record(self, text, filename, optimized_criteria, candidate_info, candidate_info_result,
+                       ranking_result):
+        """Build a resume's record from the LLM answers, falling back to keyword scoring if they failed"""
         if candidate_info_result:
             try:
-                candidate_info = json.loads(candidate_info_result)
-            except json.JSONDecodeError:
+                candidate_info = merge_contact_info(candidate_info, json.loads(candidate_info_result))
+            except (json.JSONDecodeError, AttributeError):
                 print(f"[!] Could not parse candidate info for {filename}")
-                candidate_info = {"name": "Not Found", "email": "Not Found", "phone": "Not Found"}
-        else:
-            candidate_info = {"name": "Not Found", "email": "Not Found", "phone": "Not Found"}
 
-        # Get ranking scores using optimized criteria
-        ranking_result = self.rank_resume(text, optimized_criteria)
         if not ranking_result:
-            return None
+            return self._keyword_fallback(text, filename, optimized_criteria, candidate_info)
 
         try:
             # Parse the JSON response
-            ranking_data = json.loads(ranking_result)
-            total_score = ranking_data.get('total_score', 0)
-            summary = ranking_data.get('summary', '')
-
-            # Get skill scores from the new format
-            skill_scores = ranking_data.get('skill_scores', {})
-
-            # Create resume data record with dynamic skill columns
-            resume_data = {
-                'File Name': filename,
-                'Candidate Name': candidate_info.get('name', 'Not Found'),
-                'Email': candidate_info.get('email', 'Not Found'),
-                'Phone': candidate_info.get('phone', 'Not Found'),
-                'Total Score': total_score,
-                'Summary': summary
-            }
+            return self._resume_record(filename, candidate_info, json.loads(ranking_result))
+
+        except json.JSONDecodeError:
+            print(f"[!] {filename} → Could not parse ranking result.")
+            return self._keyword_fallback(text, filename, optimized_criteria, candidate_info)
+        except Exception as e:
+            print(f"[!] {filename} → Error processing: {e}")
+            return None
+
+    @staticmethod
+    def _resume_record(filename, candidate_info, ranking_data):
+        """Build a result record from contact details and a parsed ranking answer"""
+        total_score = ranking_data.get('total_score', 0)
+        summary = ranking_data.get('summary', '')
+
+        # Get skill scores from the new format
+        skill_scores = ranking_data.get('skill_scores', {})
+
+        # Create resume data record with dynamic skill columns
+        resume_data = {
+            'File Name': filename,
+            'Candidate Name': candidate_info.get('name', 'Not Found'),
+            'Email': candidate_info.get('email', 'Not Found'),
+            'Phone': candidate_info.get('phone', 'Not Found'),
+            'Total Score': total_score,
+            'Summary': summary
+        }
+
+        # Add individual skill scores
+        for skill, score in skill_scores.items():
+            resume_data[f'{skill} Score'] = score
+
+        print(f"[✔] {filename} - Total Score: {total_score}/100")
+        return resume_data
+
+    def _keyword_record(self, text, filename, optimized_criteria, candidate_info):
+        """Score a resume with the keyword scorer instead of the LLM"""
+        try:
+            ranking_data = keyword_scorer.scorer_for(optimized_criteria, self.job_description).score([text])[0]
+        except (TypeError, ValueError, AttributeError) as e:
+            print(f"[!] {filename} → Could not score with keywords: {e}")
+            return None
+        return self._resume_record(filename, candidate_info, ranking_data)
+
+    def _keyword_fallback(self, text, filename, optimized_criteria, candidate_info):
+        """Keyword-score a resume the LLM could not score, if keyword_fallback is set"""
+        if not self.keyword_fallback:
+            return None
+        print(f"[!] {filename} → AI scoring failed; falling back to keyword matching")
+        resume_data = self._keyword_record(text, filename, optimized_criteria, candidate_info)
+        if resume_data:
+            with self._usage_lock:
+                self.keyword_fallbacks += 1
+        return resume_data
+
+    def process_resumes(self, resume_files, optimized_criteria):
+        """
+        Process resume files, concurrently when max_workers > 1
+
+        Results are returned in the same order as ``resume_files`` so ranking
+        matches the serial path. Failed resumes are returned as None.
+        """
+        if self.scoring_mode == SCORING_MODE_BATCHED:
+            items = [(os.path.basename(path), None, self.extract_text(path), None) for path in resume_files]
+            return self._score_in_batches(items, optimized_criteria)
+
+        if self.max_workers == 1:
+            return [
+                self.process_resume(path, os.path.basename(path), optimized_criteria)
+                for path in resume_files
+            ]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as call_pool, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as resume_pool:
+            return list(resume_pool.map(
+                lambda path: self.process_resume(
+                    path, os.path.basename(path), optimized_criteria, call_executor=call_pool
+                ),
+                resume_files
+            ))
+
+    def list_resume_members(self, zip_ref):
+        """Return the resume entries of an open ZipFile in a fixed order"""
+        members = []
+        for member in zip_ref.infolist():
+            filename = os.path.basename(member.filename)
+            if member.is_dir() or not filename.lower().endswith(RESUME_EXTENSIONS):
+                continue
+            # Skip macOS resource forks
+            if member.filename.startswith('__MACOSX/') or filename.startswith('._'):
+                continue
+            if member.file_size > MAX_RESUME_FILE_SIZE:
+                print(f"[!] Skipping {member.filename}: file is larger than {MAX_RESUME_FILE_SIZE // (1024 * 1024)}MB")
+                continue
+            members.append(member)
+        # Fixed input order keeps ranking ties identical across runs
+        return sorted(members, key=lambda member: member.filename)
+
+    def _read_member(self, zip_ref, member):
+        """Read one ZIP member into memory, or return None if it is corrupt"""
+        try:
+            return zip_ref.read(member)
+        except (zipfile.BadZipFile, OSError, ValueError) as e:
+            print(f"[ERROR] Failed to read {member.filename} from zip: {e}")
+            return None
+
+    def process_zip_members(self, zip_ref, members, optimized_criteria, texts=None):
+        """
+        Stream resumes out of an open ZipFile and score them
+
+        Members are read one at a time and extracted from memory, so nothing
+        is unpacked to disk. With extract_workers > 1, text extraction runs in
+        a process pool and each text is handed to the scoring threads as soon
+        as it is ready, so parsing overlaps with the LLM calls. At most
+        2 * max(max_workers, extract_workers) members are in flight at once.
+        Results keep the order of ``members`` and carry the SHA-256 of the
+        resume file under 'File Hash'. When a ``texts`` dict is given, the
+        extracted text of every scored resume is stored in it by file hash.
+
+        Members with the same content as an earlier one are scored once: they
+        get a None result and are listed under 'Duplicate Files' in the
+        record of the first copy. Resumes known to ``resume_lookup`` reuse
+        their stored text and contact details. Members the checkpoint holds
+        get their stored record back without being extracted or scored.
+        Counts of extracted, scored and failed resumes are kept in
+        ``progress`` and reported to ``on_progress`` as they change.
+
+        When the prefilter is enabled, every member is extracted first and
+        only the shortlisted resumes are scored; the others get None. In
+        batched and keyword mode all resumes are also extracted before
+        scoring.
+        """
+        if self.scoring_mode == SCORING_MODE_KEYWORD:
+            return self._keyword_score_members(zip_ref, members, optimized_criteria, texts)
+        if self.scoring_mode == SCORING_MODE_BATCHED or self.prefilter_top_k or self.prefilter_threshold:
+            return self._process_extracted_members(zip_ref, members, optimized_criteria, texts)
+
+        def score(filename, file_hash, text, contact_info, call_pool):
+            return self._tag_record(
+                self.process_resume_text(text, filename, optimized_criteria, call_pool, contact_info),
+                file_hash, text, texts
+            )
+
+        results, duplicates, restored = self._map_members(zip_ref, members, score)
+        return self._attach_duplicates(results, duplicates, restored)
+
+    def _process_extracted_members(self, zip_ref, members, optimized_criteria, texts=None):
+        """
+        Extract every member, then score the resumes
+
+        Only the resumes the prefilter keeps are scored when it is enabled.
+        In batched mode resumes are packed into shared requests.
+        """
+        extracted, duplicates, restored = self._map_members(zip_ref, members, self._keep_extracted)
+
+        kept = [index for index, item in enumerate(extracted) if item and item[2]]
+        if self.prefilter_top_k or self.prefilter_threshold:
+            kept = self._shortlist(extracted, kept, optimized_criteria)
+
+        if self.scoring_mode == SCORING_MODE_BATCHED:
+            records = self._score_in_batches([extracted[index] for index in kept], optimized_criteria, texts)
+            results = [None] * len(extracted)
+            for index, resume_data in zip(kept, records):
+                results[index] = resume_data
+            return self._attach_duplicates(results, duplicates, restored)
+
+        def score(index, call_pool=None):
+            filename, file_hash, text, contact_info = extracted[index]
+            return self._tag_record(
+                self.process_resume_text(text, filename, optimized_criteria, call_pool, contact_info),
+                file_hash, text, texts
+            )
+
+        if self.max_workers == 1:
+            kept_set = set(kept)
+            results = [score(index) if index in kept_set else None for index in range(len(extracted))]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as call_pool, \
+                    ThreadPoolExecutor(max_workers=self.max_workers) as resume_pool:
+                futures = {index: resume_pool.submit(score, index, call_pool) for index in sorted(kept)}
+                results = [
+                    futures[index].result() if index in futures else None for index in range(len(extracted))
+                ]
+        return self._attach_duplicates(results, duplicates, restored)
+
+    def _shortlist(self, extracted, candidates, optimized_criteria):
+        """
+        Apply the similarity prefilter to extracted resumes
+
+        Args:
+            extracted: (filename, file_hash, text, contact_info) tuples
+            candidates: Indices of ``extracted`` with text
+
+        Returns:
+            list: Indices of the shortlisted resumes, in order
+        """
+        scores = prefilter.similarity_scores(
+            [extracted[index][2] for index in candidates], prefilter.build_query(optimized_criteria)
+        )
+        kept = [
+            candidates[position]
+            for position in prefilter.shortlist(scores, self.prefilter_top_k, self.prefilter_threshold)
+        ]
+        kept_set = set(kept)
+        skipped = [(position, index) for position, index in enumerate(candidates) if index not in kept_set]
+
+        self.prefilter_stats['shortlisted'] += len(kept)
+        self.prefilter_stats['skipped'] += len(skipped)
+        self._count_progress(skipped=len(skipped))
+        batch_scorer = self._batch_scorer(optimized_criteria) if self.scoring_mode == SCORING_MODE_BATCHED else None
+        if batch_scorer is not None:
+            # Skipped resumes save the batches they would have filled
+            excerpts = {index: self._fit(extracted[index][2]) for index in candidates}
+            self.prefilter_stats['calls_saved'] += (
+                len(batch_scorer.pack([excerpts[index] for index in candidates]))
+                - len(batch_scorer.pack([excerpts[index] for index in kept]))
+            )
+        for position, index in skipped:
+            filename, _, text, contact_info = extracted[index]
+            if self.scoring_mode != SCORING_MODE_BATCHED:
+                self.prefilter_stats['calls_saved'] += self._calls_per_resume(text, contact_info)
+            print(f"[i] Skipping {filename}: similarity {scores[position]:.3f} did not make the shortlist")
+        return kept
 
-            # Add individual skill scores
-            for skill, score in skill_scores.items():
-                resume_data[f'{skill} Score'] = score
+    def _batch_scorer(self, optimized_criteria, score_one=None):
+        """Create a BatchScorer for the criteria, or None if they are not valid JSON"""
+        try:
+            evaluation_prompt = json.loads(optimized_criteria).get('evaluation_prompt', '')
+        except (TypeError, AttributeError, json.JSONDecodeError):
+            print("[ERROR] Could not parse optimized criteria from job description")
+            return None
+        return self.batch_scorer_class(
+            evaluation_prompt,
+            self._batch_complete,
+            score_one,
+            token_budget=self.batch_token_budget,
+            max_batch_size=self.batch_size
+        )
+
+    def _batch_complete(self, prompt, excerpts):
+        """Answer a batched scoring prompt holding resume excerpts, through the response cache"""
+        return self._complete(prompt, use_cache=True, excerpts=excerpts)
+
+    def _score_in_batches(self, items, optimized_criteria, texts=None):
+        """
+        Score extracted resumes several per request (batched mode)
+
+        A resume that fails even on its own in a batched request is scored
+        with a single-resume request, then the keyword fallback if enabled.
+        Records of items with a file hash are tagged (see _tag_record) as
+        each batch is done, so finished batches reach the checkpoint.
+
+        Args:
+            items: (filename, file_hash, text, contact_info) tuples
+            texts: Optional dict the text of scored resumes is stored in by file hash
 
-            print(f"[✔] {filename} - Total Score: {total_score}/100")
-            return resume_data
+        Returns:
+            list: Result record (or None) for each item
+        """
+        resume_texts = [text or '' for _, _, text, _ in items]
+        batch_scorer = self._batch_scorer(
+            optimized_criteria, lambda index: self._score_single(resume_texts[index], optimized_criteria)
+        )
+        if batch_scorer is None:
+            self._count_progress(failed=len(items))
+            return [None] * len(items)
+
+        records = [None] * len(items)
 
+        def record_batch(answers):
+            for index, ranking_data in answers.items():
+                records[index] = self._batch_record(items[index], ranking_data, optimized_criteria, texts)
+
+        excerpts = [self._fit(text) for text in resume_texts]
+        try:
+            if self.max_workers == 1:
+                batch_scorer.score(excerpts, on_batch=record_batch)
+            else:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as batch_pool:
+                    batch_scorer.score(excerpts, batch_pool, on_batch=record_batch)
+        finally:
+            for key, value in batch_scorer.stats.items():
+                self.batch_stats[key] += value
+        return records
+
+    def _batch_record(self, item, ranking_data, optimized_criteria, texts=None):
+        """Build and tag the record of an extracted resume from its batched answer (or None)"""
+        filename, file_hash, text, contact_info = item
+        candidate_info = self._contact_details(text, contact_info)
+        if ranking_data:
+            resume_data = self._resume_record(
+                filename, merge_contact_info(candidate_info, ranking_data), ranking_data
+            )
+        else:
+            resume_data = self._keyword_fallback(text, filename, optimized_criteria, candidate_info)
+        return self._tag_record(resume_data, file_hash, text, texts) if file_hash else resume_data
+
+    def _score_single(self, text, optimized_criteria):
+        """Score one resume with a single_call request; returns the parsed answer or None"""
+        answer = self.score_resume(text, optimized_criteria)
+        try:
+            return json.loads(answer) if answer else None
         except json.JSONDecodeError:
-            print(f"[!] {filename} → Could not parse ranking result.")
             return None
+
+    def _keyword_score_members(self, zip_ref, members, optimized_criteria, texts=None):
+        """Extract every member, then score all resumes with the keyword scorer in one pass"""
+        extracted, duplicates, restored = self._map_members(zip_ref, members, self._keep_extracted)
+        return self._attach_duplicates(
+            self._keyword_score_extracted(extracted, optimized_criteria, texts), duplicates, restored
+        )
+
+    def _keyword_score_extracted(self, extracted, optimized_criteria, texts=None):
+        """Keyword-score extracted resumes in one pass; returns a record (or None) per item"""
+        indices = [index for index, item in enumerate(extracted) if item and item[2]]
+        scorer = keyword_scorer.scorer_for(optimized_criteria, self.job_description)
+        scores = scorer.score([extracted[index][2] for index in indices])
+        ranking_by_index = dict(zip(indices, scores))
+
+        results = []
+        for index, item in enumerate(extracted):
+            if index not in ranking_by_index:
+                results.append(None)
+                continue
+            filename, file_hash, text, contact_info = item
+            resume_data = self._resume_record(
+                filename, self._contact_details(text, contact_info), ranking_by_index[index]
+            )
+            results.append(self._tag_record(resume_data, file_hash, text, texts))
+        return results
+
+    @staticmethod
+    def _keep_extracted(filename, file_hash, text, contact_info, call_pool):
+        """_map_members handler that keeps extracted resumes for a later batch step"""
+        return filename, file_hash, text, contact_info
+
+    def _calls_per_resume(self, text, contact_info=None):
+        """Number of API requests process_resume_text would make for a resume"""
+        if self.scoring_mode == SCORING_MODE_KEYWORD:
+            return 0
+        if self.scoring_mode == SCORING_MODE_SINGLE_CALL:
+            return 1
+        return 1 if has_contact_details(self._contact_details(text, contact_info)) else 2
+
+    @staticmethod
+    def _contact_details(text, contact_info=None):
+        """Contact details from a stored resume if given, otherwise the local regex pass"""
+        if contact_info:
+            return {key: contact_info.get(key) or NOT_FOUND for key in ('name', 'email', 'phone')}
+        return extract_contact_info(text)
+
+    def _map_members(self, zip_ref, members, handle):
+        """
+        Extract the resumes of a ZipFile and pass each text to ``handle``
+
+        ``handle(filename, file_hash, text, contact_info, call_pool)`` runs in
+        the resume thread pool (or inline when serial); see
+        process_zip_members for the pipeline. Exact duplicates of an earlier
+        member, and members the checkpoint holds, are not passed to ``handle``.
+
+        Returns:
+            tuple: (handle results in member order, {index: duplicate file names},
+                {index: record restored from the checkpoint})
+        """
+        first_seen = {}
+        duplicates = {}
+        restored = {}
+
+        def handle_extracted(filename, file_hash, text, contact_info, call_pool):
+            self._count_progress(**{'extracted' if text else 'failed': 1})
+            self._count_extracted(text)
+            return handle(filename, file_hash, text, contact_info, call_pool)
+
+        def is_duplicate(index, filename, file_hash):
+            if file_hash not in first_seen:
+                first_seen[file_hash] = index
+                return False
+            original = first_seen[file_hash]
+            duplicates.setdefault(original, []).append(filename)
+            self.dedup['duplicate_files'] += 1
+            self._count_progress(skipped=1)
+            print(f"[!] {filename} has the same content as {os.path.basename(members[original].filename)}; "
+                  f"scoring it once")
+            return True
+
+        if self.max_workers == 1 and self.extract_workers == 1:
+            results = []
+            for index, member in enumerate(members):
+                data = self._read_member(zip_ref, member)
+                filename = os.path.basename(member.filename)
+                file_hash = sha256_bytes(data) if data is not None else None
+                if data is None:
+                    self._count_progress(failed=1)
+                    results.append(None)
+                    continue
+                if is_duplicate(index, filename, file_hash):
+                    results.append(None)
+                    continue
+                restored[index] = self._restore(file_hash, filename)
+                if restored[index]:
+                    results.append(None)
+                    continue
+                known = self._lookup_resume(file_hash)
+                if known:
+                    text = known['text']
+                else:
+                    text = self.extract_text_from_bytes(data, filename, file_hash)
+                results.append(handle_extracted(filename, file_hash, text, known, None))
+            return results, duplicates, restored
+
+        window = threading.BoundedSemaphore(max(self.max_workers, self.extract_workers) * 2)
+        pending_extractions = {}
+        handle_futures = [None] * len(members)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as call_pool, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as resume_pool, \
+                (ProcessPoolExecutor(max_workers=self.extract_workers)
+                 if self.extract_workers > 1 else nullcontext()) as extract_pool:
+
+            def handle_in_window(filename, file_hash, data, text, contact_info=None):
+                try:
+                    if text is None:
+                        text = self.extract_text_from_bytes(data, filename, file_hash)
+                    return handle_extracted(filename, file_hash, text, contact_info, call_pool)
+                finally:
+                    window.release()
+
+            def hand_off(done_extractions):
+                for future in done_extractions:
+                    index, filename, file_hash = pending_extractions.pop(future)
+                    text = self._extraction_result(future, filename, file_hash)
+                    handle_futures[index] = resume_pool.submit(handle_in_window, filename, file_hash, None, text)
+
+            def acquire_window():
+                # Finished extractions hold window slots until they are handed
+                # to the scoring pool, so keep handing off while waiting
+                while not window.acquire(blocking=False):
+                    if not pending_extractions:
+                        window.acquire()
+                        return
+                    done, _ = wait(pending_extractions, timeout=0.1, return_when=FIRST_COMPLETED)
+                    hand_off(done)
+
+            for index, member in enumerate(members):
+                acquire_window()
+                filename = os.path.basename(member.filename)
+                data = self._read_member(zip_ref, member)
+                if data is None:
+                    self._count_progress(failed=1)
+                    window.release()
+                    continue
+
+                file_hash = sha256_bytes(data)
+                if is_duplicate(index, filename, file_hash):
+                    window.release()
+                    continue
+                restored[index] = self._restore(file_hash, filename)
+                if restored[index]:
+                    window.release()
+                    continue
+
+                known = self._lookup_resume(file_hash)
+                if known:
+                    handle_futures[index] = resume_pool.submit(
+                        handle_in_window, filename, file_hash, None, known['text'], known
+                    )
+                    continue
+
+                if self.extract_workers == 1:
+                    handle_futures[index] = resume_pool.submit(handle_in_window, filename, file_hash, data, None)
+                    continue
+
+                cached_text = self.extraction_cache.get(file_hash)
+                if cached_text is not None:
+                    handle_futures[index] = resume_pool.submit(
+                        handle_in_window, filename, file_hash, None, cached_text
+                    )
+                else:
+                    future = extract_pool.submit(
+                        extractors.extract_in_worker, data, filename, self.extract_timeout
+                    )
+                    pending_extractions[future] = (index, filename, file_hash)
+
+            while pending_extractions:
+                done, _ = wait(pending_extractions, return_when=FIRST_COMPLETED)
+                hand_off(done)
+
+            return [future.result() if future else None for future in handle_futures], duplicates, restored
+
+    def _restore(self, file_hash, filename):
+        """Return the checkpointed record of a resume finished in an earlier run, or None"""
+        if self.checkpoint is None:
+            return None
+        record = self.checkpoint.get(file_hash)
+        if record:
+            self.restored += 1
+            self._count_progress(extracted=1, scored=1)
+            print(f"[i] {filename} was scored in an earlier run; reusing its result")
+        return record
+
+    def _lookup_resume(self, file_hash):
+        """Return the stored text and contact details of a known resume, or None"""
+        if self.resume_lookup is None:
+            return None
+        try:
+            known = self.resume_lookup(file_hash)
         except Exception as e:
-            print(f"[!] {filename} → Error processing: {e}")
+            print(f"[!] Resume lookup failed: {e}")
+            return None
+        if not known or not known.get('text'):
             return None
+        self.dedup['known_resumes'] += 1
+        return known
+
+    @staticmethod
+    def _attach_duplicates(results, duplicates, restored=None):
+        """Fill in restored records and list skipped duplicates in the record of the copy that was scored"""
+        for index, record in (restored or {}).items():
+            if record:
+                results[index] = record
+        for index, filenames in duplicates.items():
+            if results[index]:
+                results[index]['Duplicate Files'] = filenames
+        return results
+
+    def _tag_record(self, resume_data, file_hash, text, texts=None):
+        """Tag a scored resume record with the hash of its file, keep its text and checkpoint it"""
+        if resume_data:
+            resume_data['File Hash'] = file_hash
+            resume_data['Duplicate Files'] = []
+            if texts is not None:
+                texts[file_hash] = text
+            if self.checkpoint is not None:
+                try:
+                    self.checkpoint.add(file_hash, resume_data, text)
+                except Exception as e:
+                    # The result is still returned; only resuming it is lost
+                    print(f"[!] Could not checkpoint {resume_data.get('File Name')}: {e}")
+        if text:
+            # Resumes without text were counted as failed when they were extracted
+            self._count_progress(**{'scored' if resume_data else 'failed': 1})
+        return resume_data
+
+    def _extraction_result(self, future, filename, file_hash):
+        """Collect text from a finished extraction worker and cache it"""
+        try:
+            outcome = future.result()
+        except Exception as e:
+            # The worker process itself died (e.g. crashed in a native library)
+            print(f"[ERROR] Failed to extract {filename}: {e}")
+            return ""
+        return self._worker_text(outcome, filename, file_hash)
 
-    def process_zip_file(self, zip_file_path, job_description):
+    def _worker_text(self, outcome, filename, file_hash):
+        """Text from the (text, timings, error) outcome of extractors.extract_in_worker, cached"""
+        text, worker_timings, error = outcome
+        extractors.timings.merge(worker_timings)
+        if error:
+            print(f"[ERROR] Failed to extract {filename}: {error}")
+            return ""
+        if text:
+            self.extraction_cache.set(file_hash, text)
+        return text
+
+    def process_zip_file(self, zip_file_path, job_description, optimized_criteria=None):
         """
         Process a zip file containing resumes and return ranked results
 
         Args:
             zip_file_path: Path to the zip file containing resumes
             job_description: Job description text
+            optimized_criteria: Criteria JSON from an earlier
+                create_optimized_prompt call for the same job description;
+                generated when not given
 
         Returns:
-            dict: Contains 'success', 'results', 'criteria', and optional 'error'
+            dict: Contains 'success', 'results', 'criteria', 'optimized_criteria',
+                'texts' (extracted text by file hash) and optional 'error'
         """
-        # Create temporary directory for extraction
-        temp_dir = tempfile.mkdtemp()
-
         try:
-            # Extract zip file
             with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-
-            # Find all resume files
-            resume_files = []
-            for root, dirs, files in os.walk(temp_dir):
-                for file in files:
-                    if file.lower().endswith(('.pdf', '.docx', '.txt', '.doc')):
-                        resume_files.append(os.path.join(root, file))
-
-            if not resume_files:
-                return {
-                    'success': False,
-                    'error': 'No resume files found in the zip file. Please upload PDF, DOCX, or TXT files.'
-                }
-
-            # Create optimized criteria from job description
-            print("Creating optimized ranking criteria from job description...")
-            optimized_criteria = self.create_optimized_prompt(job_description)
-            if not optimized_criteria:
-                return {
-                    'success': False,
-                    'error': 'Failed to create optimized criteria from job description.'
-                }
-
-            # Process all resumes
-            all_resume_data = []
-            for resume_path in resume_files:
-                filename = os.path.basename(resume_path)
-                resume_data = self.process_resume(resume_path, filename, optimized_criteria)
-                if resume_data:
-                    all_resume_data.append(resume_data)
-
-            if not all_resume_data:
-                return {
-                    'success': False,
-                    'error': 'No resumes could be processed successfully.'
-                }
-
-            # Create DataFrame and sort by total score
-            df = pd.DataFrame(all_resume_data)
-            df = df.sort_values('Total Score', ascending=False)
-            df.insert(0, 'Rank', range(1, len(df) + 1))
-
-            # Parse criteria for display
-            criteria_info = {}
-            try:
-                criteria_data = json.loads(optimized_criteria)
-                criteria_info = {
-                    'total_max_score': criteria_data.get('total_max_score', 100),
-                    'required_skills': [skill['skill'] for skill in criteria_data.get('required_skills', [])],
-                    'bonus_skills': [skill['skill'] for skill in criteria_data.get('bonus_skills', [])]
-                }
-            except:
-                pass
-
-            return {
-                'success': True,
-                'results': df.to_dict('records'),
-                'total_processed': len(all_resume_data),
-                'total_files': len(resume_files),
-                'criteria': criteria_info
-            }
-
+                return self._process_zip(zip_ref, job_description, optimized_criteria)
         except zipfile.BadZipFile:
             return {
                 'success': False,
@@ -307,9 +1062,117 @@ Resume:
                 'success': False,
                 'error': f'Error processing resumes: {str(e)}'
             }
-        finally:
-            # Clean up temporary directory
-            try:
-                shutil.rmtree(temp_dir)
-            except:
-                pass
+
+    def _process_zip(self, zip_ref, job_description, optimized_criteria):
+        """Rank the resumes of an open ZipFile (see process_zip_file)"""
+        resume_members = self.list_resume_members(zip_ref)
+
+        if not resume_members:
+            return {
+                'success': False,
+                'error': NO_RESUMES_ERROR
+            }
+
+        # Create optimized criteria from job description
+        self.job_description = job_description
+        local_criteria = False
+        if not optimized_criteria:
+            print("Creating optimized ranking criteria from job description...")
+            optimized_criteria = self.create_optimized_prompt(job_description)
+        if not optimized_criteria:
+            optimized_criteria = self._local_criteria(job_description)
+            local_criteria = True
+        if not optimized_criteria:
+            return {
+                'success': False,
+                'error': NO_CRITERIA_ERROR
+            }
+
+        # Process all resumes
+        before = self._start_run(resume_members)
+        texts = {}
+        results = self.process_zip_members(zip_ref, resume_members, optimized_criteria, texts)
+        return self._run_result(results, resume_members, optimized_criteria, local_criteria, texts, before)
+
+    def _local_criteria(self, job_description):
+        """Criteria built from the skills a job description names, in keyword mode or with keyword_fallback"""
+        if self.scoring_mode != SCORING_MODE_KEYWORD and not self.keyword_fallback:
+            return None
+        print("[!] Building keyword criteria from the skills named in the job description")
+        return keyword_scorer.criteria_from_job_description(job_description)
+
+    def _start_run(self, resume_members):
+        """Reset the progress counts for a new upload; returns the stats to report the run against"""
+        with self._progress_lock:
+            self.progress = dict.fromkeys(PROGRESS_KEYS, 0)
+        self._count_progress(total=len(resume_members))
+        return {
+            'llm_cache': self.response_cache.stats(),
+            'usage': dict(self.usage),
+            'dedup': dict(self.dedup),
+            'prefilter': dict(self.prefilter_stats),
+            'keyword_fallbacks': self.keyword_fallbacks,
+            'batching': dict(self.batch_stats),
+            'compaction': dict(self.compaction_stats),
+            'retries': dict(self.llm_client.stats),
+            'restored': self.restored,
+        }
+
+    def _run_result(self, results, resume_members, optimized_criteria, local_criteria, texts, before):
+        """Rank the records of a run and build the result of process_zip_file"""
+        all_resume_data = [resume_data for resume_data in results if resume_data]
+
+        if not all_resume_data:
+            return {
+                'success': False,
+                'error': 'No resumes could be processed successfully.'
+            }
+
+        # Create DataFrame and sort by total score
+        df = pd.DataFrame(all_resume_data)
+        df = df.sort_values('Total Score', ascending=False, kind='stable')
+        df.insert(0, 'Rank', range(1, len(df) + 1))
+
+        # Parse criteria for display
+        criteria_info = {}
+        try:
+            criteria_data = json.loads(optimized_criteria)
+            criteria_info = {
+                'total_max_score': criteria_data.get('total_max_score', 100),
+                'required_skills': [skill['skill'] for skill in criteria_data.get('required_skills', [])],
+                'bonus_skills': [skill['skill'] for skill in criteria_data.get('bonus_skills', [])]
+            }
+        except:
+            pass
+
+        cache_after = self.response_cache.stats()
+
+        def since_start(key, current):
+            return {name: current[name] - before[key][name] for name in current}
+
+        return {
+            'success': True,
+            'results': df.to_dict('records'),
+            'total_processed': len(all_resume_data),
+            'total_files': len(resume_members),
+            'criteria': criteria_info,
+            'optimized_criteria': optimized_criteria,
+            # True when the criteria were built locally rather than by the LLM
+            'local_criteria': local_criteria,
+            'texts': texts,
+            'llm_cache': {
+                'hits': cache_after['hits'] - before['llm_cache']['hits'],
+                'misses': cache_after['misses'] - before['llm_cache']['misses'],
+            },
+            'usage': since_start('usage', self.usage),
+            'dedup': since_start('dedup', self.dedup),
+            'prefilter': since_start('prefilter', self.prefilter_stats),
+            'keyword_fallbacks': self.keyword_fallbacks - before['keyword_fallbacks'],
+            'batching': since_start('batching', self.batch_stats),
+            'compaction': since_start('compaction', self.compaction_stats),
+            'retries': since_start('retries', self.llm_client.stats),
+            # Resumes finished in an earlier run and taken from the checkpoint
+            'restored': self.restored - before['restored'],
+            'progress': dict(self.progress),
+            'extraction_timings': extractors.get_extraction_timings()
+        }
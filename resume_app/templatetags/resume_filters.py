@@ -9,3 +9,12 @@ def get_item(dictionary, key):
     if dictionary and key:
         return dictionary.get(key, '')
     return ''
+
+
+@register.simple_tag(takes_context=True)
+def query_string(context, **kwargs):
+    """Return the current query string with the given parameters replaced"""
+    params = context['request'].GET.copy()
+    for key, value in kwargs.items():
+        params[key] = value
+    return params.urlencode()
@@ -1,3 +1,1351 @@
-from django.test import TestCase
+import asyncio
+import csv
+import importlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import openai
+import openpyxl
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import batching, caches, extractors, jobs, keyword_scorer, llm_client, reports, services, text_compaction
+from .async_service import AsyncResumeProcessingService
+from .checkpoints import JsonlCheckpoint
+from .contact_extractor import NOT_FOUND, extract_contact_info, find_name, find_phone, has_contact_details
+from .models import CandidateResult, CandidateSkillScore, Resume, ResumeUploadSession
+from .search import search_candidates
+from .services import ResumeProcessingService
+
+CRITERIA = {
+    "required_skills": [
+        {"skill": "Python", "max_points": 40, "description": "Python development"},
+        {"skill": "Django", "max_points": 30, "description": "Django web apps"},
+    ],
+    "bonus_skills": [
+        {"skill": "Kubernetes", "max_points": 30, "description": "Container orchestration"},
+    ],
+    "scoring_guidelines": {},
+    "total_max_score": 100,
+    "evaluation_prompt": "Evaluate the resume against the job description.",
+}
+
+
+def fake_score(text):
+    """Deterministic score for a resume prompt: 3 points per year worked"""
+    match = re.search(r'Worked (\d+) years', text)
+    return min(100, int(match.group(1)) * 3) if match else 0
+
+
+def fake_response(content):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=120),
+    )
+
+
+class FakeCompletions:
+    """Chat completions answering the prompts of ResumeProcessingService"""
+
+    def __init__(self):
+        self.prompts = []
+        self.lock = threading.Lock()
+        # Answer to the criteria prompt
+        self.criteria = json.dumps(CRITERIA)
+
+    def create(self, model, messages, temperature=0, **kwargs):
+        prompt = messages[-1]['content']
+        with self.lock:
+            self.prompts.append(prompt)
+        if 'scoring system' in prompt:
+            return fake_response(self.criteria)
+        if '=== Resume R' in prompt:
+            parts = re.split(r'=== Resume (R\d+) ===', prompt)[1:]
+            results = [
+                {"id": resume_id, "name": "Batch", "email": "Not Found", "phone": "Not Found",
+                 "total_score": fake_score(text), "skill_scores": {"Python": fake_score(text) // 3},
+                 "summary": "Batched"}
+                for resume_id, text in zip(parts[::2], parts[1::2])
+            ]
+            return fake_response(json.dumps({"results": results}))
+        if 'total_score' in prompt:
+            return fake_response(json.dumps({
+                "name": "Scored", "email": "Not Found", "phone": "Not Found",
+                "total_score": fake_score(prompt), "skill_scores": {"Python": fake_score(prompt) // 3},
+                "summary": "Scored",
+            }))
+        return fake_response(json.dumps({"name": "Extracted", "email": "Not Found", "phone": "Not Found"}))
+
+    def count(self, marker):
+        """Number of prompts sent that contain marker"""
+        with self.lock:
+            return sum(marker in prompt for prompt in self.prompts)
+
+
+class FakeOpenAI:
+    """Stand-in for openai.OpenAI; every instance shares the class's completions"""
+
+    completions = None
+
+    def __init__(self, **kwargs):
+        self.chat = SimpleNamespace(completions=type(self).completions)
+
+
+def candidate_name(index):
+    """Candidate name without digits (12 gives Alex Bc)"""
+    return 'Alex ' + ''.join(chr(ord('a') + int(digit)) for digit in str(index)).capitalize()
+
+
+def resume_text(index, years=None):
+    return (
+        f"{candidate_name(index)}\ncandidate{index}@example.com\n+1 (555) 010-{index:04d}\n\n"
+        f"Skills\nPython Django{' Kubernetes' if index % 3 == 0 else ''}\n\n"
+        f"Experience\nWorked {index if years is None else years} years.\n"
+    )
+
+
+def make_zip(resumes):
+    """Zip file bytes holding {file name: text} under resumes/"""
+    path = tempfile.mktemp(suffix='.zip')
+    try:
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name, text in resumes.items():
+                archive.writestr(f'resumes/{name}', text)
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+class FakeOpenAIMixin:
+    """Media files, caches and OpenAI client of a test kept apart from the real ones"""
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        media = override_settings(MEDIA_ROOT=os.path.join(self.tmp, 'media'))
+        media.enable()
+        self.addCleanup(media.disable)
+
+        environ = mock.patch.dict(os.environ, {
+            'OPENAI_API_KEY': 'test-key',
+            'EXTRACTION_CACHE_PATH': os.path.join(self.tmp, 'extraction.sqlite3'),
+            'LLM_CACHE_PATH': os.path.join(self.tmp, 'llm.sqlite3'),
+            'MAX_WORKERS': '1',
+            'EXTRACT_WORKERS': '1',
+        })
+        environ.start()
+        self.addCleanup(environ.stop)
+
+        self.completions = FakeCompletions()
+        client = mock.patch.object(FakeOpenAI, 'completions', self.completions)
+        client.start()
+        self.addCleanup(client.stop)
+        service_client = mock.patch.object(ResumeProcessingService, 'openai_client_class', FakeOpenAI)
+        service_client.start()
+        self.addCleanup(service_client.stop)
+
+    def create_session(self, resumes, job_description='Python developer', **fields):
+        session = ResumeUploadSession(job_description=job_description, **fields)
+        session.zip_file.save('resumes.zip', ContentFile(make_zip(resumes)), save=False)
+        jobs.enqueue_session(session)
+        return session
+
+
+class ConcurrencyTests(FakeOpenAIMixin, TestCase):
+    def process(self, resumes, **options):
+        path = os.path.join(self.tmp, 'resumes.zip')
+        with open(path, 'wb') as f:
+            f.write(make_zip(resumes))
+        service = ResumeProcessingService('test-key', **options)
+        return service.process_zip_file(path, 'Python developer')
+
+    def test_concurrent_results_match_serial_order(self):
+        # Scores tie in threes, and the first resumes are answered last
+        resumes = {f'candidate_{index:02d}.txt': resume_text(index, years=index % 3) for index in range(12)}
+        create = self.completions.create
+
+        def first_resumes_slowest(model, messages, **kwargs):
+            match = re.search(r'candidate(\d+)@', messages[-1]['content'])
+            if match:
+                time.sleep((12 - int(match.group(1))) * 0.005)
+            return create(model, messages, **kwargs)
+
+        with mock.patch.object(self.completions, 'create', first_resumes_slowest):
+            concurrent = self.process(resumes, max_workers=4)
+        serial = self.process(resumes, max_workers=1)
+
+        self.assertTrue(concurrent['success'])
+        self.assertEqual(concurrent['results'], serial['results'])
+        # Ties keep the file order
+        self.assertEqual(
+            [record['File Name'] for record in concurrent['results'][:4]],
+            ['candidate_02.txt', 'candidate_05.txt', 'candidate_08.txt', 'candidate_11.txt'],
+        )
+
+    def test_requests_in_flight_are_bounded(self):
+        resumes = {f'candidate_{index:02d}.txt': resume_text(index) for index in range(8)}
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+        create = self.completions.create
+
+        def counted(model, messages, **kwargs):
+            with lock:
+                in_flight.append(None)
+                peak.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.pop()
+            return create(model, messages, **kwargs)
+
+        with mock.patch.object(self.completions, 'create', counted):
+            result = self.process(resumes, max_workers=8, max_in_flight=3)
+
+        self.assertEqual(len(result['results']), 8)
+        self.assertEqual(max(peak), 3)
+
+
+class SessionQueueTests(TransactionTestCase):
+    def enqueue(self, count):
+        sessions = []
+        for _ in range(count):
+            session = ResumeUploadSession(job_description='Python developer')
+            jobs.enqueue_session(session)
+            sessions.append(session)
+        return sessions
+
+    def test_claims_oldest_pending_session_once(self):
+        first, second = self.enqueue(2)
+
+        claimed = jobs.claim_next_session('worker-a')
+        self.assertEqual(claimed.id, first.id)
+        self.assertEqual(claimed.status, ResumeUploadSession.STATUS_RUNNING)
+        self.assertEqual(claimed.worker_id, 'worker-a')
+        self.assertIsNotNone(claimed.started_at)
+        self.assertEqual(jobs.claim_next_session('worker-b').id, second.id)
+        self.assertIsNone(jobs.claim_next_session('worker-a'))
+
+    def test_concurrent_workers_never_claim_the_same_session(self):
+        sessions = self.enqueue(20)
+        claims = {}
+        lock = threading.Lock()
+
+        def work(worker_id):
+            try:
+                while True:
+                    session = jobs.claim_next_session(worker_id)
+                    if session is None:
+                        return
+                    with lock:
+                        claims.setdefault(session.id, []).append(worker_id)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=work, args=(f'worker-{number}',)) for number in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(sorted(claims), sorted(session.id for session in sessions))
+        self.assertTrue(all(len(worker_ids) == 1 for worker_ids in claims.values()))
+        for session_id, (worker_id,) in claims.items():
+            self.assertEqual(ResumeUploadSession.objects.get(id=session_id).worker_id, worker_id)
+
+    def test_requeues_sessions_whose_worker_stopped_reporting(self):
+        stale, reporting, fresh = self.enqueue(3)
+        for _ in range(3):
+            jobs.claim_next_session('worker-a')
+        long_ago = timezone.now() - timedelta(minutes=jobs.STALE_SESSION_MINUTES + 1)
+        ResumeUploadSession.objects.filter(id=stale.id).update(started_at=long_ago, heartbeat_at=long_ago)
+        # Claimed long ago, but it stored a resume recently
+        ResumeUploadSession.objects.filter(id=reporting.id).update(started_at=long_ago, heartbeat_at=timezone.now())
+
+        self.assertEqual(jobs.requeue_stale_sessions(), 1)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, ResumeUploadSession.STATUS_PENDING)
+        self.assertEqual(stale.worker_id, '')
+        for session in (reporting, fresh):
+            session.refresh_from_db()
+            self.assertEqual(session.status, ResumeUploadSession.STATUS_RUNNING)
+
+        self.assertEqual(jobs.claim_next_session('worker-b').id, stale.id)
+
+    def test_admin_requeues_failed_and_stale_sessions_only(self):
+        running, stale, failed, completed, pending = self.enqueue(5)
+        for _ in range(4):
+            jobs.claim_next_session('worker-a')
+        long_ago = timezone.now() - timedelta(minutes=jobs.STALE_SESSION_MINUTES + 1)
+        ResumeUploadSession.objects.filter(id=stale.id).update(started_at=long_ago, heartbeat_at=long_ago)
+        ResumeUploadSession.objects.filter(id=failed.id).update(status=ResumeUploadSession.STATUS_FAILED)
+        ResumeUploadSession.objects.filter(id=completed.id).update(status=ResumeUploadSession.STATUS_COMPLETED)
+
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.post(reverse('admin:resume_app_resumeuploadsession_changelist'), {
+            'action': 'requeue_sessions',
+            '_selected_action': [session.id for session in (running, stale, failed, completed, pending)],
+        }, follow=True)
+
+        self.assertContains(response, '2 session(s) requeued. 3 pending, running or completed session(s) skipped.')
+        self.assertEqual(dict(ResumeUploadSession.objects.values_list('id', 'status')), {
+            running.id: ResumeUploadSession.STATUS_RUNNING,
+            stale.id: ResumeUploadSession.STATUS_PENDING,
+            failed.id: ResumeUploadSession.STATUS_PENDING,
+            completed.id: ResumeUploadSession.STATUS_COMPLETED,
+            pending.id: ResumeUploadSession.STATUS_PENDING,
+        })
+
+
+class ZipStreamingTests(FakeOpenAIMixin, TestCase):
+    def write_zip(self, resumes):
+        path = os.path.join(self.tmp, 'resumes.zip')
+        with open(path, 'wb') as f:
+            f.write(make_zip(resumes))
+        return path
+
+    def test_lists_resume_members_in_order(self):
+        path = self.write_zip({
+            'b.txt': resume_text(2), 'a.txt': resume_text(1), 'notes.md': 'not a resume',
+            'big.txt': resume_text(3) + 'x' * 200, '._a.txt': 'resource fork',
+        })
+        with zipfile.ZipFile(path, 'a') as archive:
+            archive.writestr('__MACOSX/resumes/a.txt', 'resource fork')
+            archive.writestr('resumes/old/', '')
+
+        service = ResumeProcessingService('test-key')
+        with zipfile.ZipFile(path) as archive, mock.patch.object(services, 'MAX_RESUME_FILE_SIZE', 200):
+            members = service.list_resume_members(archive)
+        self.assertEqual([member.filename for member in members], ['resumes/a.txt', 'resumes/b.txt'])
+
+    def test_members_are_read_from_memory(self):
+        path = self.write_zip({f'candidate_{index}.txt': resume_text(index) for index in range(3)})
+        service = ResumeProcessingService('test-key')
+        with mock.patch.object(zipfile.ZipFile, 'extractall', side_effect=AssertionError('extracted to disk')):
+            result = service.process_zip_file(path, 'Python developer')
+        self.assertTrue(result['success'])
+        self.assertEqual(result['total_processed'], 3)
+
+    def test_members_in_memory_are_bounded(self):
+        path = self.write_zip({f'candidate_{index:02d}.txt': resume_text(index) for index in range(12)})
+        service = ResumeProcessingService('test-key', max_workers=2)
+        held = []
+        peak = []
+        lock = threading.Lock()
+        read_member = service._read_member
+        process_resume_text = service.process_resume_text
+
+        def read(zip_ref, member):
+            with lock:
+                held.append(member)
+                peak.append(len(held))
+            return read_member(zip_ref, member)
+
+        def process(*args, **kwargs):
+            # Slow scoring lets the reader run ahead as far as it may
+            time.sleep(0.01)
+            try:
+                return process_resume_text(*args, **kwargs)
+            finally:
+                with lock:
+                    held.pop()
+
+        with mock.patch.object(service, '_read_member', read), \
+                mock.patch.object(service, 'process_resume_text', process):
+            result = service.process_zip_file(path, 'Python developer')
+
+        self.assertEqual(result['total_processed'], 12)
+        self.assertEqual(max(peak), 4)
+
+
+def make_docx(paragraphs):
+    """DOCX bytes with one paragraph per item; tabs and line breaks become w:tab and w:br"""
+    body = ''.join(
+        '<w:p>' + ''.join(
+            '<w:r><w:tab/></w:r>' if part == '\t' else '<w:r><w:br/></w:r>' if part == '\n'
+            else f'<w:r><w:t>{part}</w:t></w:r>'
+            for part in re.split(r'([\t\n])', paragraph) if part
+        ) + '</w:p>'
+        for paragraph in paragraphs
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as package:
+        package.writestr('word/document.xml', (
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>'
+        ))
+    return buffer.getvalue()
+
+
+class ExtractorTests(SimpleTestCase):
+    def setUp(self):
+        timings = mock.patch.object(extractors, 'timings', extractors.ExtractionTimings())
+        self.timings = timings.start()
+        self.addCleanup(timings.stop)
+
+    def test_txt_falls_back_to_latin1(self):
+        self.assertEqual(extractors.extract_text_from_bytes('Zoë Müller\n'.encode('utf-8'), 'a.txt'), 'Zoë Müller')
+        self.assertEqual(extractors.extract_text_from_bytes('Zoë Müller'.encode('latin-1'), 'b.TXT'), 'Zoë Müller')
+        self.assertEqual(self.timings.raw()['txt']['files'], 2)
+
+    def test_docx_paragraphs_tabs_and_breaks(self):
+        data = make_docx(['Jane Smith', 'Skills\tPython', 'Line one\nLine two'])
+        self.assertEqual(
+            extractors.extract_text_from_bytes(data, 'jane.docx'), 'Jane Smith\nSkills\tPython\nLine one\nLine two'
+        )
+
+    def test_broken_file_falls_back_to_textract(self):
+        with mock.patch.object(extractors, 'extract_with_textract', return_value=' From textract ') as textract:
+            self.assertEqual(extractors.extract_text_from_bytes(b'not a zip', 'broken.docx'), 'From textract')
+        textract.assert_called_once_with(b'not a zip', 'broken.docx')
+        stats = self.timings.raw()
+        self.assertEqual((stats['docx']['files'], stats['docx']['failures']), (1, 1))
+        self.assertEqual((stats['textract.docx']['files'], stats['textract.docx']['failures']), (1, 0))
+
+    def test_pdf_without_library_uses_textract(self):
+        with mock.patch.object(extractors, 'pypdf', None), \
+                mock.patch.object(extractors, 'pdfminer_extract_text', None), \
+                mock.patch.object(extractors, 'extract_with_textract', return_value='From textract'):
+            self.assertEqual(extractors.extract_text_from_bytes(b'%PDF-1.4', 'jane.pdf'), 'From textract')
+        # Not an in-process failure: only the textract run is counted
+        self.assertEqual(list(self.timings.raw()), ['textract.pdf'])
+
+    def test_textract_error_is_raised_when_every_backend_fails(self):
+        with mock.patch.object(extractors, 'extract_with_textract', side_effect=RuntimeError('no tool')), \
+                self.assertRaises(RuntimeError):
+            extractors.extract_text_from_bytes(b'legacy', 'old.doc')
+        self.assertEqual(self.timings.raw()['textract.doc']['failures'], 1)
+
+    def test_timings_snapshot_and_merge(self):
+        timings = extractors.ExtractionTimings()
+        timings.record('txt', 0.002)
+        timings.record('txt', 0.004, failed=True)
+        worker = extractors.ExtractionTimings()
+        worker.record('txt', 0.006)
+        worker.record('pdf', 0.1)
+        timings.merge(worker.raw())
+
+        snapshot = timings.snapshot()
+        self.assertEqual((snapshot['txt']['files'], snapshot['txt']['failures']), (3, 1))
+        self.assertEqual(snapshot['txt']['avg_ms'], 4.0)
+        self.assertEqual(snapshot['pdf']['avg_ms'], 100.0)
+        timings.reset()
+        self.assertEqual(timings.snapshot(), {})
+
+
+class ExtractionPoolTests(FakeOpenAIMixin, TestCase):
+    def process(self, resumes, service):
+        path = os.path.join(self.tmp, 'resumes.zip')
+        with open(path, 'wb') as f:
+            f.write(make_zip(resumes))
+        return service.process_zip_file(path, 'Python developer')
+
+    def test_pool_results_match_serial_order(self):
+        resumes = {f'candidate_{index:02d}.txt': resume_text(index, years=index % 3) for index in range(10)}
+        # A broken DOCX fails in its worker without stopping the others
+        resumes['broken.docx'] = 'not a docx package'
+        pooled = self.process(resumes, ResumeProcessingService('test-key', max_workers=2, extract_workers=2))
+        self.assertEqual(pooled['total_processed'], 10)
+
+        # Texts are cached by the first run, so the second extracts nothing
+        with mock.patch.object(extractors, 'extract_text_from_bytes', side_effect=AssertionError('extracted')):
+            serial = self.process(resumes, ResumeProcessingService('test-key'))
+        self.assertEqual(pooled['results'], serial['results'])
+
+    def test_members_in_flight_are_bounded(self):
+        resumes = {f'candidate_{index:02d}.txt': resume_text(index) for index in range(12)}
+        service = ResumeProcessingService('test-key', max_workers=1, extract_workers=2)
+        held = []
+        peak = []
+        lock = threading.Lock()
+        read_member = service._read_member
+        process_resume_text = service.process_resume_text
+
+        def read(zip_ref, member):
+            with lock:
+                held.append(member)
+                peak.append(len(held))
+            return read_member(zip_ref, member)
+
+        def process(*args, **kwargs):
+            time.sleep(0.01)
+            try:
+                return process_resume_text(*args, **kwargs)
+            finally:
+                with lock:
+                    held.pop()
+
+        with mock.patch.object(service, '_read_member', read), \
+                mock.patch.object(service, 'process_resume_text', process):
+            result = self.process(resumes, service)
+
+        self.assertEqual(result['total_processed'], 12)
+        # Extracted texts wait for the one scoring thread inside the window
+        self.assertEqual(max(peak), 4)
+
+    def test_worker_timeout(self):
+        def slow(data):
+            time.sleep(5)
+
+        with mock.patch.dict(extractors._EXTRACTORS, {'.txt': slow}):
+            text, timings, error = extractors.extract_in_worker(b'text', 'slow.txt', timeout=0.05)
+        self.assertEqual((text, error), ('', 'timed out after 0.05s'))
+        self.assertEqual(timings['txt']['failures'], 1)
+
+
+class CandidateStorageTests(FakeOpenAIMixin, TestCase):
+    def test_session_results_are_stored_as_rows(self):
+        resumes = {f'candidate_{index}.txt': resume_text(index) for index in range(4)}
+        self.create_session(resumes)
+        session = jobs.claim_next_session('test-worker')
+        self.assertTrue(jobs.run_session(session))
+
+        session.refresh_from_db()
+        self.assertIsNone(session.results)
+        self.assertEqual(session.get_results_count(), 4)
+        candidates = list(session.candidates.order_by('rank'))
+        self.assertEqual([candidate.file_name for candidate in candidates],
+                         ['candidate_3.txt', 'candidate_2.txt', 'candidate_1.txt', 'candidate_0.txt'])
+        self.assertEqual([candidate.total_score for candidate in candidates], [9, 6, 3, 0])
+        self.assertTrue(all(len(candidate.file_hash) == 64 for candidate in candidates))
+        self.assertEqual(candidates[0].skill_scores.get().score, 3)
+
+    def test_bulk_insert_query_count_does_not_grow(self):
+        def save(count):
+            session = ResumeUploadSession.objects.create(job_description='Python developer')
+            records = [
+                {'File Name': f'{index}.txt', 'Total Score': 50, 'Python Score': 10, 'Go Score': float('nan')}
+                for index in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                jobs.save_candidate_results(session, records)
+            return session, len(queries)
+
+        _, few = save(2)
+        session, many = save(50)
+        self.assertEqual(many, few)
+        # NaN scores are left out
+        self.assertEqual(CandidateResult.objects.filter(session=session).count(), 50)
+        self.assertEqual(CandidateSkillScore.objects.filter(candidate__session=session).count(), 50)
+
+        # Saving again replaces the earlier rows
+        jobs.save_candidate_results(session, [{'File Name': 'a.txt', 'Total Score': 10}])
+        self.assertEqual(list(session.candidates.values_list('file_name', flat=True)), ['a.txt'])
+
+
+class SessionListTests(TestCase):
+    def create_sessions(self, count):
+        ResumeUploadSession.objects.bulk_create([
+            ResumeUploadSession(
+                job_description='Python developer ' * 100, status=ResumeUploadSession.STATUS_COMPLETED,
+                processed=True, results_count=3, criteria={'required_skills': ['Python'] * 100},
+            )
+            for _ in range(count)
+        ])
+
+    def get_list(self, page=1):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('session_list'), {'page': page})
+        return response, len(queries)
+
+    def test_results_count_is_kept_up_to_date(self):
+        session = ResumeUploadSession.objects.create(job_description='Python developer')
+        jobs.save_candidate_results(session, [{'File Name': f'{index}.txt', 'Total Score': index} for index in range(3)])
+        self.assertEqual(session.results_count, 3)
+        session.refresh_from_db()
+        self.assertEqual(session.get_results_count(), 3)
+
+    def test_history_is_paginated_without_blobs(self):
+        self.create_sessions(30)
+        response, first_queries = self.get_list()
+        sessions = list(response.context['sessions'])
+        self.assertEqual(len(sessions), 25)
+        self.assertTrue({'job_description', 'results', 'criteria'} <= sessions[0].get_deferred_fields())
+        self.assertEqual(len(self.get_list(page=2)[0].context['sessions']), 5)
+
+        # More sessions add no queries
+        self.create_sessions(300)
+        self.assertEqual(self.get_list()[1], first_queries)
+
+
+class DeduplicationTests(FakeOpenAIMixin, TransactionTestCase):
+    def run_new_session(self, resumes):
+        self.create_session(resumes)
+        session = jobs.claim_next_session('test-worker')
+        self.assertTrue(jobs.run_session(session))
+        session.refresh_from_db()
+        return session
+
+    def test_duplicate_files_in_an_upload_are_scored_once(self):
+        session = self.run_new_session({
+            'alex.txt': resume_text(1), 'alex_copy.txt': resume_text(1), 'bea.txt': resume_text(2),
+        })
+        self.assertEqual(self.completions.count('total_score'), 2)
+        self.assertEqual(session.resumes_skipped, 1)
+        candidate = session.candidates.get(file_name='alex.txt')
+        self.assertEqual(candidate.duplicate_file_names, ['alex_copy.txt'])
+        self.assertEqual(session.candidates.count(), 2)
+
+    def test_known_resume_reuses_stored_text(self):
+        self.run_new_session({'alex.txt': resume_text(1)})
+        resume = Resume.objects.get()
+        # The stored text, not the file, is scored when the resume comes back
+        Resume.objects.filter(id=resume.id).update(text=resume_text(1, years=20))
+
+        session = self.run_new_session({'alex_again.txt': resume_text(1), 'bea.txt': resume_text(2)})
+        candidate = session.candidates.get(file_name='alex_again.txt')
+        self.assertEqual(candidate.total_score, 60)
+        self.assertEqual(candidate.resume_id, resume.id)
+        resume.refresh_from_db()
+        self.assertEqual(resume.seen_count, 2)
+        self.assertEqual(Resume.objects.count(), 2)
+
+    def test_near_duplicate_resume_is_linked(self):
+        self.run_new_session({'alex.txt': resume_text(1)})
+        original = Resume.objects.get()
+        self.run_new_session({'alex_v2.txt': resume_text(1) + 'References available on request.\n'})
+        revised = Resume.objects.exclude(id=original.id).get()
+        self.assertEqual(revised.near_duplicate_of_id, original.id)
+
+
+class PrefilterTests(FakeOpenAIMixin, TransactionTestCase):
+    def test_malformed_criteria_in_batched_mode(self):
+        self.completions.criteria = 'Here are the criteria: Python, Django'
+        resumes = {f'candidate_{index}.txt': resume_text(index) for index in range(4)}
+        self.create_session(resumes, scoring_mode='batched', prefilter_top_k=2)
+        session = jobs.claim_next_session('test-worker')
+        self.assertFalse(jobs.run_session(session))
+        session.refresh_from_db()
+        self.assertEqual(session.status, ResumeUploadSession.STATUS_FAILED)
+        # Every resume fails to score; the prefilter itself does not crash
+        self.assertEqual(session.error_message, 'No resumes could be processed successfully.')
+        self.assertEqual(self.completions.count('=== Resume R'), 0)
+
+    def test_top_k_scores_closest_resumes_only(self):
+        # Only every third resume mentions Kubernetes
+        resumes = {f'candidate_{index}.txt': resume_text(index) for index in range(6)}
+        self.create_session(resumes, job_description='Python Django Kubernetes developer', prefilter_top_k=2)
+        session = jobs.claim_next_session('test-worker')
+        self.assertTrue(jobs.run_session(session))
+
+        session.refresh_from_db()
+        self.assertEqual(self.completions.count('total_score'), 2)
+        self.assertEqual(
+            sorted(session.candidates.values_list('file_name', flat=True)), ['candidate_0.txt', 'candidate_3.txt']
+        )
+        self.assertEqual(session.prefilter_skipped, 4)
+        self.assertEqual(session.llm_calls_saved, 4)
+
+
+class KeywordScorerTests(FakeOpenAIMixin, TransactionTestCase):
+    UNPARSABLE_CRITERIA = 'Here are the criteria: Python, Django'
+
+    def test_criteria_without_skills_are_rejected(self):
+        for criteria in [self.UNPARSABLE_CRITERIA, '[]', '{}', '{"required_skills": []}']:
+            with self.subTest(criteria=criteria), self.assertRaises((ValueError, AttributeError)):
+                keyword_scorer.KeywordScorer(criteria)
+
+    def test_matcher_without_skills_counts_nothing(self):
+        hits = keyword_scorer.SkillMatcher([]).hit_matrix(['Python developer', ''])
+        self.assertEqual(hits.shape, (2, 0))
+
+    def test_unparsable_criteria_fall_back_to_job_description(self):
+        scorer = keyword_scorer.scorer_for(self.UNPARSABLE_CRITERIA, 'Python and Django developer')
+        self.assertEqual(scorer.skills, ['Python', 'Django'])
+        with self.assertRaises(ValueError):
+            keyword_scorer.scorer_for('{}', 'Friendly team player')
+
+    def test_keyword_session_with_unparsable_criteria(self):
+        self.completions.criteria = self.UNPARSABLE_CRITERIA
+        resumes = {f'candidate_{index}.txt': resume_text(index) for index in range(3)}
+        self.create_session(resumes, job_description='Python Django developer', scoring_mode='keyword')
+        session = jobs.claim_next_session('test-worker')
+        self.assertTrue(jobs.run_session(session))
+        session.refresh_from_db()
+        self.assertEqual(session.results_count, 3)
+        self.assertEqual(self.completions.count('total_score'), 0)
+
+    def test_keyword_fallback_with_unparsable_criteria(self):
+        self.completions.criteria = self.UNPARSABLE_CRITERIA
+        resumes = {f'candidate_{index}.txt': resume_text(index) for index in range(3)}
+        self.create_session(resumes, job_description='Python Django developer')
+        session = jobs.claim_next_session('test-worker')
+        with mock.patch.dict(os.environ, {'KEYWORD_FALLBACK': '1'}):
+            self.assertTrue(jobs.run_session(session))
+        session.refresh_from_db()
+        # The LLM cannot rank against the criteria either, so every resume falls back
+        self.assertEqual(session.results_count, 3)
+        self.assertEqual(self.completions.count('total_score'), 0)
+
+    def test_cli_keyword_scoring_with_unparsable_criteria(self):
+        with mock.patch.dict(os.environ, {
+            'INPUT_FOLDER': self.tmp,
+            'OUTPUT_EXCEL': os.path.join(self.tmp, 'ranked.xlsx'),
+            'JD_FILE': os.path.join(self.tmp, 'job_description.txt'),
+            'MODEL': 'test-model',
+        }):
+            resume_ranker = importlib.import_module('resume_ranker')
+        texts = {0: resume_text(0), 1: resume_text(1), 2: ''}
+        files = ['zero.txt', 'one.txt', 'two.txt']
+
+        with mock.patch.object(resume_ranker, 'keyword_job_description', 'Python Django developer'):
+            scored = resume_ranker.keyword_score_texts(texts, files, self.UNPARSABLE_CRITERIA)
+            record = resume_ranker.process_resume_text(texts[1], 'one.txt', self.UNPARSABLE_CRITERIA, 'keyword')
+        self.assertEqual(sorted(scored), [0, 1])
+        self.assertEqual(scored[1], record)
+        self.assertGreater(record['Python Score'], 0)
+
+        with mock.patch.object(resume_ranker, 'keyword_job_description', 'Friendly team player'):
+            self.assertEqual(resume_ranker.keyword_score_texts(texts, files, self.UNPARSABLE_CRITERIA), {})
+
+
+class BatchScorerTests(SimpleTestCase):
+    def answer(self, prompt, texts):
+        self.prompts.append(texts)
+        if len(texts) in self.garbled_sizes:
+            return 'not json'
+        ids = re.findall(r'=== Resume (R\d+) ===', prompt)
+        return json.dumps({"results": [
+            {"id": resume_id, "total_score": fake_score(text)} for resume_id, text in zip(ids, texts)
+            if text not in self.dropped_texts
+        ]})
+
+    def scorer(self, garbled_sizes=(), dropped_texts=()):
+        self.prompts = []
+        self.garbled_sizes = set(garbled_sizes)
+        self.dropped_texts = set(dropped_texts)
+        self.scored_alone = []
+
+        def score_one(index):
+            self.scored_alone.append(index)
+            return None
+
+        return batching.BatchScorer('Score these resumes.', self.answer, score_one, max_batch_size=4)
+
+    def test_pack_batches(self):
+        self.assertEqual(batching.pack_batches([10] * 5, token_budget=100, max_batch_size=2), [[0, 1], [2, 3], [4]])
+        self.assertEqual(batching.pack_batches([30, 80, 30, 30], token_budget=100, overhead=10), [[0], [1], [2, 3]])
+
+    def test_batches_are_scored_together(self):
+        texts = [f'Worked {years} years.' for years in range(6)]
+        scorer = self.scorer()
+        results = scorer.score(texts)
+        self.assertEqual([result['total_score'] for result in results], [fake_score(text) for text in texts])
+        self.assertEqual([len(texts) for texts in self.prompts], [4, 2])
+        self.assertEqual(scorer.stats, {'batches': 2, 'failed': 0, 'splits': 0, 'single_retries': 0})
+
+    def test_unparsable_answer_splits_batch(self):
+        texts = [f'Worked {years} years.' for years in range(4)]
+        scorer = self.scorer(garbled_sizes={4})
+        results = scorer.score(texts)
+        # The batch of four fails and is split in two; each pair is answered
+        self.assertEqual([len(texts) for texts in self.prompts], [4, 2, 2])
+        self.assertTrue(all(results))
+        self.assertEqual(scorer.stats['splits'], 1)
+
+    def test_missing_entries_are_retried_then_scored_alone(self):
+        texts = [f'Worked {years} years.' for years in range(3)]
+        # The second resume is left out of every answer: retried in a batch
+        # of its own, then handed to score_one
+        scorer = self.scorer(dropped_texts={texts[1]})
+        results = scorer.score(texts)
+        self.assertEqual([len(texts) for texts in self.prompts], [3, 1])
+        self.assertEqual(self.scored_alone, [1])
+        self.assertIsNone(results[1])
+        self.assertEqual(scorer.stats['single_retries'], 1)
+
+
+class BatchedSessionTests(FakeOpenAIMixin, TransactionTestCase):
+    def test_session_scores_resumes_in_batches(self):
+        resumes = {f'candidate_{index:03d}.txt': resume_text(index) for index in range(5)}
+        self.create_session(resumes, scoring_mode='batched')
+        session = jobs.claim_next_session('test-worker')
+        with mock.patch.dict(os.environ, {'BATCH_SIZE': '3'}):
+            self.assertTrue(jobs.run_session(session))
+
+        # The criteria and two batched requests, nothing scored alone
+        self.assertEqual(len(self.completions.prompts), 3)
+        self.assertEqual(self.completions.count('=== Resume R1 ==='), 2)
+        scores = dict(CandidateResult.objects.filter(session=session).values_list('file_name', 'total_score'))
+        self.assertEqual(scores, {name: fake_score(text) for name, text in resumes.items()})
+
+
+def api_error(error_class, status_code, headers=None, body=None):
+    """An openai API error for a response with this status code and headers"""
+    response = SimpleNamespace(status_code=status_code, headers=headers or {}, request=None)
+    return error_class('API error', response=response, body=body)
+
+
+class FakeClock:
+    """Time that only moves when the code under test sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FailingCompletions:
+    """Chat completions raising the given errors before answering"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return fake_response('{}')
+
+
+class LLMClientTests(SimpleTestCase):
+    def make_client(self, *errors, **options):
+        self.clock = FakeClock()
+        self.completions = FailingCompletions(*errors)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=self.completions))
+        return llm_client.LLMClient(client, 'test-model', clock=self.clock, sleep=self.clock.sleep, **options)
+
+    def test_rate_limits_are_retried_with_backoff(self):
+        rate_limit = api_error(openai.RateLimitError, 429)
+        client = self.make_client(rate_limit, rate_limit, max_concurrency=4)
+        # Full jitter at its upper bound
+        with mock.patch.object(llm_client.random, 'uniform', lambda low, high: high):
+            client.complete('Score this resume')
+
+        self.assertEqual(self.completions.calls, 3)
+        self.assertEqual(self.clock.sleeps, [llm_client.BACKOFF_BASE, llm_client.BACKOFF_BASE * 2])
+        self.assertEqual(client.stats, {'retries': 2, 'rate_limited': 2, 'timeouts': 0, 'failures': 0})
+        # Each 429 halved the limit (4, 2, 1), and the success raised it by one
+        self.assertEqual(client.concurrency.limit, 2)
+
+    def test_retry_after_header_sets_the_wait(self):
+        client = self.make_client(
+            api_error(openai.RateLimitError, 429, headers={'retry-after': '7'}),
+            api_error(openai.InternalServerError, 503, headers={'retry-after': '600'}),
+        )
+        client.complete('Score this resume')
+        self.assertEqual(self.clock.sleeps, [7.0, llm_client.BACKOFF_MAX])
+
+    def test_timeouts_are_raised_once_retries_are_used_up(self):
+        timeout = openai.APITimeoutError(request=None)
+        client = self.make_client(timeout, timeout, timeout, max_retries=2)
+        with mock.patch.object(llm_client.random, 'uniform', lambda low, high: 0.5), \
+                self.assertRaises(openai.APITimeoutError):
+            client.complete('Score this resume')
+        self.assertEqual(self.completions.calls, 3)
+        self.assertEqual(self.clock.sleeps, [0.5, 0.5])
+        self.assertEqual(client.stats, {'retries': 2, 'rate_limited': 0, 'timeouts': 2, 'failures': 1})
+
+    def test_errors_not_worth_retrying_are_raised_at_once(self):
+        for error in [
+            api_error(openai.BadRequestError, 400),
+            api_error(openai.RateLimitError, 429, body={'code': 'insufficient_quota'}),
+        ]:
+            client = self.make_client(error, tokens_per_minute=6000)
+            with self.subTest(error=type(error).__name__), self.assertRaises(type(error)):
+                client.complete('Score this resume')
+            self.assertEqual(self.completions.calls, 1)
+            self.assertEqual(self.clock.sleeps, [])
+            # A failed request uses no tokens
+            self.assertEqual(client.tokens.level, 6000)
+
+    def test_token_bucket_waits_for_refill(self):
+        clock = FakeClock()
+        bucket = llm_client.TokenBucket(60, clock=clock)
+        self.assertEqual(bucket.reserve(60), 0)
+        self.assertEqual(bucket.reserve(30), 30)
+        clock.now += 10
+        self.assertEqual(bucket.reserve(1), 21)
+        bucket.refund(21)
+        self.assertEqual(bucket.reserve(0), 0)
+
+    def test_requests_wait_for_the_rate_limit(self):
+        client = self.make_client(requests_per_minute=2, tokens_per_minute=6000)
+        for _ in range(2):
+            client.complete('Score this resume')
+        # Tokens are charged by the usage reported, not the estimate
+        self.assertEqual(client.tokens.level, 6000 - 2 * 120)
+        self.assertEqual(self.clock.sleeps, [])
+
+        # The third request waits for the request bucket to refill
+        client.complete('Score this resume')
+        self.assertEqual(self.clock.sleeps, [30.0])
+
+    def test_concurrency_halves_on_rate_limit_and_grows_back_by_one(self):
+        clock = FakeClock()
+        concurrency = llm_client.AdaptiveConcurrency(8, clock=clock)
+        first, second = concurrency.acquire(), concurrency.acquire()
+        clock.now += 1
+        concurrency.release(first, rate_limited=True)
+        self.assertEqual(concurrency.limit, 4)
+        # Started before the decrease: the same burst does not halve it again
+        concurrency.release(second, rate_limited=True)
+        self.assertEqual(concurrency.limit, 4)
+
+        for limit in (5, 6):
+            for _ in range(concurrency.limit):
+                concurrency.release(concurrency.acquire())
+            self.assertEqual(concurrency.limit, limit)
+        self.assertEqual(concurrency.in_flight, 0)
+
+
+class WorkerKilled(BaseException):
+    """Stops a session part way, as a killed worker would"""
+
+
+class CheckpointResumeTests(FakeOpenAIMixin, TransactionTestCase):
+    def test_requeued_session_only_scores_remaining_resumes(self):
+        resumes = {f'candidate_{index:03d}.txt': resume_text(index) for index in range(6)}
+        self.create_session(resumes)
+        session = jobs.claim_next_session('worker-a')
+
+        create = self.completions.create
+
+        def dies_on_fourth_resume(model, messages, **kwargs):
+            if 'total_score' in messages[-1]['content'] and self.completions.count('total_score') == 3:
+                raise WorkerKilled()
+            return create(model, messages, **kwargs)
+
+        with mock.patch.object(self.completions, 'create', dies_on_fourth_resume):
+            with self.assertRaises(WorkerKilled):
+                jobs.run_session(session)
+        session.refresh_from_db()
+        self.assertEqual(session.status, ResumeUploadSession.STATUS_RUNNING)
+        self.assertEqual(session.candidates.count(), 3)
+
+        self.assertEqual(jobs.requeue_stale_sessions(stale_after=0), 1)
+        session = jobs.claim_next_session('worker-b')
+        self.assertTrue(jobs.run_session(session))
+
+        session.refresh_from_db()
+        self.assertEqual(session.status, ResumeUploadSession.STATUS_COMPLETED)
+        # Three resumes scored before the worker died, three after
+        self.assertEqual(self.completions.count('total_score'), 6)
+        self.assertEqual(
+            sorted(CandidateResult.objects.filter(session=session).values_list('file_name', flat=True)),
+            sorted(resumes),
+        )
+
+    def test_jsonl_checkpoint_ignores_truncated_line(self):
+        path = os.path.join(self.tmp, 'checkpoint.jsonl')
+        checkpoint = JsonlCheckpoint(path)
+        checkpoint.add('hash-a', {'File Name': 'a.pdf', 'Total Score': 10})
+        checkpoint.add('hash-a', {'File Name': 'a.pdf', 'Total Score': 99})
+        checkpoint.close()
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"file_hash": "hash-b", "rec')
+
+        checkpoint = JsonlCheckpoint(path, resume=True)
+        self.assertEqual(len(checkpoint), 1)
+        self.assertEqual(checkpoint.get('hash-a')['Total Score'], 10)
+        checkpoint.add('hash-b', {'File Name': 'b.pdf', 'Total Score': 20})
+        checkpoint.close()
+        self.assertEqual(sorted(JsonlCheckpoint.read(path)), ['hash-a', 'hash-b'])
+
+
+class SessionCheckpointTests(FakeOpenAIMixin, TransactionTestCase):
+    def test_concurrent_workers_checkpoint_every_scored_resume(self):
+        resumes = {f'candidate_{index:03d}.txt': resume_text(index) for index in range(30)}
+        self.create_session(resumes)
+        session = jobs.claim_next_session('test-worker')
+
+        stored_before_ranking = []
+        finish_session = jobs.finish_session
+
+        def finish(session, *args, **kwargs):
+            stored_before_ranking.append(session.candidates.count())
+            return finish_session(session, *args, **kwargs)
+
+        with mock.patch.dict(os.environ, {'MAX_WORKERS': '4'}), \
+                mock.patch.object(jobs, 'finish_session', finish):
+            self.assertTrue(jobs.run_session(session))
+
+        session.refresh_from_db()
+        self.assertEqual(session.resumes_scored, 30)
+        self.assertEqual(stored_before_ranking, [30])
+        self.assertEqual(CandidateResult.objects.filter(session=session).count(), 30)
+
+
+class FakeAsyncOpenAI:
+    """Stand-in for openai.AsyncOpenAI answering with the completions of FakeOpenAI"""
+
+    # Prompts containing one of these markers wait until they are cancelled
+    hang_on = ()
+
+    def __init__(self, **kwargs):
+        self.chat = SimpleNamespace(completions=self)
+
+    async def create(self, **kwargs):
+        prompt = kwargs['messages'][-1]['content']
+        if any(marker in prompt for marker in self.hang_on):
+            await asyncio.sleep(60)
+        await asyncio.sleep(0)
+        return FakeOpenAI.completions.create(**kwargs)
+
+
+class AsyncServiceTests(FakeOpenAIMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        client = mock.patch.object(AsyncResumeProcessingService, 'openai_client_class', FakeAsyncOpenAI)
+        client.start()
+        self.addCleanup(client.stop)
+
+    def test_async_results_match_sync_order(self):
+        resumes = {f'candidate_{index:02d}.txt': resume_text(index, years=index % 3) for index in range(12)}
+        path = os.path.join(self.tmp, 'resumes.zip')
+        with open(path, 'wb') as f:
+            f.write(make_zip(resumes))
+
+        service = AsyncResumeProcessingService('test-key', max_workers=4)
+        result = asyncio.run(service.aprocess_zip_file(path, 'Python developer'))
+        serial = ResumeProcessingService('test-key').process_zip_file(path, 'Python developer')
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['results'], serial['results'])
+
+    def test_arun_session_stores_results(self):
+        resumes = {f'candidate_{index}.txt': resume_text(index) for index in range(4)}
+        self.create_session(resumes)
+        session = jobs.claim_next_session('test-worker')
+        self.assertTrue(asyncio.run(jobs.arun_session(session)))
+
+        session.refresh_from_db()
+        self.assertEqual(session.status, ResumeUploadSession.STATUS_COMPLETED)
+        self.assertEqual(
+            list(session.candidates.order_by('rank').values_list('file_name', flat=True)),
+            ['candidate_3.txt', 'candidate_2.txt', 'candidate_1.txt', 'candidate_0.txt'],
+        )
+
+    def test_deadline_keeps_finished_resumes_for_a_requeue(self):
+        resumes = {f'candidate_{index}.txt': resume_text(index) for index in range(4)}
+        self.create_session(resumes)
+        session = jobs.claim_next_session('test-worker')
+        with mock.patch.dict(os.environ, {'MAX_WORKERS': '4', 'SESSION_DEADLINE': '0.5'}), \
+                mock.patch.object(FakeAsyncOpenAI, 'hang_on', ('candidate3@',)):
+            self.assertFalse(asyncio.run(jobs.arun_session(session)))
+
+        session.refresh_from_db()
+        self.assertEqual(session.status, ResumeUploadSession.STATUS_FAILED)
+        self.assertIn('did not finish within 0.5 seconds', session.error_message)
+        self.assertEqual(sorted(session.candidates.values_list('file_name', flat=True)),
+                         ['candidate_0.txt', 'candidate_1.txt', 'candidate_2.txt'])
+
+        # Run again, only the resume cut off by the deadline is scored
+        scored = self.completions.count('total_score')
+        jobs.enqueue_session(session)
+        session = jobs.claim_next_session('test-worker')
+        self.assertTrue(asyncio.run(jobs.arun_session(session)))
+        self.assertEqual(self.completions.count('total_score'), scored + 1)
+        self.assertEqual(session.candidates.count(), 4)
+
+    def test_cancelled_request_frees_its_slot_and_tokens(self):
+        async def cancel_in_flight():
+            client = llm_client.AsyncLLMClient(FakeAsyncOpenAI(), 'test-model', tokens_per_minute=10000)
+            task = asyncio.ensure_future(client.complete('Hang here'))
+            while not client.concurrency.in_flight:
+                await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return client
+
+        with mock.patch.object(FakeAsyncOpenAI, 'hang_on', ('Hang here',)):
+            client = asyncio.run(cancel_in_flight())
+        self.assertEqual(client.concurrency.in_flight, 0)
+        self.assertEqual(client.tokens.level, 10000)
+
+
+class RecordSpillTests(SimpleTestCase):
+    def test_ranks_like_a_list(self):
+        records = [
+            {'File Name': 'a.pdf', 'Total Score': 40, 'Go Score': 5},
+            {'File Name': 'b.pdf', 'Total Score': None},
+            {'File Name': 'c.pdf', 'Total Score': 80, 'SQL Score': 10},
+            {'File Name': 'd.pdf', 'Total Score': 40, 'Go Score': 1},
+        ]
+        # Records come in out of file order, as they finish
+        with reports.RecordSpill() as spill:
+            for index in (2, 0, 3, 1):
+                spill.add(records[index], index)
+
+            self.assertEqual(len(spill), 4)
+            self.assertEqual(spill.columns(), reports.report_columns(records))
+            self.assertEqual(list(spill.ranked()), reports.rank_records(records))
+            self.assertEqual([record['File Name'] for record in spill.top(2)], ['c.pdf', 'a.pdf'])
+
+            with tempfile.TemporaryDirectory() as directory:
+                spilled, listed = os.path.join(directory, 'spill.csv'), os.path.join(directory, 'list.csv')
+                self.assertEqual(reports.write_report(spilled, spill), 4)
+                reports.write_report(listed, records)
+                with open(spilled) as a, open(listed) as b:
+                    self.assertEqual(a.read(), b.read())
+
+
+class ExportResultsTests(TestCase):
+    def setUp(self):
+        self.session = ResumeUploadSession.objects.create(
+            job_description='Python developer', processed=True, status=ResumeUploadSession.STATUS_COMPLETED,
+        )
+        scores = [('a.txt', {'Python': 10}), ('b.txt', {'Python': 30, 'Go': 5}), ('c.txt', {})]
+        for rank, (file_name, skill_scores) in enumerate(scores, 1):
+            candidate = CandidateResult.objects.create(
+                session=self.session, rank=rank, file_name=file_name, name=f'Candidate {file_name[0]}',
+                total_score=100 - rank, summary='Fits, "mostly"',
+            )
+            for skill, score in skill_scores.items():
+                CandidateSkillScore.objects.create(candidate=candidate, skill=skill, score=score)
+        self.columns = [
+            'Rank', 'File Name', 'Candidate Name', 'Email', 'Phone', 'Total Score', 'Summary',
+            'Python Score', 'Go Score',
+        ]
+
+    def export(self, export_format, **params):
+        return self.client.get(reverse('export_results', args=[self.session.id, export_format]), params)
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv(self):
+        response = self.export('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn(f'session-{self.session.id}-results.csv', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(self.content(response))))
+        self.assertEqual(rows[0], self.columns)
+        self.assertEqual(rows[2], ['2', 'b.txt', 'Candidate b', '', '', '98.0', 'Fits, "mostly"', '30.0', '5.0'])
+        self.assertEqual([row[1] for row in rows[1:]], ['a.txt', 'b.txt', 'c.txt'])
+
+    def test_jsonl_applies_filters(self):
+        response = self.export('jsonl', skill='Python', sort='skill')
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual(list(rows[0]), self.columns)
+        self.assertEqual([row['File Name'] for row in rows], ['b.txt', 'a.txt', 'c.txt'])
+        self.assertIsNone(rows[2]['Python Score'])
+
+        response = self.export('jsonl', skill='Python', min_skill_score=20)
+        self.assertEqual([json.loads(line)['File Name'] for line in self.content(response).splitlines()], ['b.txt'])
+
+    def test_xlsx(self):
+        response = self.export('xlsx', min_score=98)
+        data = b''.join(response.streaming_content)
+        response.close()
+        sheet = openpyxl.load_workbook(io.BytesIO(data)).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), self.columns)
+        self.assertEqual([row[1] for row in rows[1:]], ['a.txt', 'b.txt'])
+
+    def test_unknown_format_and_unprocessed_session(self):
+        self.assertEqual(self.export('pdf').status_code, 404)
+        ResumeUploadSession.objects.filter(id=self.session.id).update(processed=False)
+        self.assertEqual(self.export('csv').status_code, 404)
+
+
+class ContactExtractorTests(SimpleTestCase):
+    def test_phone_formats(self):
+        self.assertEqual(find_phone('Phone: (555) 123-4567'), '5551234567')
+        self.assertEqual(find_phone('555.123.4567'), '5551234567')
+        self.assertEqual(find_phone('+1-555-123-4567'), '+15551234567')
+        self.assertEqual(find_phone('+44 20 7946 0958'), '+442079460958')
+        self.assertEqual(find_phone('+91 98765 43210'), '+919876543210')
+        self.assertEqual(find_phone('Call 555-123-4567.'), '5551234567')
+
+    def test_phone_does_not_cross_lines(self):
+        self.assertEqual(find_phone('2018 - 2020\n(555) 123-4567'), '5551234567')
+        self.assertIsNone(find_phone('Tel\n555\n123\n4567'))
+
+    def test_years_and_decimals_are_not_phones(self):
+        self.assertIsNone(find_phone('GPA 3.9 2012 2016'))
+        self.assertIsNone(find_phone('2010-2014-2018'))
+        self.assertIsNone(find_phone('Worked 2015 - 2019\nGPA 3.85'))
+        self.assertIsNone(find_phone('ID 12345678901234567890'))
+        self.assertEqual(find_phone('2019-2021 1234567890'), '1234567890')
+        self.assertEqual(find_phone('2018 - 2020 555-123-4567'), '5551234567')
+
+    def test_id_numbers_are_not_phones(self):
+        self.assertIsNone(find_phone('Student ID: 20201234567'))
+        self.assertIsNone(find_phone('Employee No. 5551234567'))
+        self.assertEqual(find_phone('Passport # 5551234567\nPhone No: 555 987 6543'), '5559876543')
+
+    def test_false_phone_does_not_skip_llm(self):
+        info = extract_contact_info('Jane Smith\nGPA 3.9 2012 2016')
+        self.assertEqual(info['phone'], NOT_FOUND)
+        self.assertFalse(has_contact_details(info))
+
+    def test_name_keeps_capitalization(self):
+        self.assertEqual(find_name('JOHN MCDONALD\njohn@example.com'), 'JOHN MCDONALD')
+        self.assertEqual(find_name('Mary McDonald\nmary@example.com'), 'Mary McDonald')
+
+    def test_headings_and_their_content_are_not_names(self):
+        self.assertIsNone(find_name('Work History\nAcme Corp Inc'))
+        self.assertIsNone(find_name('Professional Summary\nDetail Oriented Person'))
+        self.assertIsNone(find_name('Core Competencies List\njane@example.com'))
+        self.assertEqual(find_name('Jane Smith\nWork History\nAcme Corp Inc'), 'Jane Smith')
+
+    def test_missing_name_needs_llm(self):
+        info = extract_contact_info('Software Engineer\njane@example.com\n(555) 123-4567')
+        self.assertEqual(info['name'], NOT_FOUND)
+        self.assertFalse(has_contact_details(info))
+        self.assertTrue(has_contact_details(extract_contact_info('Jane Smith\njane@example.com')))
+
+
+class ContactFallbackTests(FakeOpenAIMixin, TestCase):
+    def test_llm_fills_missing_name_only(self):
+        service = jobs.build_service()
+        record = service.process_resume_text(
+            'Software Engineer\njane@example.com\n\nWorked 5 years.', 'jane.txt', json.dumps(CRITERIA)
+        )
+        self.assertEqual(record['Candidate Name'], 'Extracted')
+        self.assertEqual(record['Email'], 'jane@example.com')
+
+    def test_llm_name_wins_when_the_llm_is_asked(self):
+        service = jobs.build_service()
+        service.scoring_mode = services.SCORING_MODE_SINGLE_CALL
+        record = service.process_resume_text(resume_text(1), 'one.txt', json.dumps(CRITERIA))
+        self.assertEqual(record['Candidate Name'], 'Scored')
+        # The LLM found no email or phone; the local ones are kept
+        self.assertEqual(record['Email'], 'candidate1@example.com')
+        self.assertEqual(record['Phone'], '+15550100001')
+
+    def test_local_contact_details_skip_llm(self):
+        service = jobs.build_service()
+        record = service.process_resume_text(resume_text(1), 'one.txt', json.dumps(CRITERIA))
+        self.assertEqual(record['Candidate Name'], 'Alex B')
+        self.assertEqual(self.completions.count('total_score'), 1)
+        self.assertEqual(len(self.completions.prompts), 1)
+
+
+class CompactionStatsTests(FakeOpenAIMixin, TransactionTestCase):
+    def test_tokens_counted_once_per_resume_and_request(self):
+        service = jobs.build_service()
+        text = 'Software Engineer\njane@example.com\n\nWorked 5 years.'
+        criteria = json.dumps(CRITERIA)
+        # No local name: a contact request and a ranking request
+        service.process_resume_text(text, 'jane.txt', criteria)
+        first = dict(service.compaction_stats)
+        self.assertEqual(first['excerpts'], 2)
+        self.assertGreater(first['sent_tokens'], 0)
+
+        # Answers replayed from the response cache send nothing
+        service.process_resume_text(text, 'jane.txt', criteria)
+        self.assertEqual(service.compaction_stats, first)
+        self.assertEqual(len(self.completions.prompts), 2)
+
+    def test_original_tokens_counted_at_extraction(self):
+        resumes = {f'candidate_{index}.txt': resume_text(index) for index in range(3)}
+        self.create_session(resumes)
+        session = jobs.claim_next_session('test-worker')
+        self.assertTrue(jobs.run_session(session))
+        session.refresh_from_db()
+        expected = sum(text_compaction.count_tokens(text, 'gpt-3.5-turbo') for text in resumes.values())
+        self.assertEqual(session.resume_tokens, expected)
+        # One ranking request per resume, each with the (already short) text
+        self.assertEqual(len(self.completions.prompts), 4)
+        self.assertGreater(session.resume_tokens_sent, 0)
+        self.assertLessEqual(session.resume_tokens_sent, expected)
+
+
+class ResultsFilterTests(TestCase):
+    def setUp(self):
+        # Criteria name the skill "Python"; the LLM answered with other keys
+        self.session = ResumeUploadSession.objects.create(
+            job_description='Python developer', processed=True, status=ResumeUploadSession.STATUS_COMPLETED,
+            criteria={'required_skills': ['Python'], 'bonus_skills': []},
+        )
+        scores = [('a.txt', {'Python (3 years)': 10}), ('b.txt', {'Python (3 years)': 30, 'Go': 5}), ('c.txt', {})]
+        for rank, (file_name, skill_scores) in enumerate(scores, 1):
+            candidate = CandidateResult.objects.create(
+                session=self.session, rank=rank, file_name=file_name, total_score=100 - rank
+            )
+            for skill, score in skill_scores.items():
+                CandidateSkillScore.objects.create(candidate=candidate, skill=skill, score=score)
+
+    def get_results(self, **params):
+        return self.client.get(reverse('results', args=[self.session.id]), params)
+
+    def test_skill_choices_are_stored_names(self):
+        response = self.get_results()
+        choices = [value for value, _ in response.context['filter_form'].fields['skill'].choices]
+        self.assertEqual(choices, ['', 'Python (3 years)', 'Go'])
+
+    def test_sort_by_skill_keeps_candidates_without_it_last(self):
+        response = self.get_results(skill='Python (3 years)', sort='skill')
+        candidates = list(response.context['candidates'])
+        self.assertEqual([candidate.file_name for candidate in candidates], ['b.txt', 'a.txt', 'c.txt'])
+        self.assertEqual([candidate.skill_score for candidate in candidates], [30, 10, None])
+
+    def test_min_skill_score(self):
+        response = self.get_results(skill='Python (3 years)', min_skill_score=20)
+        self.assertEqual([candidate.file_name for candidate in response.context['candidates']], ['b.txt'])
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.path = os.path.join(self.tmp, 'cache.sqlite3')
+
+    def stored_size(self, cache):
+        return cache._conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+
+    def test_evicts_least_recently_used(self):
+        cache = caches.SQLiteCache(self.path, max_bytes=1000)
+        for index in range(10):
+            cache.set(f'key{index}', 'x' * 100)
+        cache.get('key0')
+        cache.set('key10', 'x' * 100)
+        self.assertIsNotNone(cache.get('key0'))
+        self.assertIsNone(cache.get('key1'))
+        self.assertLessEqual(self.stored_size(cache), 1000)
+        self.assertEqual(cache._total, self.stored_size(cache))
+
+    def test_replaced_entries_are_not_counted_twice(self):
+        cache = caches.SQLiteCache(self.path, max_bytes=1000)
+        for _ in range(20):
+            cache.set('key', 'x' * 100)
+        self.assertEqual(cache._total, 100)
+        self.assertEqual(cache.get('key'), 'x' * 100)
+
+    def test_writes_of_other_processes_are_recounted(self):
+        cache = caches.SQLiteCache(self.path, max_bytes=10000)
+        other = caches.SQLiteCache(self.path, max_bytes=10000)
+        for index in range(50):
+            other.set(f'other{index}', 'x' * 190)
+        for index in range(caches.SIZE_CHECK_INTERVAL):
+            cache.set(f'key{index}', 'x')
+        self.assertLessEqual(self.stored_size(cache), 10000)
+
+
+class RebuildSearchIndexTests(FakeOpenAIMixin, TestCase):
+    def test_rebuild_indexes_stored_resume_text(self):
+        session = ResumeUploadSession.objects.create(job_description='Python developer', processed=True)
+        resume = Resume.objects.create(file_hash='a' * 64, text='Maintained a Fortran climate model')
+        CandidateResult.objects.create(
+            session=session, rank=1, file_name='a.txt', file_hash=resume.file_hash, resume=resume
+        )
+        # Not in the extraction cache: the text has to come from the stored resume
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual([candidate.file_name for candidate in search_candidates('Fortran')], ['a.txt'])
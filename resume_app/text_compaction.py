@@ -0,0 +1,187 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # optional, exact token counts when installed
+    tiktoken = None
+
+# Tokens of resume text sent in a scoring prompt, and in a contact extraction
+# prompt (about the 3000 and 2000 characters that used to be sent)
+DEFAULT_RESUME_TOKEN_BUDGET = 750
+DEFAULT_CONTACT_TOKEN_BUDGET = 500
+
+# Section headings, by the section they start
+SECTION_HEADINGS = {
+    'summary': ('summary', 'professional summary', 'profile', 'professional profile', 'objective',
+                'career objective', 'about me', 'overview'),
+    'skills': ('skills', 'technical skills', 'key skills', 'core skills', 'core competencies', 'competencies',
+               'technologies', 'tech stack', 'technical expertise', 'expertise', 'tools', 'skills and tools'),
+    'experience': ('experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history', 'career history', 'relevant experience'),
+    'projects': ('projects', 'key projects', 'personal projects', 'selected projects'),
+    'certifications': ('certifications', 'certificates', 'licenses', 'licenses and certifications',
+                       'courses', 'training'),
+    'education': ('education', 'academic background', 'qualifications', 'academic qualifications'),
+    'achievements': ('achievements', 'awards', 'honors', 'accomplishments', 'publications'),
+    'languages': ('languages',),
+    'interests': ('interests', 'hobbies', 'hobbies and interests', 'activities', 'volunteering',
+                  'volunteer experience'),
+    'references': ('references', 'referees'),
+}
+HEADING_SECTIONS = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Sections in the order they are kept when the budget runs out. 'header' is
+# the text before the first heading (name and contact details); 'other' is
+# any section the headings above don't cover.
+SECTION_PRIORITY = (
+    'header', 'skills', 'experience', 'summary', 'projects', 'certifications', 'education', 'other',
+    'achievements', 'languages', 'interests', 'references',
+)
+
+HEADING_PATTERN = re.compile(r'^[\W_]*([a-z][a-z &/]*?)[\s:.\-–—]*$')
+PAGE_NUMBER_PATTERN = re.compile(r'^(page\s*)?\d+(\s*(of|/)\s*\d+)?$|^-\s*\d+\s*-$', re.IGNORECASE)
+# Short lines seen this often are treated as repeated page headers or footers
+REPEATED_LINE_MIN_COUNT = 3
+REPEATED_LINE_MAX_LENGTH = 80
+
+
+@lru_cache(maxsize=8)
+def _encoding(model):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+
+def count_tokens(text, model=None):
+    """
+    Count the tokens of text
+
+    Uses tiktoken when it is installed, otherwise estimates about four
+    characters per token.
+    """
+    if tiktoken is not None:
+        try:
+            return len(_encoding(model or 'gpt-3.5-turbo').encode(text, disallowed_special=()))
+        except Exception:
+            pass  # e.g. the encoding could not be downloaded
+    return len(text) // 4 + 1
+
+
+def collapse_whitespace(text):
+    """Trim lines, collapse runs of spaces and keep at most one blank line between paragraphs"""
+    lines = [re.sub(r'[ \t\f\v\u00a0]+', ' ', line).strip() for line in text.replace('\r', '\n').split('\n')]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+def strip_repeated_lines(text):
+    """
+    Remove page numbers and repeated page headers and footers
+
+    A short line that appears REPEATED_LINE_MIN_COUNT times or more (with
+    digits ignored, so "Page 2" matches "Page 3") is kept only the first
+    time.
+    """
+    lines = text.split('\n')
+    keys = [re.sub(r'\d+', '#', line.lower()) for line in lines]
+    counts = Counter(key for key, line in zip(keys, lines) if line and len(line) <= REPEATED_LINE_MAX_LENGTH)
+
+    kept = []
+    seen = set()
+    for key, line in zip(keys, lines):
+        if PAGE_NUMBER_PATTERN.match(line):
+            continue
+        if line and counts[key] >= REPEATED_LINE_MIN_COUNT:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(kept)).strip()
+
+
+def heading_section(line):
+    """Return the section a heading line starts, or None for ordinary lines"""
+    if not line or len(line) > 40:
+        return None
+    match = HEADING_PATTERN.match(line.lower())
+    if not match:
+        return None
+    heading = match.group(1).strip().replace('&', 'and')
+    if heading in HEADING_SECTIONS:
+        return HEADING_SECTIONS[heading]
+    # Combined headings such as "Technical Skills & Tools" take their first part
+    first = re.split(r'\s+and\s+|\s*/\s*', heading)[0]
+    return HEADING_SECTIONS.get(first)
+
+
+def split_sections(text):
+    """
+    Split resume text into sections at recognised headings
+
+    Returns:
+        list: (section, text) pairs in document order; the text before the
+            first heading is the 'header' section, and a repeated heading
+            continues as a separate entry of the same section
+    """
+    sections = [['header', []]]
+    for line in text.split('\n'):
+        section = heading_section(line.strip())
+        if section:
+            sections.append([section, []])
+        sections[-1][1].append(line)
+    return [(section, '\n'.join(lines).strip()) for section, lines in sections if any(lines)]
+
+
+def compact_text(text):
+    """Collapse whitespace and drop repeated headers, footers and page numbers"""
+    return strip_repeated_lines(collapse_whitespace(text or ''))
+
+
+def _truncate_to_tokens(text, max_tokens, model=None):
+    """Cut text at a line (or word) boundary so it fits max_tokens"""
+    if max_tokens <= 0:
+        return ''
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    # Start from a character estimate, then trim until it fits
+    cut = text[:max_tokens * 4]
+    while cut and count_tokens(cut, model) > max_tokens:
+        cut = cut[:int(len(cut) * 0.9)]
+    boundary = max(cut.rfind('\n'), cut.rfind(' '))
+    return cut[:boundary] if boundary > len(cut) // 2 else cut
+
+
+def fit_to_budget(text, token_budget=DEFAULT_RESUME_TOKEN_BUDGET, model=None, priority=SECTION_PRIORITY):
+    """
+    Compact resume text and fit it into a token budget
+
+    Whole sections are kept in ``priority`` order while they fit; the first
+    section that doesn't fit is cut to the tokens left, and lower-priority
+    sections are dropped. Kept sections stay in document order.
+
+    Returns:
+        str: Compacted text of at most ``token_budget`` tokens (approximately,
+            when tiktoken is not installed)
+    """
+    text = compact_text(text)
+    if count_tokens(text, model) <= token_budget:
+        return text
+
+    sections = split_sections(text)
+    rank = {section: position for position, section in enumerate(priority)}
+    order = sorted(range(len(sections)), key=lambda index: (rank.get(sections[index][0], len(priority)), index))
+
+    kept = {}
+    remaining = token_budget
+    for index in order:
+        # Sections are joined by a blank line
+        tokens = count_tokens(sections[index][1], model) + 1
+        if tokens <= remaining:
+            kept[index] = sections[index][1]
+            remaining -= tokens
+        else:
+            kept[index] = _truncate_to_tokens(sections[index][1], remaining - 1, model)
+            break
+    return '\n\n'.join(kept[index] for index in sorted(kept) if kept[index])
@@ -4,5 +4,11 @@ from . import views
 urlpatterns = [
     path('', views.home, name='home'),
     path('results/<int:session_id>/', views.results, name='results'),
+    path('results/<int:session_id>/export/<str:export_format>/', views.export_results, name='export_results'),
     path('sessions/', views.session_list, name='session_list'),
+    path('sessions/<int:session_id>/', views.session_status, name='session_status'),
+    path('sessions/<int:session_id>/status/', views.session_status_api, name='session_status_api'),
+    path('sessions/<int:session_id>/events/', views.session_events, name='session_events'),
+    path('search/', views.search, name='search'),
+    path('search/api/', views.search_api, name='search_api'),
 ]
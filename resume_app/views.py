@@ -1,10 +1,43 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.conf import settings
 from django.contrib import messages
-from .models import ResumeUploadSession
-from .forms import ResumeUploadForm
-from .services import ResumeProcessingService
+from django.core.paginator import Paginator
+from django.db.models import F, FilteredRelation, Min, Q
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from .models import CandidateSkillScore, ResumeUploadSession
+from .forms import CandidateSearchForm, ResultsFilterForm, ResumeUploadForm
+from .jobs import PROGRESS_FIELDS, enqueue_session, fail_session
+from .search import get_snippets, search_candidates
+from . import reports
 import os
+import json
+import time
+import asyncio
+import tempfile
+
+SESSIONS_PER_PAGE = 25
+SEARCH_RESULTS_PER_PAGE = 25
+MAX_SEARCH_API_LIMIT = 100
+# Best candidates so far shown on the status page
+TOP_CANDIDATES = 5
+# Progress event stream: seconds between database checks, between keep-alive
+# comments when nothing changed, and before the stream is closed (the
+# browser reconnects after EVENT_RETRY_MS milliseconds)
+EVENT_POLL_SECONDS = 1.0
+EVENT_KEEPALIVE_SECONDS = 15.0
+EVENT_STREAM_SECONDS = 300.0
+EVENT_RETRY_MS = 3000
+# Results exports: content type by format, and candidates read from the
+# database per query while an export streams
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+EXPORT_CHUNK_SIZE = 500
+# CandidateResult field of each report column
+EXPORT_FIELDS = dict(zip(reports.RECORD_COLUMNS, ('file_name', 'name', 'email', 'phone', 'total_score', 'summary')))
 
 
 def home(request):
@@ -12,59 +45,28 @@ def home(request):
     if request.method == 'POST':
         form = ResumeUploadForm(request.POST, request.FILES)
         if form.is_valid():
-            # Save the upload session
             session = form.save(commit=False)
-            session.save()
-
-            # Process the resumes
-            try:
-                # Get OpenAI API key from environment
-                api_key = os.getenv('OPENAI_API_KEY')
-                if not api_key:
-                    messages.error(request, 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.')
-                    return redirect('home')
-
-                # Get model from environment or use default
-                model = os.getenv('MODEL', 'gpt-3.5-turbo')
-
-                # Initialize the service
-                service = ResumeProcessingService(api_key, model)
-
-                # Process the zip file
-                result = service.process_zip_file(
-                    session.zip_file.path,
-                    session.job_description
-                )
-
-                if result['success']:
-                    # Update session with results
-                    session.processed = True
-                    session.results = result['results']
-                    session.criteria = result.get('criteria', {})
-                    session.save()
-
-                    messages.success(
-                        request,
-                        f'Successfully processed {result["total_processed"]} out of {result["total_files"]} resumes!'
-                    )
-                    return redirect('results', session_id=session.id)
-                else:
-                    # Update session with error
-                    session.error_message = result['error']
-                    session.save()
-                    messages.error(request, result['error'])
-                    return redirect('home')
-
-            except Exception as e:
-                session.error_message = str(e)
-                session.save()
-                messages.error(request, f'Error processing resumes: {str(e)}')
+
+            # Workers need an OpenAI API key; fail fast if none is configured
+            if not os.getenv('OPENAI_API_KEY'):
+                fail_session(session, 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.')
+                messages.error(request, session.error_message)
                 return redirect('home')
+
+            # Save the upload session and hand it to the background workers
+            # (manage.py process_uploads)
+            enqueue_session(session)
+            messages.info(request, 'Upload received. Your resumes are being processed in the background.')
+            return redirect('session_status', session_id=session.id)
     else:
         form = ResumeUploadForm()
 
-    # Get recent sessions
-    recent_sessions = ResumeUploadSession.objects.filter(processed=True)[:5]
+    # Get recent sessions (only the columns the list shows)
+    recent_sessions = (
+        ResumeUploadSession.objects
+        .filter(status=ResumeUploadSession.STATUS_COMPLETED)
+        .only('id', 'created_at', 'results_count')[:5]
+    )
 
     return render(request, 'resume_app/home.html', {
         'form': form,
@@ -77,19 +79,335 @@ def results(request, session_id):
     session = get_object_or_404(ResumeUploadSession, id=session_id)
 
     if not session.processed:
+        if not session.is_finished:
+            return redirect('session_status', session_id=session.id)
         messages.warning(request, 'This session has not been processed yet.')
         return redirect('home')
 
+    filter_form = ResultsFilterForm(request.GET, skills=scored_skills(session))
+    filters = filter_form.cleaned_data if filter_form.is_valid() else {}
+    candidates = filter_candidates(session, filters)
+
+    paginator = Paginator(candidates, filters.get('per_page') or ResultsFilterForm.DEFAULT_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
     return render(request, 'resume_app/results.html', {
         'session': session,
-        'results': session.results,
+        'filter_form': filter_form,
+        'selected_skill': filters.get('skill'),
+        'page_obj': page_obj,
+        'candidates': page_obj.object_list,
+        'results_count': session.get_results_count(),
         'criteria': session.criteria
     })
 
 
+def scored_skills(session):
+    """
+    Skills scored in a session, in the order they were first stored
+
+    These are the names in the LLM answers, which may differ from the
+    criteria's; the results filters and export columns use them, so a
+    selected skill always matches stored scores.
+    """
+    return list(
+        CandidateSkillScore.objects
+        .filter(candidate__session=session)
+        .values('skill')
+        .annotate(first_id=Min('id'))
+        .order_by('first_id')
+        .values_list('skill', flat=True)
+    )
+
+
+def filter_candidates(session, filters):
+    """
+    Build the ranked candidate query for the results page
+
+    Args:
+        session: ResumeUploadSession to list candidates of
+        filters: Cleaned ResultsFilterForm data; may be empty
+
+    Returns:
+        QuerySet of CandidateResult, annotated with ``skill_score`` when a
+        skill is selected
+    """
+    candidates = session.candidates.all()
+
+    if filters.get('min_score') is not None:
+        candidates = candidates.filter(total_score__gte=filters['min_score'])
+
+    skill = filters.get('skill')
+    if skill:
+        # One join on the selected skill's score row (unique per candidate and
+        # skill). It is a LEFT JOIN, keeping candidates without the skill,
+        # until a minimum score makes it an inner join that SQLite can run
+        # from the (skill, score) index
+        candidates = candidates.annotate(
+            selected_skill=FilteredRelation('skill_scores', condition=Q(skill_scores__skill=skill))
+        ).annotate(skill_score=F('selected_skill__score'))
+        if filters.get('min_skill_score') is not None:
+            candidates = candidates.filter(skill_score__gte=filters['min_skill_score'])
+
+    sort = filters.get('sort') or ResultsFilterForm.SORT_RANK
+    if sort == ResultsFilterForm.SORT_SKILL and skill:
+        return candidates.order_by(F('skill_score').desc(nulls_last=True), 'rank')
+    if sort == ResultsFilterForm.SORT_RANK_REVERSED:
+        return candidates.order_by('-rank')
+    return candidates.order_by('rank')
+
+
+def export_results(request, session_id, export_format):
+    """
+    Download the ranked candidates of a session as CSV, JSON Lines or Excel
+
+    Columns follow the CLI report (rank, contact details, total score,
+    summary, one column per skill), and the results page filters in the
+    query string apply. CSV and JSON Lines are streamed as candidates are
+    read from the database; Excel is written in constant memory to a
+    temporary file, which is then streamed.
+    """
+    if export_format not in EXPORT_CONTENT_TYPES:
+        raise Http404('Unknown export format.')
+    session = get_object_or_404(ResumeUploadSession, id=session_id)
+    if not session.processed:
+        raise Http404('This session has no results yet.')
+
+    skills = scored_skills(session)
+    filter_form = ResultsFilterForm(request.GET, skills=skills)
+    filters = filter_form.cleaned_data if filter_form.is_valid() else {}
+    columns = ['Rank'] + list(EXPORT_FIELDS) + [f'{skill} Score' for skill in skills]
+    rows = export_rows(filter_candidates(session, filters))
+    filename = f'session-{session.id}-results.{export_format}'
+
+    if export_format == 'xlsx':
+        output = tempfile.TemporaryFile()
+        try:
+            reports.write_xlsx(output, columns, rows)
+        except BaseException:
+            output.close()
+            raise
+        output.seek(0)
+        # FileResponse closes (and so deletes) the temporary file when it is sent
+        return FileResponse(
+            output, as_attachment=True, filename=filename, content_type=EXPORT_CONTENT_TYPES['xlsx']
+        )
+
+    chunks = reports.iter_csv(columns, rows) if export_format == 'csv' else reports.iter_jsonl(columns, rows)
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_rows(candidates):
+    """
+    Yield report rows for a candidate query, in its order
+
+    Candidates are read as plain values EXPORT_CHUNK_SIZE at a time, with
+    one query for the skill scores of each chunk, so memory use does not
+    grow with the number of candidates.
+    """
+    fields = ['id', 'rank'] + list(EXPORT_FIELDS.values())
+    chunk = []
+    for values in candidates.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(values)
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield from _export_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield from _export_chunk(chunk)
+
+
+def _export_chunk(chunk):
+    """Yield the report rows of a chunk of candidate values, adding their skill scores"""
+    skill_scores = {}
+    scores = (
+        CandidateSkillScore.objects
+        .filter(candidate_id__in=[values[0] for values in chunk])
+        .values_list('candidate_id', 'skill', 'score')
+    )
+    for candidate_id, skill, score in scores:
+        skill_scores.setdefault(candidate_id, []).append((skill, score))
+
+    for candidate_id, rank, *values in chunk:
+        row = dict(zip(EXPORT_FIELDS, values))
+        row['Rank'] = rank
+        for skill, score in skill_scores.get(candidate_id, ()):
+            row[f'{skill} Score'] = score
+        yield row
+
+
+def session_status(request, session_id):
+    """Show processing progress for a queued session"""
+    session = get_object_or_404(ResumeUploadSession, id=session_id)
+
+    if session.processed:
+        return redirect('results', session_id=session.id)
+
+    return render(request, 'resume_app/session_status.html', {
+        'session': session
+    })
+
+
+def top_candidates_query(session):
+    """Best-scored candidates of a session, including those stored while it runs"""
+    return (
+        session.candidates
+        .order_by('-total_score', 'id')
+        .values('name', 'file_name', 'total_score')[:TOP_CANDIDATES]
+    )
+
+
+def session_progress(session, top_candidates):
+    """
+    Build the status of a session sent to the status page
+
+    Args:
+        session: ResumeUploadSession
+        top_candidates: Rows of top_candidates_query(session)
+
+    Returns:
+        dict: JSON-serializable status, progress counts and best candidates
+    """
+    return {
+        'id': session.id,
+        'status': session.status,
+        'processed': session.processed,
+        'error': session.error_message,
+        'results_count': session.get_results_count(),
+        'results_url': reverse('results', args=[session.id]) if session.processed else None,
+        'progress': {key: getattr(session, field) for key, field in PROGRESS_FIELDS.items()},
+        'top_candidates': [
+            {
+                'name': candidate['name'],
+                'file_name': candidate['file_name'],
+                'total_score': candidate['total_score'],
+            }
+            for candidate in top_candidates
+        ],
+    }
+
+
+def session_status_api(request, session_id):
+    """Return the processing status of a session as JSON for polling"""
+    session = get_object_or_404(ResumeUploadSession, id=session_id)
+    return JsonResponse(session_progress(session, list(top_candidates_query(session))))
+
+
+async def session_events(request, session_id):
+    """
+    Stream the progress of a session as server-sent events
+
+    An async view, so open status pages don't each hold a worker thread when
+    served through ASGI (resume_sorter_project.asgi). An event is sent when
+    the status, counts or best candidates change, and the stream ends once
+    the session completes or fails.
+    """
+    if not await ResumeUploadSession.objects.filter(id=session_id).aexists():
+        raise Http404('No session matches the given query.')
+    response = StreamingHttpResponse(_progress_events(session_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def _progress_events(session_id):
+    """Yield server-sent events with the status of a session as it changes"""
+    started = sent_at = time.monotonic()
+    last_data = None
+    yield f"retry: {EVENT_RETRY_MS}\n\n"
+    while True:
+        session = await ResumeUploadSession.objects.filter(id=session_id).afirst()
+        if session is None:
+            return
+        top_candidates = [candidate async for candidate in top_candidates_query(session)]
+        data = json.dumps(session_progress(session, top_candidates))
+
+        now = time.monotonic()
+        if data != last_data:
+            yield f"data: {data}\n\n"
+            last_data, sent_at = data, now
+        elif now - sent_at >= EVENT_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            sent_at = now
+
+        if session.is_finished or now - started >= EVENT_STREAM_SECONDS:
+            return
+        await asyncio.sleep(EVENT_POLL_SECONDS)
+
+
 def session_list(request):
-    """List all processing sessions"""
-    sessions = ResumeUploadSession.objects.all()
+    """List all processing sessions, one page at a time"""
+    sessions = ResumeUploadSession.objects.only(
+        'id', 'created_at', 'processed', 'status', 'error_message', 'results_count'
+    )
+    page_obj = Paginator(sessions, SESSIONS_PER_PAGE).get_page(request.GET.get('page'))
     return render(request, 'resume_app/session_list.html', {
-        'sessions': sessions
+        'sessions': page_obj.object_list,
+        'page_obj': page_obj
+    })
+
+
+def _search_from_form(form):
+    """Run a candidate search with the options of a valid CandidateSearchForm"""
+    return search_candidates(
+        query=form.cleaned_data['q'],
+        skill=form.cleaned_data['skill'],
+        min_skill_score=form.cleaned_data['min_skill_score'],
+        min_score=form.cleaned_data['min_score']
+    )
+
+
+def search(request):
+    """Search candidates across all past sessions"""
+    form = CandidateSearchForm(request.GET or None)
+    page_obj = None
+
+    if form.is_valid() and form.has_filters():
+        page_obj = Paginator(_search_from_form(form), SEARCH_RESULTS_PER_PAGE).get_page(request.GET.get('page'))
+        snippets = get_snippets([candidate.id for candidate in page_obj.object_list], form.cleaned_data['q'])
+        for candidate in page_obj.object_list:
+            candidate.snippet = snippets.get(candidate.id)
+
+    return render(request, 'resume_app/search.html', {
+        'form': form,
+        'page_obj': page_obj,
+        'candidates': page_obj.object_list if page_obj else []
+    })
+
+
+def search_api(request):
+    """Search candidates across all past sessions and return JSON"""
+    form = CandidateSearchForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    if not form.has_filters():
+        return JsonResponse({'errors': {'q': ['Give a search term or filter.']}}, status=400)
+
+    try:
+        limit = min(max(int(request.GET.get('limit', SEARCH_RESULTS_PER_PAGE)), 1), MAX_SEARCH_API_LIMIT)
+    except ValueError:
+        limit = SEARCH_RESULTS_PER_PAGE
+    page_obj = Paginator(_search_from_form(form), limit).get_page(request.GET.get('page'))
+
+    return JsonResponse({
+        'count': page_obj.paginator.count,
+        'page': page_obj.number,
+        'num_pages': page_obj.paginator.num_pages,
+        'results': [
+            {
+                'id': candidate.id,
+                'session_id': candidate.session_id,
+                'rank': candidate.rank,
+                'name': candidate.name,
+                'email': candidate.email,
+                'phone': candidate.phone,
+                'file_name': candidate.file_name,
+                'total_score': candidate.total_score,
+                'skill_score': getattr(candidate, 'skill_score', None),
+                'results_url': reverse('results', args=[candidate.session_id]),
+            }
+            for candidate in page_obj.object_list
+        ],
     })
@@ -1,10 +1,25 @@
 import os
-import textract
+import argparse
 import json
-import pandas as pd
 from openai import OpenAI
 from dotenv import load_dotenv
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from resume_app.caches import ExtractionCache, ResponseCache, sha256_bytes
+from resume_app.checkpoints import JsonlCheckpoint
+from resume_app.contact_extractor import (
+    extract_contact_info,
+    has_contact_details,
+    merge_contact_info,
+)
+from resume_app.extractors import (
+    extract_file_in_worker,
+    extract_text_from_bytes,
+    get_extraction_timings,
+    timings as extraction_timings,
+)
+from resume_app import batching, keyword_scorer, prefilter, reports, text_compaction
+from resume_app.llm_client import DEFAULT_MAX_RETRIES, DEFAULT_REQUEST_TIMEOUT, LLMClient
 
 # Load .env file
 load_dotenv()
@@ -36,7 +51,45 @@ if missing_vars:
     print("\nPlease add all required variables to your .env file.")
     exit(1)
 
-client = OpenAI(api_key=api_key)
+# Rate limits of the account (0 = no limit); rate limits, timeouts and
+# server errors are retried with backoff instead of dropping the resume
+llm_client = LLMClient(
+    OpenAI(
+        api_key=api_key,
+        max_retries=0,
+        timeout=float(os.getenv("LLM_TIMEOUT", str(DEFAULT_REQUEST_TIMEOUT))),
+    ),
+    MODEL,
+    requests_per_minute=int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")) or None,
+    tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", "0")) or None,
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", str(DEFAULT_MAX_RETRIES))),
+)
+
+# Extracted text is reused across runs for files with identical bytes
+extraction_cache = ExtractionCache()
+# Scoring answers are replayed for identical model/prompt pairs
+response_cache = ResponseCache()
+
+# Requests and tokens sent to the API (cache hits are not counted)
+api_usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+# Resumes scored by keyword matching after the LLM failed (--keyword-fallback)
+keyword_stats = {"fallbacks": 0}
+
+# Job description of the run; keyword scoring matches the skills it names
+# when the criteria cannot be keyword-matched
+keyword_job_description = ""
+
+# Tokens of resume text per scoring prompt (--resume-token-budget), and the
+# tokens of resume text extracted for prompts and sent after compaction
+resume_token_budget = text_compaction.DEFAULT_RESUME_TOKEN_BUDGET
+compaction_stats = {"excerpts": 0, "original_tokens": 0, "sent_tokens": 0}
+
+# 'two_call' extracts contact info and ranks in separate requests,
+# 'single_call' gets both from one structured response, 'batched' scores
+# several resumes per request, 'keyword' scores skill mentions locally
+# without the LLM
+SCORING_MODES = ("two_call", "single_call", "batched", "keyword")
 
 # Display configuration
 print(f"Configuration loaded:")
@@ -47,6 +100,55 @@ print(f"  MODEL: {MODEL}")
 print("-" * 50)
 
 
+def chat(prompt, use_cache=False, excerpts=()):
+    """
+    Send a chat completion, replaying cached JSON answers when use_cache is set
+
+    ``excerpts`` are the resume texts in the prompt; their tokens are counted
+    as sent only when the request is actually made.
+    """
+    if use_cache:
+        cache_key = ResponseCache.make_key(MODEL, prompt)
+        cached_answer = response_cache.get(cache_key)
+        if cached_answer is not None:
+            return cached_answer
+
+    response = llm_client.complete(prompt)
+    answer = response.choices[0].message.content.strip()
+
+    api_usage["requests"] += 1
+    if excerpts:
+        compaction_stats["excerpts"] += len(excerpts)
+        compaction_stats["sent_tokens"] += sum(
+            text_compaction.count_tokens(excerpt, MODEL) for excerpt in excerpts
+        )
+    if getattr(response, "usage", None):
+        api_usage["prompt_tokens"] += response.usage.prompt_tokens
+        api_usage["completion_tokens"] += response.usage.completion_tokens
+
+    if use_cache:
+        try:
+            json.loads(answer)
+        except json.JSONDecodeError:
+            return answer
+        response_cache.set(cache_key, answer)
+    return answer
+
+
+def fit_resume_text(text, token_budget=None):
+    """Compact resume text to a prompt's token budget (the scoring budget by default)"""
+    return text_compaction.fit_to_budget(
+        text or "", token_budget or resume_token_budget, MODEL
+    )
+
+
+def count_extracted_tokens(text):
+    """Count the tokens of a resume's extracted text (once per resume); returns the text"""
+    if text:
+        compaction_stats["original_tokens"] += text_compaction.count_tokens(text, MODEL)
+    return text
+
+
 def read_job_description():
     """Read job description from file"""
     try:
@@ -107,11 +209,7 @@ Make sure the total points add up to 100 and focus on the most critical requirem
 """
 
     try:
-        response = client.chat.completions.create(
-            model=MODEL, messages=[{"role": "user", "content": prompt}], temperature=0
-        )
-        answer = response.choices[0].message.content.strip()
-        return answer
+        return chat(prompt)
     except Exception as e:
         print(f"[ERROR] Failed to create optimized prompt: {e}")
         return None
@@ -119,14 +217,30 @@ Make sure the total points add up to 100 and focus on the most critical requirem
 
 def extract_text(file_path):
     try:
-        text = textract.process(file_path).decode("utf-8")
-        return text.strip()
+        with open(file_path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        print(f"[ERROR] Failed to read {file_path}: {e}")
+        return ""
+
+    file_hash = sha256_bytes(data)
+    cached_text = extraction_cache.get(file_hash)
+    if cached_text is not None:
+        return cached_text
+
+    try:
+        text = extract_text_from_bytes(data, os.path.basename(file_path))
     except Exception as e:
         print(f"[ERROR] Failed to extract {file_path}: {e}")
         return ""
 
+    if text:
+        extraction_cache.set(file_hash, text)
+    return text
+
 
 def extract_candidate_info(text):
+    excerpt = fit_resume_text(text, text_compaction.DEFAULT_CONTACT_TOKEN_BUDGET)
     prompt = f"""
 You are an expert HR assistant extracting candidate information from resumes.
 
@@ -145,14 +259,10 @@ Respond in the following JSON format:
 If any information is not found, use "Not Found" as the value.
 
 Resume:
-{text[:2000]}
+{excerpt}
 """
     try:
-        response = client.chat.completions.create(
-            model=MODEL, messages=[{"role": "user", "content": prompt}], temperature=0
-        )
-        answer = response.choices[0].message.content.strip()
-        return answer
+        return chat(prompt, use_cache=True, excerpts=[excerpt])
     except Exception as e:
         print(f"[ERROR] OpenAI API failed for candidate info extraction: {e}")
         return None
@@ -169,6 +279,7 @@ def rank_resume(text, optimized_criteria):
     try:
         criteria_data = json.loads(optimized_criteria)
         evaluation_prompt = criteria_data.get("evaluation_prompt", "")
+        excerpt = fit_resume_text(text)
 
         # Create the actual ranking prompt
         prompt = f"""
@@ -187,14 +298,58 @@ Respond in the following JSON format:
 }}
 
 Resume:
-{text[:3000]}
+{excerpt}
 """
 
-        response = client.chat.completions.create(
-            model=MODEL, messages=[{"role": "user", "content": prompt}], temperature=0
+        return chat(prompt, use_cache=True, excerpts=[excerpt])
+
+    except json.JSONDecodeError:
+        print("[ERROR] Could not parse optimized criteria from job description")
+        return None
+    except Exception as e:
+        print(f"[ERROR] OpenAI API failed: {e}")
+        return None
+
+
+def score_resume(text, optimized_criteria):
+    """Extract candidate information and rank the resume in a single request"""
+    if not optimized_criteria:
+        print(
+            "[ERROR] No job description criteria available. Please ensure job_description.txt exists."
         )
-        answer = response.choices[0].message.content.strip()
-        return answer
+        return None
+
+    try:
+        criteria_data = json.loads(optimized_criteria)
+        evaluation_prompt = criteria_data.get("evaluation_prompt", "")
+        excerpt = fit_resume_text(text)
+
+        prompt = f"""
+{evaluation_prompt}
+
+Please analyze the following resume and provide scores based on the criteria above.
+Also extract the candidate's full name, email address and phone number.
+
+Respond in the following JSON format:
+{{
+    "name": "<candidate full name>",
+    "email": "<email address>",
+    "phone": "<phone number>",
+    "total_score": <number>,
+    "skill_scores": {{
+        "skill_name": <score>,
+        ...
+    }},
+    "summary": "<brief explanation of scoring>"
+}}
+
+If any contact information is not found, use "Not Found" as the value.
+
+Resume:
+{excerpt}
+"""
+
+        return chat(prompt, use_cache=True, excerpts=[excerpt])
 
     except json.JSONDecodeError:
         print("[ERROR] Could not parse optimized criteria from job description")
@@ -204,75 +359,441 @@ Resume:
         return None
 
 
-def process_resume(file_path, optimized_criteria):
+def iter_extracted_texts(file_paths, extract_workers=1, extract_timeout=None):
+    """Yield (index, text) for each resume as soon as its text is available"""
+    if extract_workers <= 1:
+        for index, file_path in enumerate(file_paths):
+            yield index, extract_text(file_path)
+        return
+
+    with ProcessPoolExecutor(max_workers=extract_workers) as pool:
+        futures = {}
+        cached_texts = []
+        for index, file_path in enumerate(file_paths):
+            try:
+                with open(file_path, "rb") as f:
+                    file_hash = sha256_bytes(f.read())
+            except OSError as e:
+                print(f"[ERROR] Failed to read {file_path}: {e}")
+                continue
+
+            cached_text = extraction_cache.get(file_hash)
+            if cached_text is not None:
+                cached_texts.append((index, cached_text))
+            else:
+                future = pool.submit(extract_file_in_worker, file_path, extract_timeout)
+                futures[future] = (index, file_path, file_hash)
+
+        # Score cached files while the pool parses the rest
+        yield from cached_texts
+
+        for future in as_completed(futures):
+            index, file_path, file_hash = futures[future]
+            try:
+                text, worker_timings, error = future.result()
+            except Exception as e:
+                print(f"[ERROR] Failed to extract {file_path}: {e}")
+                continue
+
+            extraction_timings.merge(worker_timings)
+            if error:
+                print(f"[ERROR] Failed to extract {file_path}: {error}")
+                continue
+            if text:
+                extraction_cache.set(file_hash, text)
+            yield index, text
+
+
+def process_resume(file_path, optimized_criteria, scoring_mode="two_call"):
     text = extract_text(file_path)
+    return process_resume_text(
+        text, os.path.basename(file_path), optimized_criteria, scoring_mode
+    )
+
+
+def process_resume_text(
+    text, filename, optimized_criteria, scoring_mode="two_call", keyword_fallback=False
+):
     if not text:
         return None
 
-    filename = os.path.basename(file_path)
     print(f"Processing: {filename}...")
 
-    # Extract candidate information
-    candidate_info_result = extract_candidate_info(text)
-    candidate_info = {}
+    # Contact details come from a local regex pass; the LLM is only asked
+    # when it misses the name or finds neither an email nor a phone number
+    candidate_info = extract_contact_info(text)
+    if scoring_mode == "keyword":
+        return keyword_record(text, filename, optimized_criteria, candidate_info)
+
+    candidate_info_result = None
+
+    if scoring_mode in ("single_call", "batched"):
+        # Contact fields come back in the same JSON as the scores
+        ranking_result = score_resume(text, optimized_criteria)
+        candidate_info_result = ranking_result
+    else:
+        if not has_contact_details(candidate_info):
+            candidate_info_result = extract_candidate_info(text)
+        # Get ranking scores using optimized criteria
+        ranking_result = rank_resume(text, optimized_criteria)
+
     if candidate_info_result:
         try:
-            candidate_info = json.loads(candidate_info_result)
-        except json.JSONDecodeError:
+            candidate_info = merge_contact_info(
+                candidate_info, json.loads(candidate_info_result)
+            )
+        except (json.JSONDecodeError, AttributeError):
             print(f"[!] Could not parse candidate info for {filename}")
-            candidate_info = {
-                "name": "Not Found",
-                "email": "Not Found",
-                "phone": "Not Found",
-            }
-    else:
-        candidate_info = {
-            "name": "Not Found",
-            "email": "Not Found",
-            "phone": "Not Found",
-        }
-
-    # Get ranking scores using optimized criteria
-    ranking_result = rank_resume(text, optimized_criteria)
-    if not ranking_result:
+
+    if ranking_result:
+        try:
+            # Parse the JSON response
+            return build_resume_record(
+                filename, candidate_info, json.loads(ranking_result)
+            )
+        except json.JSONDecodeError:
+            print(f"[!] {filename} → Could not parse ranking result.")
+        except Exception as e:
+            print(f"[!] {filename} → Error processing: {e}")
+            return None
+
+    if not keyword_fallback:
         return None
+    print(f"[!] {filename} → AI scoring failed; falling back to keyword matching")
+    resume_data = keyword_record(text, filename, optimized_criteria, candidate_info)
+    if resume_data:
+        keyword_stats["fallbacks"] += 1
+    return resume_data
+
+
+def build_resume_record(filename, candidate_info, ranking_data):
+    """Build a report row from contact details and a parsed ranking answer"""
+    total_score = ranking_data.get("total_score", 0)
+    summary = ranking_data.get("summary", "")
+
+    # Get skill scores from the new format
+    skill_scores = ranking_data.get("skill_scores", {})
+
+    # Create resume data record with dynamic skill columns
+    resume_data = {
+        "File Name": filename,
+        "Candidate Name": candidate_info.get("name", "Not Found"),
+        "Email": candidate_info.get("email", "Not Found"),
+        "Phone": candidate_info.get("phone", "Not Found"),
+        "Total Score": total_score,
+        "Summary": summary,
+    }
+
+    # Add individual skill scores
+    for skill, score in skill_scores.items():
+        resume_data[f"{skill} Score"] = score
+
+    print(f"[✔] {filename} - Total Score: {total_score}/100")
+    return resume_data
 
+
+def keyword_record(text, filename, optimized_criteria, candidate_info):
+    """Score a resume with the keyword scorer instead of the LLM"""
     try:
-        # Parse the JSON response
-        ranking_data = json.loads(ranking_result)
-        total_score = ranking_data.get("total_score", 0)
-        summary = ranking_data.get("summary", "")
-
-        # Get skill scores from the new format
-        skill_scores = ranking_data.get("skill_scores", {})
-
-        # Create resume data record with dynamic skill columns
-        resume_data = {
-            "File Name": filename,
-            "Candidate Name": candidate_info.get("name", "Not Found"),
-            "Email": candidate_info.get("email", "Not Found"),
-            "Phone": candidate_info.get("phone", "Not Found"),
-            "Total Score": total_score,
-            "Summary": summary,
-        }
-
-        # Add individual skill scores
-        for skill, score in skill_scores.items():
-            resume_data[f"{skill} Score"] = score
-
-        print(f"[✔] {filename} - Total Score: {total_score}/100")
-        return resume_data
+        ranking_data = keyword_scorer.scorer_for(
+            optimized_criteria, keyword_job_description
+        ).score([text])[0]
+    except (TypeError, ValueError, AttributeError) as e:
+        print(f"[!] {filename} → Could not score with keywords: {e}")
+        return None
+    return build_resume_record(filename, candidate_info, ranking_data)
 
-    except json.JSONDecodeError:
-        print(f"[!] {filename} → Could not parse ranking result.")
+
+def keyword_score_texts(texts, resume_files, optimized_criteria):
+    """
+    Score extracted resumes with the keyword scorer in one batch
+
+    Args:
+        texts: Dict of extracted text by resume index
+        resume_files: Resume file names, by index
+        optimized_criteria: Criteria JSON the resumes are ranked against
+
+    Returns:
+        dict: Report rows by resume index
+    """
+    indices = [index for index in sorted(texts) if texts[index]]
+    try:
+        scorer = keyword_scorer.scorer_for(optimized_criteria, keyword_job_description)
+    except ValueError as e:
+        print(f"[ERROR] Could not score with keywords: {e}")
+        return {}
+    scores = scorer.score([texts[index] for index in indices])
+    return {
+        index: build_resume_record(
+            resume_files[index], extract_contact_info(texts[index]), ranking_data
+        )
+        for index, ranking_data in zip(indices, scores)
+    }
+
+
+def parse_args():
+    """Parse command line options (settings from .env are used as defaults)"""
+    parser = argparse.ArgumentParser(description="Rank resumes against a job description")
+    parser.add_argument(
+        "--scoring-mode",
+        choices=SCORING_MODES,
+        default=os.getenv("SCORING_MODE", "two_call"),
+        help="two_call: separate contact extraction and ranking requests; "
+        "single_call: one request per resume; batched: several resumes per request; "
+        "keyword: local keyword matching, no LLM scoring "
+        "(default: SCORING_MODE or two_call)",
+    )
+    parser.add_argument(
+        "--keyword-fallback",
+        action="store_true",
+        default=bool(int(os.getenv("KEYWORD_FALLBACK", "0"))),
+        help="Score resumes by keyword matching when the LLM fails (default: KEYWORD_FALLBACK)",
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=int(os.getenv("EXTRACT_WORKERS", "1")),
+        help="Processes used to extract resume text in parallel (default: EXTRACT_WORKERS or 1)",
+    )
+    parser.add_argument(
+        "--extract-timeout",
+        type=float,
+        default=float(os.getenv("EXTRACT_TIMEOUT", "60")),
+        help="Seconds allowed to extract one file in a worker process (default: 60)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=int(os.getenv("BATCH_SIZE", str(batching.DEFAULT_MAX_BATCH_SIZE))),
+        help="Resumes per request in batched mode "
+        f"(default: BATCH_SIZE or {batching.DEFAULT_MAX_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--batch-token-budget",
+        type=int,
+        default=int(
+            os.getenv("BATCH_TOKEN_BUDGET", str(batching.DEFAULT_TOKEN_BUDGET))
+        ),
+        help="Prompt tokens per request in batched mode "
+        f"(default: BATCH_TOKEN_BUDGET or {batching.DEFAULT_TOKEN_BUDGET})",
+    )
+    parser.add_argument(
+        "--resume-token-budget",
+        type=int,
+        default=int(
+            os.getenv(
+                "RESUME_TOKEN_BUDGET", str(text_compaction.DEFAULT_RESUME_TOKEN_BUDGET)
+            )
+        ),
+        help="Tokens of resume text per scoring prompt; the most relevant sections are kept "
+        f"(default: RESUME_TOKEN_BUDGET or {text_compaction.DEFAULT_RESUME_TOKEN_BUDGET})",
+    )
+    parser.add_argument(
+        "--prefilter-top-k",
+        type=int,
+        default=int(os.getenv("PREFILTER_TOP_K", "0")) or None,
+        help="Only send the K resumes most similar to the job description to the LLM "
+        "(default: PREFILTER_TOP_K or all resumes)",
+    )
+    parser.add_argument(
+        "--prefilter-threshold",
+        type=float,
+        default=float(os.getenv("PREFILTER_THRESHOLD", "0")) or None,
+        help="Skip resumes whose similarity to the job description (0-1) is below this value "
+        "(default: PREFILTER_THRESHOLD or no minimum)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=os.getenv("CHECKPOINT_FILE") or None,
+        help="JSON Lines file each resume's result is written to as soon as it is scored "
+        "(default: CHECKPOINT_FILE or none)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run: resumes already in the checkpoint file are not "
+        "extracted or scored again",
+    )
+    parser.add_argument(
+        "--output",
+        default=OUTPUT_EXCEL,
+        help="Ranking report file (default: OUTPUT_EXCEL)",
+    )
+    parser.add_argument(
+        "--report-format",
+        choices=reports.REPORT_FORMATS,
+        default=os.getenv("REPORT_FORMAT") or None,
+        help="Report file format; rows are written as they are produced, so memory "
+        "use does not grow with the number of resumes "
+        "(default: REPORT_FORMAT or the --output file's extension, xlsx otherwise)",
+    )
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs a --checkpoint file")
+    return args
+
+
+def hash_file(file_path):
+    """SHA-256 of a resume file, or None if it can't be read"""
+    try:
+        with open(file_path, "rb") as f:
+            return sha256_bytes(f.read())
+    except OSError as e:
+        print(f"[ERROR] Failed to read {file_path}: {e}")
         return None
-    except Exception as e:
-        print(f"[!] {filename} → Error processing: {e}")
+
+
+def calls_per_resume(text, scoring_mode):
+    """Number of API requests process_resume_text would make for a resume"""
+    if scoring_mode == "keyword":
+        return 0
+    if scoring_mode == "single_call":
+        return 1
+    return 1 if has_contact_details(extract_contact_info(text)) else 2
+
+
+def shortlist_texts(texts, resume_files, optimized_criteria, args):
+    """
+    Drop the resumes the local similarity prefilter does not shortlist
+
+    Args:
+        texts: Dict of extracted text by resume index
+        resume_files: Resume file names, by index
+        optimized_criteria: Criteria JSON the resumes are ranked against
+        args: Parsed command line options
+
+    Returns:
+        tuple: (dict of shortlisted texts by index, number of API calls saved)
+    """
+    indices = [index for index in sorted(texts) if texts[index]]
+    scores = prefilter.similarity_scores(
+        [texts[index] for index in indices], prefilter.build_query(optimized_criteria)
+    )
+    kept = {
+        indices[position]
+        for position in prefilter.shortlist(
+            scores, args.prefilter_top_k, args.prefilter_threshold
+        )
+    }
+
+    calls_saved = 0
+    batch_scorer = (
+        make_batch_scorer(optimized_criteria, args)
+        if args.scoring_mode == "batched"
+        else None
+    )
+    if batch_scorer is not None:
+        # Skipped resumes save the batches they would have filled
+        excerpts = {index: fit_resume_text(texts[index]) for index in indices}
+        calls_saved = len(batch_scorer.pack([excerpts[index] for index in indices])) - len(
+            batch_scorer.pack([excerpts[index] for index in indices if index in kept])
+        )
+    for position, index in enumerate(indices):
+        if index not in kept:
+            if args.scoring_mode != "batched":
+                calls_saved += calls_per_resume(texts[index], args.scoring_mode)
+            print(
+                f"[i] Skipping {resume_files[index]}: similarity {scores[position]:.3f} "
+                "did not make the shortlist"
+            )
+    return {index: texts[index] for index in indices if index in kept}, calls_saved
+
+
+def make_batch_scorer(optimized_criteria, args, score_one=None):
+    """
+    Create a BatchScorer that sends batched prompts through chat()
+
+    Returns:
+        BatchScorer, or None if the criteria are not valid JSON
+    """
+    try:
+        evaluation_prompt = json.loads(optimized_criteria).get("evaluation_prompt", "")
+    except (TypeError, AttributeError, json.JSONDecodeError):
+        print("[ERROR] Could not parse optimized criteria from job description")
         return None
+    return batching.BatchScorer(
+        evaluation_prompt,
+        lambda prompt, excerpts: chat(prompt, use_cache=True, excerpts=excerpts),
+        score_one,
+        token_budget=args.batch_token_budget,
+        max_batch_size=args.batch_size,
+    )
+
+
+def batch_score_texts(texts, resume_files, optimized_criteria, args, on_result=None):
+    """
+    Score extracted resumes several per request
+
+    A resume that fails even on its own in a batched request is scored with
+    a single-resume request, then by keywords with --keyword-fallback.
+
+    Args:
+        texts: Dict of extracted text by resume index
+        resume_files: Resume file names, by index
+        optimized_criteria: Criteria JSON the resumes are ranked against
+        args: Parsed command line options
+        on_result: Optional callable(index, report row) called as each batch is done
+
+    Returns:
+        tuple: (dict of report rows by resume index, BatchScorer stats)
+    """
+    indices = [index for index in sorted(texts) if texts[index]]
+    batch_texts = [texts[index] for index in indices]
+
+    def score_one(position):
+        answer = score_resume(batch_texts[position], optimized_criteria)
+        try:
+            return json.loads(answer) if answer else None
+        except json.JSONDecodeError:
+            return None
+
+    batch_scorer = make_batch_scorer(optimized_criteria, args, score_one)
+    if batch_scorer is None:
+        return {}, {}
+
+    results = {}
+
+    def record_batch(answers):
+        for position, ranking_data in answers.items():
+            index = indices[position]
+            filename = resume_files[index]
+            candidate_info = extract_contact_info(texts[index])
+            if ranking_data:
+                results[index] = build_resume_record(
+                    filename, merge_contact_info(candidate_info, ranking_data), ranking_data
+                )
+            elif args.keyword_fallback:
+                print(f"[!] {filename} → AI scoring failed; falling back to keyword matching")
+                results[index] = keyword_record(
+                    texts[index], filename, optimized_criteria, candidate_info
+                )
+                if results[index]:
+                    keyword_stats["fallbacks"] += 1
+            if on_result is not None and results.get(index):
+                on_result(index, results[index])
+
+    excerpts = [fit_resume_text(text) for text in batch_texts]
+    batch_scorer.score(excerpts, on_batch=record_batch)
+    return results, batch_scorer.stats
 
 
 def main():
+    global resume_token_budget, keyword_job_description
+
+    args = parse_args()
+    resume_token_budget = args.resume_token_budget
+
     print("Resume Ranking System - Job Description Based")
+    print(f"Scoring mode: {args.scoring_mode}")
+    # Keyword scoring makes no API calls, so there is nothing to prefilter
+    prefilter_enabled = args.scoring_mode != "keyword" and bool(
+        args.prefilter_top_k or args.prefilter_threshold
+    )
+    if prefilter_enabled:
+        print(
+            f"Prefilter: top {args.prefilter_top_k or 'all'}, "
+            f"minimum similarity {args.prefilter_threshold or 0}"
+        )
     print("=" * 80)
 
     # Read and process job description
@@ -282,9 +803,17 @@ def main():
         print("[ERROR] Job description is required to run this system.")
         print("Please create a job_description.txt file with the job requirements.")
         return
+    keyword_job_description = job_description
 
     print("Creating optimized ranking criteria from job description...")
     optimized_criteria = create_optimized_prompt(job_description)
+    if not optimized_criteria and (
+        args.scoring_mode == "keyword" or args.keyword_fallback
+    ):
+        print("[!] Building keyword criteria from the skills named in the job description")
+        optimized_criteria = keyword_scorer.criteria_from_job_description(
+            job_description
+        )
     if not optimized_criteria:
         print("[ERROR] Failed to create optimized criteria from job description.")
         return
@@ -293,7 +822,9 @@ def main():
     print("-" * 80)
 
     files = os.listdir(INPUT_FOLDER)
-    resume_files = [f for f in files if f.lower().endswith((".pdf", ".docx", ".txt"))]
+    resume_files = sorted(
+        f for f in files if f.lower().endswith((".pdf", ".docx", ".txt"))
+    )
 
     if not resume_files:
         print("No resume files found in the input folder.")
@@ -302,49 +833,167 @@ def main():
     print(f"Found {len(resume_files)} resume(s) to process...")
     print("-" * 80)
 
-    # Process all resumes and collect data
-    all_resume_data = []
-    for f in resume_files:
-        resume_data = process_resume(os.path.join(INPUT_FOLDER, f), optimized_criteria)
-        if resume_data:
-            all_resume_data.append(resume_data)
+    # Process all resumes; texts are scored as soon as extraction finishes,
+    # and results are spilled to a temporary file as they come in, so the
+    # report is ranked without keeping every record in memory
+    with reports.RecordSpill() as spill:
+        score_and_report(
+            args, spill, resume_files, optimized_criteria, prefilter_enabled
+        )
+
 
-    if not all_resume_data:
+def score_and_report(args, spill, resume_files, optimized_criteria, prefilter_enabled):
+    """Score the resume files, spilling each record as it finishes, and write the report"""
+    resume_paths = [os.path.join(INPUT_FOLDER, f) for f in resume_files]
+    pending = list(range(len(resume_files)))
+    checkpoint = None
+    if args.checkpoint:
+        # Results are written as each resume finishes; with --resume, files
+        # already in the checkpoint are taken from it
+        checkpoint = JsonlCheckpoint(args.checkpoint, resume=args.resume)
+        file_hashes = [hash_file(path) for path in resume_paths]
+        pending = []
+        for index, file_hash in enumerate(file_hashes):
+            record = checkpoint.get(file_hash) if file_hash else None
+            if record:
+                spill.add(record, index)
+            else:
+                pending.append(index)
+        if len(spill):
+            print(
+                f"Checkpoint: {len(spill)} resume(s) already scored, "
+                f"{len(pending)} remaining"
+            )
+    restored = len(spill)
+    extracted_texts = (
+        (pending[position], text)
+        for position, text in iter_extracted_texts(
+            [resume_paths[index] for index in pending],
+            args.extract_workers,
+            args.extract_timeout,
+        )
+    )
+    if args.scoring_mode != "keyword":
+        # Tokens of resume text before compaction, counted once per resume
+        extracted_texts = (
+            (index, count_extracted_tokens(text)) for index, text in extracted_texts
+        )
+    calls_saved = 0
+    if prefilter_enabled:
+        # The prefilter compares resumes with each other, so every text is
+        # extracted before the shortlist is scored
+        shortlisted, calls_saved = shortlist_texts(
+            dict(extracted_texts), resume_files, optimized_criteria, args
+        )
+        extracted_texts = shortlisted.items()
+        shortlisted_count = len(shortlisted)
+    batch_stats = None
+    # Keyword and batched scoring return their results together; resumes
+    # scored one at a time go to the spill as each one finishes
+    scored = {}
+    if args.scoring_mode == "keyword":
+        # All texts are scored in one vectorized pass
+        scored = keyword_score_texts(
+            dict(extracted_texts), resume_files, optimized_criteria
+        )
+    elif args.scoring_mode == "batched":
+        scored, batch_stats = batch_score_texts(
+            dict(extracted_texts),
+            resume_files,
+            optimized_criteria,
+            args,
+            on_result=(
+                (lambda index, resume_data: checkpoint.add(file_hashes[index], resume_data))
+                if checkpoint is not None
+                else None
+            ),
+        )
+    else:
+        for index, text in extracted_texts:
+            resume_data = process_resume_text(
+                text,
+                resume_files[index],
+                optimized_criteria,
+                args.scoring_mode,
+                args.keyword_fallback,
+            )
+            if resume_data:
+                spill.add(resume_data, index)
+            if checkpoint is not None:
+                checkpoint.add(file_hashes[index], resume_data)
+    for index in sorted(scored):
+        if scored[index]:
+            spill.add(scored[index], index)
+    if checkpoint is not None:
+        # Keyword scores are saved once their single pass is done (adding a
+        # saved resume again is a no-op); failed resumes are left out and
+        # retried on --resume
+        for index, resume_data in scored.items():
+            checkpoint.add(file_hashes[index], resume_data)
+        checkpoint.close()
+
+    if not len(spill):
         print("No resumes could be processed successfully.")
         return
 
-    # Create DataFrame and sort by total score (descending)
-    df = pd.DataFrame(all_resume_data)
-    df = df.sort_values("Total Score", ascending=False)
-
-    # Add rank column
-    df.insert(0, "Rank", range(1, len(df) + 1))
-
-    # Save to Excel with formatting
+    # Rank the results and stream them to the report file
+    output_format = args.report_format or reports.report_format(args.output)
     try:
-        with pd.ExcelWriter(OUTPUT_EXCEL, engine="openpyxl") as writer:
-            df.to_excel(writer, sheet_name="Resume Rankings", index=False)
-
-            # Get the workbook and worksheet for formatting
-            workbook = writer.book
-            worksheet = writer.sheets["Resume Rankings"]
-
-            # Auto-adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
+        reports.write_report(args.output, spill, output_format)
 
         print("=" * 80)
-        print(f"Excel file created successfully: {OUTPUT_EXCEL}")
-        print(f"Total resumes processed: {len(all_resume_data)}")
+        print(f"Report created successfully: {args.output} ({output_format})")
+        print(f"Total resumes processed: {len(spill)}")
+        cache_stats = extraction_cache.stats()
+        print(
+            f"Extraction cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es)"
+        )
+        cache_stats = response_cache.stats()
+        print(
+            f"LLM response cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es)"
+        )
+        print(
+            f"API usage: {api_usage['requests']} request(s), "
+            f"{api_usage['prompt_tokens']} prompt + {api_usage['completion_tokens']} completion tokens"
+        )
+        if llm_client.stats["retries"] or llm_client.stats["failures"]:
+            print(
+                f"Retries: {llm_client.stats['retries']} "
+                f"({llm_client.stats['rate_limited']} rate limited, "
+                f"{llm_client.stats['timeouts']} timed out), "
+                f"{llm_client.stats['failures']} request(s) failed"
+            )
+        if checkpoint is not None:
+            print(
+                f"Checkpoint: {restored} resume(s) taken from {args.checkpoint}, "
+                f"{len(spill) - restored} added"
+            )
+        if batch_stats:
+            print(
+                f"Batching: {batch_stats['batches']} batched request(s), "
+                f"{batch_stats['failed']} failed, "
+                f"{batch_stats['splits']} split after failing, "
+                f"{batch_stats['single_retries']} resume(s) retried alone"
+            )
+        if compaction_stats["original_tokens"]:
+            print(
+                f"Resume text: {compaction_stats['original_tokens']} token(s) extracted, "
+                f"{compaction_stats['sent_tokens']} sent after compaction"
+            )
+        if keyword_stats["fallbacks"]:
+            print(
+                f"Keyword fallback: {keyword_stats['fallbacks']} resume(s) scored without the LLM"
+            )
+        if prefilter_enabled:
+            print(
+                f"Prefilter: {shortlisted_count} resume(s) shortlisted, "
+                f"{calls_saved} API call(s) saved"
+            )
+        for backend, stats in sorted(get_extraction_timings().items()):
+            print(
+                f"Extraction [{backend}]: {stats['files']} file(s), "
+                f"{stats['failures']} failure(s), {stats['avg_ms']} ms avg"
+            )
 
         # Display job description based criteria if available
         if optimized_criteria:
@@ -369,16 +1018,18 @@ def main():
                 pass
 
         print(f"\nTop 3 candidates:")
-        for i, row in df.head(3).iterrows():
+        for rank, row in enumerate(spill.top(3), 1):
             print(
-                f"{row['Rank']}. {row['Candidate Name']} - {row['Total Score']}/100 points"
+                f"{rank}. {row['Candidate Name']} - {row['Total Score']}/100 points"
             )
 
     except Exception as e:
-        print(f"Error creating Excel file: {e}")
+        print(f"Error creating {output_format} report: {e}")
+        if output_format == "csv":
+            return
         print("Falling back to CSV...")
-        csv_file = OUTPUT_EXCEL.replace(".xlsx", ".csv")
-        df.to_csv(csv_file, index=False)
+        csv_file = os.path.splitext(args.output)[0] + ".csv"
+        reports.write_report(csv_file, spill, "csv")
         print(f"CSV file created: {csv_file}")
 
 
@@ -82,6 +82,12 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Web and worker processes share the database; wait for locks
+        # instead of failing immediately
+        "OPTIONS": {"timeout": 20},
+        # Tests use a database file, so threads lock it as workers do in
+        # production (the in-memory test database locks differently)
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 